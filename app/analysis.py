@@ -1,40 +1,167 @@
 import base64
-import matplotlib
-import matplotlib.pyplot as plt
-from io import BytesIO
+import numpy as np
+import pandas as pd
+from .charts import render_chart_png
+
+
+def _trailing_means(closes, valid, window):
+    """Means of the last `window` closes per row, NaN unless all are present."""
+    n_days = closes.shape[1]
+    if n_days < window:
+        return np.full(closes.shape[0], np.nan)
+    sums = np.cumsum(np.where(valid, closes, 0.0), axis=1)
+    counts = np.cumsum(valid, axis=1)
+    if n_days == window:
+        window_sum, window_count = sums[:, -1], counts[:, -1]
+    else:
+        window_sum = sums[:, -1] - sums[:, -1 - window]
+        window_count = counts[:, -1] - counts[:, -1 - window]
+    return np.where(window_count == window, window_sum / window, np.nan)
+
+
+def _wilder_rsi(closes, period):
+    """Wilder-smoothed RSI of the last close per row, NaN without enough history."""
+    n_symbols = closes.shape[0]
+    delta = np.diff(closes, axis=1)
+    valid = ~np.isnan(delta)
+    gains = np.where(valid & (delta > 0), delta, 0.0)
+    losses = np.where(valid & (delta < 0), -delta, 0.0)
+
+    # Histories may start late (leading NaNs); seed each row with the simple
+    # average of its first `period` changes, then apply Wilder's smoothing.
+    first = np.argmax(valid, axis=1)
+    seed_end = first + period
+    ready = valid.any(axis=1) & (seed_end <= delta.shape[1])
+    rows = np.flatnonzero(ready)
+
+    avg_gain = np.full(n_symbols, np.nan)
+    avg_loss = np.full(n_symbols, np.nan)
+    if not rows.size:
+        return avg_gain
+    gain_sums = np.concatenate([np.zeros((n_symbols, 1)), np.cumsum(gains, axis=1)], axis=1)
+    loss_sums = np.concatenate([np.zeros((n_symbols, 1)), np.cumsum(losses, axis=1)], axis=1)
+    avg_gain[rows] = (gain_sums[rows, seed_end[rows]] - gain_sums[rows, first[rows]]) / period
+    avg_loss[rows] = (loss_sums[rows, seed_end[rows]] - loss_sums[rows, first[rows]]) / period
+
+    for t in range(seed_end[rows].min(), delta.shape[1]):
+        update = ready & (t >= seed_end)
+        avg_gain = np.where(update, (avg_gain * (period - 1) + gains[:, t]) / period, avg_gain)
+        avg_loss = np.where(update, (avg_loss * (period - 1) + losses[:, t]) / period, avg_loss)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    # No losses over the window is reported as a strong upward trend
+    return np.where(ready & (avg_loss == 0), 100.0, rsi)
+
+
+def calculate_batch_indicators(closes, symbols=None, rsi_period=14):
+    """
+    Calculates MA50, MA200 and RSI for many symbols at once.
+
+    Args:
+        closes (DataFrame or ndarray): Close prices, one row per symbol and
+            one column per day in ascending order. Symbols with a shorter
+            history are padded with leading NaNs.
+        symbols (list, optional): Row labels when `closes` is an ndarray.
+        rsi_period (int): RSI lookback in days.
+
+    Returns:
+        DataFrame: Columns ma_50, ma_200 and rsi indexed by symbol, NaN where
+        a symbol lacks enough history.
+    """
+    if isinstance(closes, pd.DataFrame):
+        symbols = closes.index if symbols is None else symbols
+        closes = closes.to_numpy(dtype=float)
+    closes = np.atleast_2d(np.asarray(closes, dtype=float))
+    valid = ~np.isnan(closes)
 
-matplotlib.use('Agg')
-plt.style.use("dark_background")
+    return pd.DataFrame({
+        'ma_50': _trailing_means(closes, valid, 50),
+        'ma_200': _trailing_means(closes, valid, 200),
+        'rsi': _wilder_rsi(closes, rsi_period),
+    }, index=symbols)
 
 
 def calculate_technical_indicators(history_df):
     """Calculates technical indicators from historical data."""
     indicators = {}
     if history_df is not None and not history_df.empty:
-        indicators['ma_50'] = history_df['c'].rolling(
-            50).mean().iloc[-1] if len(history_df) >= 50 else 'N/A'
-        indicators['ma_200'] = history_df['c'].rolling(
-            200).mean().iloc[-1] if len(history_df) >= 200 else 'N/A'
-
-        if len(history_df) >= 14:
-            delta = history_df['c'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-            if loss.iloc[-1] != 0:
-                rs = gain.iloc[-1] / loss.iloc[-1]
-                indicators['rsi'] = 100 - (100 / (1 + rs))
-            else:
-                # Or some other indicator of strong upward trend
-                indicators['rsi'] = 100
-        else:
-            indicators['rsi'] = 'N/A'
+        row = calculate_batch_indicators(history_df['c'].to_numpy(dtype=float)).iloc[0]
+        for name, value in row.items():
+            indicators[name] = 'N/A' if np.isnan(value) else float(value)
     return indicators
 
 
-def calculate_intrinsic_value(eps, growth_rate, current_price):
+# Graham's revised formula scales the value by 4.4 / Y, where 4.4% was the
+# AAA corporate bond yield of his day and Y is today's
+GRAHAM_BASE_YIELD = 4.4
+# Yield used when no current AAA yield is available
+BOND_YIELD_AAA = 4.4
+
+# Recommendation codes returned by calculate_intrinsic_values
+RECOMMEND_SELL = -1
+RECOMMEND_HOLD = 0
+RECOMMEND_BUY = 1
+RECOMMENDATIONS = {RECOMMEND_SELL: 'sell', RECOMMEND_HOLD: 'hold', RECOMMEND_BUY: 'buy'}
+# Percent gap between intrinsic value and price beyond which to buy or sell
+RECOMMENDATION_MARGIN = 20
+
+
+def _float_array(values):
+    """Returns values as a float array; None, 'N/A' and other non-numbers become NaN."""
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(np.ravel(values), dtype=object),
+                             errors='coerce').to_numpy(dtype=float).reshape(np.shape(values))
+
+
+def calculate_intrinsic_values(eps, growth_rate, current_price, bond_yield=BOND_YIELD_AAA,
+                               margin=RECOMMENDATION_MARGIN):
     """
-    Calculates intrinsic value using a simplified Graham Formula.
-    Assumes a fixed AAA corporate bond yield.
+    Calculates Graham intrinsic values for many symbols at once.
+
+    Args:
+        eps (array-like): Trailing EPS per symbol.
+        growth_rate (array-like): Expected growth in percent (5 for 5%).
+        current_price (array-like): Current price per symbol.
+        bond_yield (float): Current AAA corporate bond yield in percent.
+        margin (float): Percent gap beyond which a symbol is a buy or sell.
+
+    Returns:
+        dict: Arrays intrinsic_value, price_difference and
+        percentage_difference (NaN where EPS is missing or not positive,
+        growth is missing, or the price is unusable) and recommendation
+        codes (RECOMMEND_BUY, RECOMMEND_HOLD or RECOMMEND_SELL).
+    """
+    eps = _float_array(eps)
+    growth_rate = _float_array(growth_rate)
+    current_price = _float_array(current_price)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valued = (eps > 0) & ~np.isnan(growth_rate)
+        intrinsic = np.where(
+            valued, eps * (8.5 + 2 * growth_rate) * GRAHAM_BASE_YIELD / bond_yield, np.nan)
+        priced = valued & (current_price > 0)
+        difference = np.where(priced, intrinsic - current_price, np.nan)
+        percentage = np.where(priced, difference / current_price * 100, np.nan)
+
+    recommendation = np.full(percentage.shape, RECOMMEND_HOLD, dtype='i1')
+    recommendation[percentage > margin] = RECOMMEND_BUY
+    recommendation[percentage < -margin] = RECOMMEND_SELL
+    return {
+        'intrinsic_value': intrinsic,
+        'price_difference': difference,
+        'percentage_difference': percentage,
+        'recommendation': recommendation,
+    }
+
+
+def calculate_intrinsic_value(eps, growth_rate, current_price, bond_yield=BOND_YIELD_AAA):
+    """
+    Calculates intrinsic value using a simplified Graham Formula for one
+    symbol (see calculate_intrinsic_values). Values are rounded to cents
+    for display and missing ones are 'N/A'.
     """
     analysis = {
         'intrinsic_value': 'N/A',
@@ -42,53 +169,30 @@ def calculate_intrinsic_value(eps, growth_rate, current_price):
         'percentage_difference': 'N/A',
         'recommendation': 'hold'
     }
-    BOND_YIELD_AAA = 4.4  # This should ideally be fetched dynamically
-
-    try:
-        eps = float(eps) if eps is not None else None
-        growth_rate = float(growth_rate) if growth_rate is not None else None
-
-
-    except ValueError:
-        eps = None
-        growth_rate = None
-
-    if eps is not None and eps > 0 and growth_rate is not None:
-        # Ensure growth_rate is a percentage (e.g., 5 for 5%)
-        intrinsic = (eps * (8.5 + 2 * growth_rate) *
-                     BOND_YIELD_AAA) / BOND_YIELD_AAA
-        analysis['intrinsic_value'] = round(intrinsic, 2)
-        price_diff = analysis['intrinsic_value'] - current_price
-        analysis['price_difference'] = round(price_diff, 2)
-        analysis['percentage_difference'] = round(
-            (price_diff / current_price) * 100, 2)
-        if analysis['percentage_difference'] > 20:
-            analysis['recommendation'] = 'buy'
-        elif analysis['percentage_difference'] < -20:
-            analysis['recommendation'] = 'sell'
+    intrinsic = calculate_intrinsic_values(
+        [eps], [growth_rate], [np.nan], bond_yield)['intrinsic_value'][0]
+    if np.isnan(intrinsic):
+        return analysis
+    analysis['intrinsic_value'] = round(float(intrinsic), 2)
+
+    price = _float_array([current_price])[0]
+    if not price > 0:
+        return analysis
+    # Differences are taken from the rounded value shown on the page
+    price_diff = analysis['intrinsic_value'] - price
+    analysis['price_difference'] = round(price_diff, 2)
+    analysis['percentage_difference'] = round((price_diff / price) * 100, 2)
+    if analysis['percentage_difference'] > RECOMMENDATION_MARGIN:
+        analysis['recommendation'] = 'buy'
+    elif analysis['percentage_difference'] < -RECOMMENDATION_MARGIN:
+        analysis['recommendation'] = 'sell'
     return analysis
 
 
 def generate_chart_image(df, **kwargs):
     """Generates a base64-encoded chart image from a DataFrame."""
-    if df is None or df.empty:
+    png = render_chart_png(df, title=kwargs.get('title'),
+                           intrinsic_value=kwargs.get('intrinsic_value'))
+    if png is None:
         return None
-
-    fig, ax = plt.subplots()
-    df.plot(x='timestamp', y='c', ax=ax, label='Price')
-
-    if 'title' in kwargs:
-        ax.set_title(kwargs['title'])
-    if 'intrinsic_value' in kwargs and kwargs['intrinsic_value'] != 'N/A':
-        ax.axhline(kwargs['intrinsic_value'], color='r',
-                   linestyle='--', label='Intrinsic Value')
-
-    ax.set_ylabel('Price')
-    ax.set_xlabel('Date')
-    ax.legend()
-
-    buf = BytesIO()
-    fig.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return base64.b64encode(buf.read()).decode('utf-8')
+    return base64.b64encode(png).decode('utf-8')
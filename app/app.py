@@ -1,14 +1,22 @@
 import os
+import time
 from dotenv import load_dotenv
 from datetime import datetime, UTC
-from flask import Flask, render_template, request, jsonify, make_response
+from flask import Flask, render_template, request, jsonify, make_response, url_for, g
 from flask_socketio import SocketIO
-from flask_login import login_required
+from flask_login import current_user, login_required
 
 # New imports from the new modules
 from .data import fetchers
 from .sockets import handlers as socket_handlers
 from . import analysis
+from . import charts
+from . import metrics
+from .data.screener import normalize_filters
+from .data.gateway import in_background
+from .concurrency import ASYNC_MODE
+from .profiler import SamplingProfiler
+from .precompute import PrecomputeScheduler, WarmTask
 from .auth import auth_bp, login_manager
 
 # Load environment variables
@@ -16,8 +24,10 @@ load_dotenv()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24).hex()
+# A message queue (e.g. redis://) relays emits between worker processes
 socketio = SocketIO(app, cors_allowed_origins="*",
-                    async_mode='threading', engineio_logger=True)
+                    async_mode=ASYNC_MODE, engineio_logger=True,
+                    message_queue=os.getenv('SOCKETIO_MESSAGE_QUEUE'))
 
 # Initialize Flask-Login
 login_manager.init_app(app)
@@ -26,7 +36,57 @@ login_manager.init_app(app)
 app.register_blueprint(auth_bp)
 
 # Register the socket handlers
-socket_handlers.register_socket_handlers(socketio, fetchers)
+socket_handlers.register_socket_handlers(
+    socketio, fetchers, start_background=lambda: start_precompute())
+
+# Request latency by endpoint, and cache effectiveness, exposed on /metrics
+HTTP_SECONDS = metrics.histogram(
+    'http_request_seconds', 'HTTP request latency', ('endpoint', 'status'))
+CACHES = {
+    'detail': fetchers.detail_cache,
+    'clock': fetchers.clock_cache,
+    'chart': charts.chart_cache,
+}
+metrics.counter('cache_hits_total', 'Cache hits', ('cache',),
+                func=lambda: {(name,): cache.hits for name, cache in CACHES.items()})
+metrics.counter('cache_misses_total', 'Cache misses', ('cache',),
+                func=lambda: {(name,): cache.misses for name, cache in CACHES.items()})
+metrics.gauge('cache_entries', 'Cached entries', ('cache',),
+              func=lambda: {('detail',): len(fetchers.detail_cache), ('chart',): len(charts.chart_cache)})
+
+
+def _screener_rows():
+    table = fetchers.screener.stats()['table']
+    return table['size'] if table else 0
+
+
+metrics.gauge('screener_rows', 'Rows in the current screener table', func=_screener_rows)
+metrics.gauge('screener_refresh_seconds', 'Duration of the last screener table rebuild',
+              func=lambda: fetchers.screener.last_refresh_seconds)
+
+# Opt-in stack sampling, switched on with PROFILER_ENABLED=1 or /api/profiler
+profiler = SamplingProfiler(interval=float(os.getenv('PROFILER_INTERVAL', '0.01')))
+if os.getenv('PROFILER_ENABLED') == '1':
+    profiler.start()
+
+# /metrics is only served to logged-in users, and to scrapers sending
+# this bearer token when it is set
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        HTTP_SECONDS.observe(time.perf_counter() - started,
+                             (request.endpoint or 'unknown', str(response.status_code)))
+    return response
+
 
 # Flask routes
 
@@ -51,77 +111,281 @@ def api_assets():
     try:
         # Validate and parse query parameters
         draw = int(request.args.get('draw', 1))
-        start = int(request.args.get('start', 0))
+        start = max(int(request.args.get('start', 0)), 0)
         length = int(request.args.get('length', 100))
-        search_value = request.args.get('search[value]', '').lower()
+        search_value = request.args.get('search[value]', '')
         order_column = int(request.args.get('order[0][column]', 0))
         order_dir = request.args.get('order[0][dir]', 'asc')
 
-        # Ensure fetchers.all_assets is valid
-        if not hasattr(fetchers, 'all_assets') or not isinstance(fetchers.all_assets, list):
+        # Ensure the asset catalog is available
+        catalog = fetchers.get_asset_catalog()
+        if catalog is None:
             raise ValueError("Asset data is unavailable or invalid.")
 
-        # Filter and sort assets
-        filtered_assets = [
-            asset for asset in fetchers.all_assets
-            if search_value in asset.symbol.lower() or search_value in asset.name.lower()
-        ]
-
+        # Filter, sort and paginate against the pre-indexed catalog
         column_map = {0: 'symbol', 1: 'name', 2: 'exchange'}
-        sort_key = column_map.get(order_column, 'symbol')
-        filtered_assets.sort(key=lambda a: getattr(
-            a, sort_key).lower(), reverse=(order_dir == 'desc'))
+        page, records_filtered = catalog.query(
+            search=search_value,
+            column=column_map.get(order_column, 'symbol'),
+            descending=(order_dir == 'desc'),
+            start=start,
+            length=length if length > 0 else len(catalog))
+        data = [[f'<a href="/stock/{symbol}">{symbol}</a>', name, exchange]
+                for symbol, name, exchange in page]
 
-        # Paginate results
-        paginated_assets = filtered_assets[start:start + length]
-        data = [[f'<a href="/stock/{asset.symbol}">{asset.symbol}</a>',
-                 asset.name, asset.exchange] for asset in paginated_assets]
-
-        # Create response with headers
-        response = make_response(jsonify({
+        # DataTables sends a new draw counter (and a cache-busting `_`) with
+        # every request, so repeated pages are served from the catalog's
+        # query cache rather than with HTTP validators
+        return jsonify({
             'draw': draw,
-            'recordsTotal': len(fetchers.all_assets),
-            'recordsFiltered': len(filtered_assets),
+            'recordsTotal': len(catalog),
+            'recordsFiltered': records_filtered,
             'data': data
-        }))
-        response.headers['Content-Type'] = 'application/json'
-        response.headers['Cache-Control'] = 'no-cache'
-        return response
+        })
 
     except Exception as e:
         # Handle errors gracefully
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/stock/<symbol>')
+# Largest page /api/screener returns
+SCREENER_MAX_PAGE = 1000
+
+
+@app.route('/api/screener')
 @login_required
-def stock_details(symbol):
-    data = fetchers.get_stock_details(symbol)
-    if not data:
-        return "Stock not found or data not available.", 404
+def api_screener():
+    """
+    Filter and rank the whole asset universe by precomputed metrics.
 
-    history_df = data.get('history_df')
+    Query parameters: min_<metric>/max_<metric>, trend, cross, rsi_band and
+    exchange filters (see screener.normalize_filters), sort, order
+    (asc/desc), start and length.
+    """
+    try:
+        filters = normalize_filters(request.args)
+        start = max(int(request.args.get('start', 0)), 0)
+        length = min(max(int(request.args.get('length', 100)), 0), SCREENER_MAX_PAGE)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    # Perform analysis
-    data.update(analysis.calculate_technical_indicators(history_df))
-    
+    table = fetchers.get_screener_table()
+    if table is None:
+        response = jsonify({'error': 'Screener data is still being computed.'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+
+    rows, records_filtered = table.query(
+        filters,
+        sort=request.args.get('sort', 'symbol'),
+        descending=request.args.get('order', 'asc') == 'desc',
+        start=start,
+        length=length)
+    response = make_response(jsonify({
+        'as_of': table.as_of.isoformat(),
+        'recordsTotal': len(table),
+        'recordsFiltered': records_filtered,
+        'data': rows
+    }))
+    response.headers['Cache-Control'] = 'private, max-age=60'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@app.route('/api/intraday/<symbol>')
+@login_required
+def api_intraday(symbol):
+    """Serve today's streamed minute bars for a watched symbol from memory."""
+    bars = socket_handlers.tick_store.bars(symbol.upper())
+    return jsonify({
+        'symbol': symbol.upper(),
+        'bars': [{
+            'timestamp': row.timestamp.isoformat(),
+            'open': row.open,
+            'high': row.high,
+            'low': row.low,
+            'close': row.close,
+            'volume': row.volume
+        } for row in bars.itertuples(index=False)]
+    })
+
+
+@app.route('/api/stream/stats')
+@login_required
+def api_stream_stats():
+    """Report upstream connection, ingest, emit and subscription metrics."""
+    return jsonify({
+        'upstream': socket_handlers.upstream.stats(),
+        'ingest': socket_handlers.ingest_pipeline.stats(),
+        'emit': socket_handlers.quote_pipeline.stats(),
+        'subscriptions': socket_handlers.subscription_batcher.stats(),
+        'ticks': socket_handlers.tick_store.stats()
+    })
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose all metrics in the Prometheus text format to logged-in users or METRICS_TOKEN holders."""
+    scraper = METRICS_TOKEN and request.headers.get('Authorization') == f'Bearer {METRICS_TOKEN}'
+    if not (scraper or current_user.is_authenticated or app.config.get('LOGIN_DISABLED')):
+        return "Unauthorized.", 401
+    response = make_response(metrics.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/api/profiler', methods=['GET', 'POST'])
+@login_required
+def api_profiler():
+    """
+    Start, stop or reset the sampling profiler (POST {"action": ..., "interval": ...}),
+    or read its state; GET ?format=collapsed returns the sampled stacks.
+    """
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        action = body.get('action')
+        if action == 'start':
+            try:
+                interval = float(body['interval']) if body.get('interval') else None
+            except (TypeError, ValueError):
+                return jsonify({'error': 'interval must be a number of seconds'}), 400
+            profiler.start(interval=interval)
+        elif action == 'stop':
+            profiler.stop()
+        elif action == 'reset':
+            profiler.reset()
+        else:
+            return jsonify({'error': "action must be 'start', 'stop' or 'reset'"}), 400
+    elif request.args.get('format') == 'collapsed':
+        response = make_response(profiler.report(limit=request.args.get('limit', type=int)))
+        response.headers['Content-Type'] = 'text/plain; charset=utf-8'
+        return response
+    return jsonify(profiler.stats())
+
+
+# Chart kinds served by /chart/<symbol>.png and their titles
+CHART_TITLES = {
+    'history': '{symbol} 1-Year Price History',
+    'analysis': '{symbol} Price vs Intrinsic Value',
+}
+
+
+def intrinsic_analysis(data):
+    """Runs the Graham valuation on fetched detail data."""
     # Use 'earningsGrowth' if available, otherwise default to a sensible 5%
     growth_rate = data.get('earnings_growth', 0.05)
     if growth_rate:
         growth_rate *= 100 # Convert to percentage for formula
 
-    intrinsic_analysis = analysis.calculate_intrinsic_value(
+    return analysis.calculate_intrinsic_value(
         data.get('eps'),
         growth_rate,
-        data.get('current_price')
+        data.get('current_price'),
+        bond_yield=fetchers.get_bond_yield()
     )
-    data.update(intrinsic_analysis)
 
-    # Generate charts
-    data['history_chart'] = analysis.generate_chart_image(
-        history_df, title=f'{symbol} 1-Year Price History')
-    data['analysis_chart'] = analysis.generate_chart_image(
-        history_df, title=f'{symbol} Price vs Intrinsic Value', intrinsic_value=data['intrinsic_value'])
+
+# Detail page data kept warm ahead of demand for popular and watched symbols
+FUNDAMENTAL_COMPONENTS = ('info', 'income_statement', 'balance_sheet', 'cash_flow')
+FUNDAMENTALS_REFRESH_AHEAD = 30 * 60
+NEWS_REFRESH_AHEAD = 2 * 60
+
+
+def _derived_staleness(symbol, is_cached):
+    """Staleness of data computed from cached bars; it waits until the bars are warm."""
+    bars = fetchers.peek_detail_component(symbol, 'bars')
+    if bars is None or bars.empty:
+        return 0.0
+    return 0.0 if is_cached(symbol, bars) else 1.0
+
+
+def _warm_fundamentals(symbol):
+    for component in FUNDAMENTAL_COMPONENTS:
+        fetchers.refresh_detail_component(symbol, component)
+
+
+def _warm_indicators(symbol):
+    fetchers.get_technical_indicators(symbol, fetchers.peek_detail_component(symbol, 'bars'))
+
+
+def _warm_history_chart(symbol):
+    # The analysis chart depends on the live price, so only the history chart is prerendered
+    charts.get_chart_png(symbol, fetchers.peek_detail_component(symbol, 'bars'),
+                         title=CHART_TITLES['history'].format(symbol=symbol))
+
+
+PRECOMPUTE_TASKS = [
+    WarmTask('bars', in_background(lambda symbol: fetchers.get_detail_component(symbol, 'bars')),
+             lambda symbol: fetchers.detail_staleness(symbol, ('bars',)), cost=1),
+    WarmTask('fundamentals', in_background(_warm_fundamentals),
+             lambda symbol: fetchers.detail_staleness(
+                 symbol, FUNDAMENTAL_COMPONENTS, FUNDAMENTALS_REFRESH_AHEAD),
+             cost=len(FUNDAMENTAL_COMPONENTS)),
+    WarmTask('news', in_background(lambda symbol: fetchers.refresh_detail_component(symbol, 'news')),
+             lambda symbol: fetchers.detail_staleness(symbol, ('news',), NEWS_REFRESH_AHEAD), cost=1),
+    WarmTask('indicators', _warm_indicators,
+             lambda symbol: _derived_staleness(symbol, fetchers.has_technical_indicators),
+             cost=0, heavy=False),
+    WarmTask('charts', _warm_history_chart,
+             lambda symbol: _derived_staleness(symbol, lambda s, bars: charts.is_chart_cached(
+                 s, bars, title=CHART_TITLES['history'].format(symbol=s))),
+             cost=0),
+]
+precompute = PrecomputeScheduler(
+    PRECOMPUTE_TASKS,
+    watched=lambda: socket_handlers.state_store.symbols(),
+    is_market_open=lambda: fetchers.is_market_open(),
+    top_n=int(os.getenv('PRECOMPUTE_TOP_N', '50')),
+    max_concurrency=int(os.getenv('PRECOMPUTE_CONCURRENCY', '4')),
+    calls_per_minute=float(os.getenv('PRECOMPUTE_CALLS_PER_MINUTE', '120')),
+    interval=float(os.getenv('PRECOMPUTE_INTERVAL', '30')))
+# The scheduler starts with the stream threads on the first watchlist
+# connection; PRECOMPUTE_ENABLED=0 turns it off, and it never runs in testing
+PRECOMPUTE_ENABLED = os.getenv('PRECOMPUTE_ENABLED', '1') != '0'
+
+
+def start_precompute():
+    """Starts the precompute scheduler unless it is disabled."""
+    if PRECOMPUTE_ENABLED and not app.config.get('TESTING'):
+        precompute.start()
+
+
+metrics.counter('precompute_warmed_total', 'Precompute tasks completed',
+                func=lambda: precompute.warmed)
+metrics.counter('precompute_errors_total', 'Precompute tasks that failed',
+                func=lambda: precompute.errors)
+metrics.counter('precompute_deferred_total', 'Precompute tasks deferred by the provider call budget',
+                func=lambda: precompute.deferred)
+metrics.gauge('precompute_tracked_symbols', 'Symbols with a request popularity score',
+              func=lambda: len(precompute.tracker))
+
+
+@app.route('/stock/<symbol>')
+@login_required
+def stock_details(symbol):
+    data = fetchers.get_stock_details(symbol)
+    if not data:
+        return "Stock not found or data not available.", 404
+    precompute.record(symbol)
+
+    history_df = data.get('history_df')
+
+    # Perform analysis
+    data.update(fetchers.get_technical_indicators(symbol, history_df))
+    data.update(intrinsic_analysis(data))
+
+    # Charts are served from /chart/<symbol>.png; start rendering them now
+    # so they are cached by the time the browser requests them
+    chart_args = {
+        'history': None,
+        'analysis': data['intrinsic_value'],
+    }
+    for kind, intrinsic_value in chart_args.items():
+        chart = charts.prerender_chart(
+            symbol, history_df, title=CHART_TITLES[kind].format(symbol=symbol),
+            intrinsic_value=intrinsic_value)
+        data[f'{kind}_chart'] = url_for('chart_image', symbol=symbol, kind=kind) if chart else None
 
     # Remove the DataFrame from the data passed to the template
     if 'history_df' in data:
@@ -141,3 +405,34 @@ def stock_details(symbol):
         response.headers['Content-Type'] = 'text/plain; charset=utf-8'
         response.headers['Cache-Control'] = 'no-cache'
         return response, 500
+
+
+@app.route('/chart/<symbol>.png')
+@login_required
+def chart_image(symbol):
+    kind = request.args.get('kind', 'history')
+    if kind not in CHART_TITLES:
+        return "Unknown chart type.", 404
+
+    try:
+        history_df = fetchers.get_detail_component(symbol, 'bars')
+        intrinsic_value = None
+        if kind == 'analysis':
+            detail = dict(fetchers.get_detail_component(symbol, 'quote'))
+            detail.update(fetchers.get_detail_component(symbol, 'info'))
+            intrinsic_value = intrinsic_analysis(detail)['intrinsic_value']
+        png = charts.get_chart_png(
+            symbol, history_df, title=CHART_TITLES[kind].format(symbol=symbol),
+            intrinsic_value=intrinsic_value)
+    except Exception as e:
+        print(f"Error rendering {kind} chart for {symbol}: {e}")
+        png = None
+
+    if png is None:
+        return "Chart not available.", 404
+
+    response = make_response(png)
+    response.headers['Content-Type'] = 'image/png'
+    response.headers['Cache-Control'] = 'private, max-age=300'
+    response.add_etag()
+    return response.make_conditional(request)
@@ -0,0 +1,125 @@
+import threading
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from .data.cache import TTLCache
+from .concurrency import offload
+
+# Colors matching matplotlib's "dark_background" style
+BACKGROUND_COLOR = 'black'
+FOREGROUND_COLOR = 'white'
+PRICE_COLOR = '#8dd3c7'
+INTRINSIC_COLOR = 'r'
+
+CHART_CACHE_SIZE = 512
+CHART_TTL = 24 * 60 * 60
+
+# PNG bytes keyed by (symbol, title, last bar timestamp, intrinsic value)
+chart_cache = TTLCache(max_entries=CHART_CACHE_SIZE)
+
+# Charts render on a small dedicated pool instead of request threads, and
+# each renderer thread reuses one figure; Figure objects are not thread-safe
+CHART_RENDER_WORKERS = 2
+CHART_RENDER_TIMEOUT = 30
+render_executor = ThreadPoolExecutor(
+    max_workers=CHART_RENDER_WORKERS, thread_name_prefix='chart_render')
+_templates = threading.local()
+
+
+def _template_figure():
+    """Returns this thread's figure, created once with the dark theme applied."""
+    fig = getattr(_templates, 'figure', None)
+    if fig is None:
+        fig = Figure(facecolor=BACKGROUND_COLOR)
+        FigureCanvasAgg(fig)
+        _templates.figure = fig
+    return fig
+
+
+def _style_axes(ax):
+    ax.set_facecolor(BACKGROUND_COLOR)
+    for spine in ax.spines.values():
+        spine.set_color(FOREGROUND_COLOR)
+    ax.tick_params(colors=FOREGROUND_COLOR)
+    ax.xaxis.label.set_color(FOREGROUND_COLOR)
+    ax.yaxis.label.set_color(FOREGROUND_COLOR)
+    ax.title.set_color(FOREGROUND_COLOR)
+
+
+def render_chart_png(df, title=None, intrinsic_value=None):
+    """
+    Renders a price chart to PNG bytes with the object-oriented Figure API.
+
+    Args:
+        df (DataFrame): Bars with 'timestamp' and 'c' (close) columns.
+        title (str, optional): Chart title.
+        intrinsic_value (float, optional): Draws a dashed horizontal line.
+
+    Returns:
+        bytes: The PNG image, or None when there is no data.
+    """
+    if df is None or df.empty:
+        return None
+
+    fig = _template_figure()
+    fig.clear()
+    ax = fig.add_subplot()
+    _style_axes(ax)
+    ax.plot(df['timestamp'], df['c'], color=PRICE_COLOR, label='Price')
+
+    if title:
+        ax.set_title(title)
+    if intrinsic_value is not None and intrinsic_value != 'N/A':
+        ax.axhline(intrinsic_value, color=INTRINSIC_COLOR,
+                   linestyle='--', label='Intrinsic Value')
+
+    ax.set_ylabel('Price')
+    ax.set_xlabel('Date')
+    legend = ax.legend(facecolor=BACKGROUND_COLOR, edgecolor=FOREGROUND_COLOR)
+    for text in legend.get_texts():
+        text.set_color(FOREGROUND_COLOR)
+    fig.autofmt_xdate()
+
+    buf = BytesIO()
+    fig.savefig(buf, format='png', facecolor=BACKGROUND_COLOR)
+    return buf.getvalue()
+
+
+def _chart_key(symbol, df, title, intrinsic_value):
+    return (symbol, title, str(df['timestamp'].iloc[-1]), intrinsic_value)
+
+
+def _cached_chart_png(symbol, df, title, intrinsic_value):
+    """Returns PNG bytes from the cache, rendering them on a miss."""
+    key = _chart_key(symbol, df, title, intrinsic_value)
+    return chart_cache.get_or_load(
+        key, lambda: offload(render_chart_png, df, title=title, intrinsic_value=intrinsic_value),
+        ttl=CHART_TTL)
+
+
+def prerender_chart(symbol, df, title=None, intrinsic_value=None):
+    """Queues a chart for rendering so it is cached before the browser asks."""
+    if df is None or df.empty:
+        return None
+    return render_executor.submit(_cached_chart_png, symbol, df, title, intrinsic_value)
+
+
+def is_chart_cached(symbol, df, title=None, intrinsic_value=None):
+    """True if this chart is already rendered for the latest bar."""
+    if df is None or df.empty:
+        return False
+    return chart_cache.peek(_chart_key(symbol, df, title, intrinsic_value)) is not None
+
+
+def get_chart_png(symbol, df, title=None, intrinsic_value=None):
+    """
+    Returns cached PNG bytes for a chart, rendering it on the render pool.
+
+    The cache key includes the last bar timestamp, so a new daily bar or a
+    changed intrinsic value produces a new image.
+    """
+    future = prerender_chart(symbol, df, title=title, intrinsic_value=intrinsic_value)
+    if future is None:
+        return None
+    return future.result(timeout=CHART_RENDER_TIMEOUT)
@@ -0,0 +1,45 @@
+import os
+
+# Socket.IO server mode: 'threading' (default) or 'eventlet'. In eventlet
+# mode every client is a green thread, so one process can hold tens of
+# thousands of mostly idle websockets.
+ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'threading')
+ASYNC_MODES = ('threading', 'eventlet')
+
+if ASYNC_MODE not in ASYNC_MODES:
+    raise ValueError(
+        f"SOCKETIO_ASYNC_MODE must be one of {', '.join(ASYNC_MODES)}, got {ASYNC_MODE!r}")
+
+_tpool = None
+
+
+def monkey_patch():
+    """
+    Prepares the process for the selected async mode. Must run before any
+    other module is imported (see main.py).
+
+    In eventlet mode the standard library is patched so sockets, sleeps and
+    locks yield to other green threads; network calls made through requests
+    (the Alpaca SDK) become cooperative without code changes.
+    """
+    global _tpool
+    if ASYNC_MODE != 'eventlet':
+        return
+    import eventlet
+    eventlet.monkey_patch()
+    from eventlet import tpool
+    _tpool = tpool
+
+
+def offload(func, *args, **kwargs):
+    """
+    Runs a call that blocks without yielding (native I/O such as yfinance's
+    curl_cffi sessions, or CPU-bound work like chart rendering).
+
+    In eventlet mode the call runs on eventlet's bounded pool of native
+    threads (EVENTLET_THREADPOOL_SIZE, default 20) so the hub keeps serving
+    sockets; otherwise it is called directly on the current thread.
+    """
+    if _tpool is None:
+        return func(*args, **kwargs)
+    return _tpool.execute(func, *args, **kwargs)
@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+import numpy as np
+from .catalog import AssetCatalog, build_asset_table
+
+
+def write_snapshot(table, path):
+    """
+    Atomically writes an asset table to an .npy snapshot.
+
+    The file is written next to `path` and renamed over it, so processes
+    that have the previous snapshot memory-mapped keep a consistent view.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, table, allow_pickle=False)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    """Memory-maps an asset snapshot read-only, or returns None if missing."""
+    try:
+        return np.load(path, mmap_mode='r', allow_pickle=False)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error loading asset snapshot {path}: {e}")
+        return None
+
+
+class AssetUniverse:
+    """
+    Lazily loaded asset universe backed by an on-disk snapshot.
+
+    The first call to `catalog()` memory-maps the snapshot (shared through
+    the OS page cache by every worker process). Without a snapshot, the
+    first caller fetches synchronously. At most every `check_interval`
+    seconds, `catalog()` then swaps in a snapshot another worker has
+    written since, or refreshes the data from `fetch_assets` in a
+    background thread once it is older than `max_age` seconds.
+    """
+
+    def __init__(self, fetch_assets, path, max_age=24 * 60 * 60, check_interval=5 * 60):
+        self.fetch_assets = fetch_assets
+        self.path = path
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._catalog = None
+        self._loaded_at = None  # wall time the current data was fetched
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _snapshot_mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def catalog(self):
+        """Returns the current AssetCatalog, loading it on first use."""
+        if self._catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    table = load_snapshot(self.path)
+                    if table is None:
+                        table = self._fetch_and_store()
+                    self._loaded_at = self._snapshot_mtime() or time.time()
+                    self._catalog = AssetCatalog(table)
+        if time.monotonic() >= self._next_check:
+            self._check_age()
+        return self._catalog
+
+    def _check_age(self):
+        """Picks up a newer snapshot from another worker, or refreshes stale data."""
+        self._next_check = time.monotonic() + self.check_interval
+        mtime = self._snapshot_mtime()
+        if mtime is not None and mtime > self._loaded_at:
+            table = load_snapshot(self.path)
+            if table is not None:
+                self._catalog = AssetCatalog(table)
+                self._loaded_at = mtime
+                return
+        if time.time() - self._loaded_at > self.max_age:
+            self.refresh_in_background()
+
+    def _fetch_and_store(self):
+        """Fetches the asset list, writes the snapshot and returns its table."""
+        table = build_asset_table(self.fetch_assets())
+        try:
+            write_snapshot(table, self.path)
+        except OSError as e:
+            print(f"Error writing asset snapshot {self.path}: {e}")
+            return table
+        mapped = load_snapshot(self.path)
+        return table if mapped is None else mapped
+
+    def refresh(self):
+        """Fetches a fresh asset list and swaps in a new catalog."""
+        try:
+            table = self._fetch_and_store()
+            self._loaded_at = self._snapshot_mtime() or time.time()
+            self._catalog = AssetCatalog(table)
+        except Exception as e:
+            print(f"Error refreshing asset universe: {e}")
+        finally:
+            self._refreshing = False
+
+    def refresh_in_background(self):
+        """Starts a refresh thread unless one is already running."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name='asset_refresh_thread', daemon=True).start()
@@ -0,0 +1,194 @@
+import os
+import time
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, UTC
+import pandas as pd
+
+# Columns of the frames returned by load(), matching Alpaca's bar DataFrame
+# after reset_index() with 'close' renamed to 'c'
+BAR_COLUMNS = ['symbol', 'timestamp', 'open', 'high', 'low', 'c', 'volume', 'trade_count', 'vwap']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL,
+    volume REAL, trade_count REAL, vwap REAL,
+    PRIMARY KEY (symbol, timeframe, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    synced_ts INTEGER,
+    PRIMARY KEY (symbol, timeframe)
+) WITHOUT ROWID;
+"""
+
+# Bars up to this long before the day of a sync are assumed to be published
+SYNC_OVERLAP = 24 * 60 * 60
+
+
+def _epoch(value):
+    """Converts a datetime or pandas Timestamp (naive means UTC) to epoch seconds."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return int(ts.timestamp())
+
+
+class BarRepository:
+    """
+    On-disk bar history in SQLite, keyed by symbol and timeframe.
+
+    `fetch(symbols, timeframe, start)` loads bars from the data provider and
+    returns a DataFrame with a 'symbol' and 'timestamp' column per bar. The
+    repository remembers the earliest start it has fetched per symbol, so a
+    sync only asks for the tail since the last stored bar (which is fetched
+    again, as it may still be forming). For symbols the provider returned
+    no bars for, a sync watermark (the day before the last sync) is kept
+    instead, so they are not fetched from the covered start every time.
+    Symbols needing the same range are fetched together in requests of up
+    to `bulk_size` symbols.
+
+    Concurrent syncs of one symbol may fetch the same tail twice; upserts
+    make that harmless, and the detail cache already shares in-flight loads.
+    """
+
+    def __init__(self, path, fetch, bulk_size=100):
+        self.path = path
+        self.fetch = fetch
+        self.bulk_size = bulk_size
+        self.fetches = 0
+        self.fetched_bars = 0
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        """Yields a connection that commits on success and is always closed."""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            if not self._initialized:
+                db.execute('PRAGMA journal_mode=WAL')
+                db.executescript(_SCHEMA)
+                # Stores created before the sync watermark lack its column
+                columns = {row[1] for row in db.execute('PRAGMA table_info(coverage)')}
+                if 'synced_ts' not in columns:
+                    db.execute('ALTER TABLE coverage ADD COLUMN synced_ts INTEGER')
+                self._initialized = True
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _ranges(self, db, symbols, timeframe):
+        """Returns {symbol: (covered start, sync watermark, last bar)} in epoch seconds."""
+        ranges = {}
+        for symbol in symbols:
+            covered = db.execute(
+                'SELECT start_ts, synced_ts FROM coverage WHERE symbol = ? AND timeframe = ?',
+                (symbol, timeframe)).fetchone()
+            last = db.execute('SELECT MAX(ts) FROM bars WHERE symbol = ? AND timeframe = ?',
+                              (symbol, timeframe)).fetchone()
+            ranges[symbol] = (*(covered or (None, None)), last[0])
+        return ranges
+
+    def store(self, df, timeframe):
+        """Upserts fetched bars. Returns the number of rows written."""
+        if df is None or df.empty:
+            return 0
+        rows = [(r.symbol, timeframe, _epoch(r.timestamp), r.open, r.high, r.low, r.close,
+                 r.volume, getattr(r, 'trade_count', None), getattr(r, 'vwap', None))
+                for r in df.itertuples(index=False)]
+        with self._connect() as db:
+            db.executemany('INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def sync(self, symbols, timeframe, start):
+        """
+        Brings the stored bars of `symbols` up to date from `start`.
+
+        Args:
+            symbols (iterable): The stock symbols.
+            timeframe (str): Bar timeframe, e.g. '1Day'.
+            start (datetime): Earliest bar needed.
+
+        Returns:
+            int: Number of bars fetched from the provider.
+        """
+        start_ts = _epoch(start)
+        now = int(time.time())
+        watermark = now - now % (24 * 60 * 60) - SYNC_OVERLAP
+        with self._connect() as db:
+            ranges = self._ranges(db, sorted(set(symbols)), timeframe)
+
+        # Group symbols by the first bar they need so each group is one bulk request
+        groups = {}
+        for symbol, (covered, synced, last) in ranges.items():
+            if covered is None or start_ts < covered:
+                fetch_from = start_ts
+            elif last is not None:
+                fetch_from = last
+            else:
+                fetch_from = max(covered, synced or covered)
+            groups.setdefault(fetch_from, []).append(symbol)
+
+        fetched = 0
+        for fetch_from, group in sorted(groups.items()):
+            for i in range(0, len(group), self.bulk_size):
+                chunk = group[i:i + self.bulk_size]
+                df = self.fetch(chunk, timeframe, datetime.fromtimestamp(fetch_from, UTC))
+                self.fetches += 1
+                fetched += self.store(df, timeframe)
+                with self._connect() as db:
+                    db.executemany(
+                        'INSERT INTO coverage VALUES (?, ?, ?, ?) ON CONFLICT (symbol, timeframe) '
+                        'DO UPDATE SET start_ts = MIN(start_ts, excluded.start_ts), '
+                        'synced_ts = MAX(COALESCE(synced_ts, 0), excluded.synced_ts)',
+                        [(symbol, timeframe, start_ts, watermark) for symbol in chunk])
+        self.fetched_bars += fetched
+        return fetched
+
+    def load(self, symbol, timeframe, start):
+        """Returns stored bars of a symbol since `start`, oldest first."""
+        with self._connect() as db:
+            df = pd.read_sql_query(
+                'SELECT symbol, ts, open, high, low, close AS c, volume, trade_count, vwap '
+                'FROM bars WHERE symbol = ? AND timeframe = ? AND ts >= ? ORDER BY ts',
+                db, params=(symbol, timeframe, _epoch(start)))
+        df.insert(1, 'timestamp', pd.to_datetime(df.pop('ts'), unit='s', utc=True))
+        return df[BAR_COLUMNS]
+
+    def close_matrix(self, symbols, timeframe, start):
+        """
+        Returns stored closes since `start` as one row per symbol and one
+        column per bar time, NaN where a symbol has no bar.
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return pd.DataFrame()
+        placeholders = ', '.join('?' * len(symbols))
+        with self._connect() as db:
+            df = pd.read_sql_query(
+                f'SELECT symbol, ts, close FROM bars WHERE timeframe = ? AND ts >= ? '
+                f'AND symbol IN ({placeholders})',
+                db, params=(timeframe, _epoch(start), *symbols))
+        matrix = df.pivot(index='symbol', columns='ts', values='close')
+        matrix.columns = pd.to_datetime(matrix.columns, unit='s', utc=True)
+        return matrix.reindex(symbols)
+
+    def get_bars(self, symbol, timeframe, start):
+        """Syncs one symbol and returns its bars since `start`."""
+        self.sync([symbol], timeframe, start)
+        return self.load(symbol, timeframe, start)
+
+    def stats(self):
+        """Returns stored row counts and provider fetch counters."""
+        with self._connect() as db:
+            rows, symbols = db.execute('SELECT COUNT(*), COUNT(DISTINCT symbol) FROM bars').fetchone()
+        return {'bars': rows, 'symbols': symbols, 'fetches': self.fetches,
+                'fetched_bars': self.fetched_bars}
@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, UTC
+
+
+class ClockCache:
+    """
+    Thread-safe cache for the Alpaca market clock.
+
+    A cached clock expires at the next market transition it reports
+    (`next_close` while open, `next_open` while closed) or after `max_ttl`
+    seconds, whichever comes first. Only one thread refreshes an expired
+    entry; concurrent callers wait for it instead of issuing their own call.
+    """
+
+    def __init__(self, max_ttl=60):
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        # (clock, expires_at) swapped as one tuple so readers never pair a
+        # clock with another clock's expiry.
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def _expiry_for(self, clock):
+        now = time.time()
+        expires_at = now + self.max_ttl
+        boundary = clock.next_close if clock.is_open else clock.next_open
+        if boundary is not None:
+            if boundary.tzinfo is None:
+                boundary = boundary.replace(tzinfo=UTC)
+            expires_at = min(expires_at, boundary.timestamp())
+        return expires_at
+
+    def get(self, fetch):
+        """
+        Return the cached clock, calling `fetch()` to refresh it when expired.
+
+        Args:
+            fetch (callable): Returns a fresh clock object.
+
+        Returns:
+            The clock object.
+        """
+        entry = self._entry
+        if entry is not None and time.time() < entry[1]:
+            self.hits += 1
+            return entry[0]
+
+        with self._lock:
+            # Another thread may have refreshed the clock while we waited.
+            entry = self._entry
+            if entry is not None and time.time() < entry[1]:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            clock = fetch()
+            self._entry = (clock, self._expiry_for(clock))
+            return clock
+
+    def invalidate(self):
+        """Drop the cached clock so the next call fetches a fresh one."""
+        with self._lock:
+            self._entry = None
+
+    def stats(self):
+        """Return hit/miss counters for the cache."""
+        entry = self._entry
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expires_at': datetime.fromtimestamp(entry[1], UTC).isoformat() if entry else None
+        }
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry and single-flight loading.
+
+    At most `max_entries` values are kept; the least recently used entry is
+    evicted first. Concurrent misses for the same key share one call to the
+    loader, and the loader's exception is raised to every waiting caller.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_loads = 0
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._inflight = {}  # key -> Future of the running load
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader, ttl, refresh=False, timeout=None):
+        """
+        Return the cached value for `key`, loading it when missing or expired.
+
+        Args:
+            key (hashable): Cache key.
+            loader (callable): Returns a fresh value.
+            ttl (float or callable): Lifetime in seconds, or a callable that
+                takes the loaded value and returns its lifetime in seconds.
+            refresh (bool): Load a fresh value even if one is cached; other
+                callers keep getting the cached value until it is replaced.
+            timeout (float, optional): Seconds to wait for a load another
+                thread is running before raising TimeoutError.
+
+        Returns:
+            The cached or freshly loaded value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not refresh and entry is not None and time.time() < entry[1]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = Future()
+                self._inflight[key] = flight
+                self.misses += 1
+            else:
+                self.shared_loads += 1
+
+        if not leader:
+            return flight.result(timeout=timeout)
+
+        try:
+            value = loader()
+            lifetime = ttl(value) if callable(ttl) else ttl
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            flight.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = (value, time.time() + lifetime)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            del self._inflight[key]
+        flight.set_result(value)
+        return value
+
+    def peek(self, key, default=None):
+        """Return an unexpired cached value without loading or touching LRU order and counters."""
+        entry = self._entries.get(key)
+        if entry is None or time.time() >= entry[1]:
+            return default
+        return entry[0]
+
+    def expires_in(self, key):
+        """Seconds until `key` expires, or None if it is not cached."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry[1] - time.time()
+        return remaining if remaining > 0 else None
+
+    def invalidate(self, key=None):
+        """Drop one key, or every entry when `key` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return size and hit/miss/eviction counters for the cache."""
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared_loads': self.shared_loads,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,175 @@
+import math
+import threading
+import numpy as np
+from .cache import TTLCache
+
+# Sortable columns in DataTables order
+COLUMNS = ('symbol', 'name', 'exchange')
+
+# Length of the n-grams used by the search index
+NGRAM = 3
+
+
+def _column_value(asset, column):
+    """Returns an asset attribute as a plain string (enums use their value)."""
+    value = getattr(asset, column, None)
+    value = getattr(value, 'value', value)
+    return '' if value is None else str(value)
+
+
+def build_asset_table(assets):
+    """
+    Builds the columnar asset table used by AssetCatalog.
+
+    Text columns are stored as UTF-8 bytes. Each sortable column also gets a
+    `rank_<column>` field holding the row's position in case-insensitive
+    order, so a table loaded from disk needs no re-sorting.
+
+    Args:
+        assets (list): Objects with symbol, name and exchange attributes.
+
+    Returns:
+        numpy.ndarray: A structured array with one row per asset.
+    """
+    columns = {column: [_column_value(asset, column) for asset in assets]
+               for column in COLUMNS}
+    encoded = {column: [value.encode('utf-8') for value in values]
+               for column, values in columns.items()}
+    dtype = [(column, f'S{max((len(v) for v in values), default=0) or 1}')
+             for column, values in encoded.items()]
+    dtype += [(f'rank_{column}', 'i4') for column in COLUMNS]
+
+    table = np.zeros(len(assets), dtype=dtype)
+    for column, values in columns.items():
+        table[column] = encoded[column]
+        keys = [value.lower() for value in values]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        table[f'rank_{column}'][order] = np.arange(len(order), dtype='i4')
+    return table
+
+
+class AssetCatalog:
+    """
+    Read-only, pre-indexed view of the asset universe for /api/assets.
+
+    Rows live in a columnar structured array (see build_asset_table), which
+    may be a read-only memory map shared between processes. Each column has
+    a pre-sorted permutation, symbol and name are searchable through a
+    trigram index built on first search, and query results (matching row ids
+    in display order) are cached, so paging through a result costs O(page).
+    """
+
+    def __init__(self, table, query_cache_size=256):
+        self.table = table
+        self.size = len(table)
+        self._order = {}
+        for column in COLUMNS:
+            order = np.empty(self.size, dtype='i4')
+            order[table[f'rank_{column}']] = np.arange(self.size, dtype='i4')
+            self._order[column] = order
+
+        self._search_keys = None
+        self._ngrams = None
+        self._exchanges = None
+        self._index_lock = threading.Lock()
+        self._queries = TTLCache(max_entries=query_cache_size)
+
+    @classmethod
+    def from_assets(cls, assets, **kwargs):
+        """Builds a catalog directly from asset objects."""
+        return cls(build_asset_table(assets), **kwargs)
+
+    def __len__(self):
+        return self.size
+
+    def _value(self, column, row):
+        return self.table[column][row].decode('utf-8')
+
+    def _build_search_index(self):
+        """Builds lowered search keys and the trigram index once per process."""
+        with self._index_lock:
+            if self._ngrams is not None:
+                return
+            symbols = np.char.lower(self.table['symbol']).tolist()
+            names = self.table['name'].tolist()
+            search_keys = [f"{symbol.decode('utf-8')}\n{name.decode('utf-8').lower()}"
+                           for symbol, name in zip(symbols, names)]
+            ngrams = {}
+            for row, key in enumerate(search_keys):
+                for gram in {key[i:i + NGRAM] for i in range(len(key) - NGRAM + 1)}:
+                    ngrams.setdefault(gram, []).append(row)
+            self._search_keys = search_keys
+            self._ngrams = ngrams
+
+    def _matching_rows(self, search):
+        """Returns the ids of rows whose symbol or name contains `search`."""
+        if self._ngrams is None:
+            self._build_search_index()
+        if len(search) < NGRAM:
+            return [row for row, key in enumerate(self._search_keys) if search in key]
+
+        # Candidates are rows holding every trigram of the query, smallest list first
+        grams = sorted({search[i:i + NGRAM] for i in range(len(search) - NGRAM + 1)},
+                       key=lambda gram: len(self._ngrams.get(gram, ())))
+        candidates = set(self._ngrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(self._ngrams.get(gram, ()))
+        return [row for row in candidates if search in self._search_keys[row]]
+
+    def _ordered_rows(self, search, column, descending):
+        """Returns matching row ids sorted by a column."""
+        order = self._order[column]
+        if not search:
+            return order[::-1] if descending else order
+        rank = self.table[f'rank_{column}']
+        rows = np.array(self._matching_rows(search), dtype='i4')
+        rows = rows[np.argsort(rank[rows], kind='stable')]
+        return rows[::-1] if descending else rows
+
+    def query(self, search='', column='symbol', descending=False, start=0, length=100):
+        """
+        Returns one page of assets matching a search, sorted by a column.
+
+        Args:
+            search (str): Case-insensitive substring of symbol or name.
+            column (str): One of COLUMNS.
+            descending (bool): Sort direction.
+            start (int): Offset of the first row of the page.
+            length (int): Page size.
+
+        Returns:
+            tuple: (rows, records_filtered) where rows is a list of
+            (symbol, name, exchange) tuples.
+        """
+        search = search.lower()
+        column = column if column in COLUMNS else 'symbol'
+        rows = self._queries.get_or_load(
+            (search, column, descending),
+            lambda: self._ordered_rows(search, column, descending),
+            ttl=math.inf)
+        page = [tuple(self._value(c, row) for c in COLUMNS)
+                for row in rows[start:start + length].tolist()]
+        return page, len(rows)
+
+    def assets(self):
+        """Returns every asset as a (symbol, name, exchange) tuple in symbol order."""
+        rows = self.table[list(COLUMNS)][self._order['symbol']].tolist()
+        return [tuple(value.decode('utf-8') for value in row) for row in rows]
+
+    def exchange_of(self, symbol, default='N/A'):
+        """Returns the exchange listed for a symbol."""
+        if self._exchanges is None:
+            self._exchanges = dict(zip(
+                (s.decode('utf-8') for s in self.table['symbol'].tolist()),
+                (e.decode('utf-8') for e in self.table['exchange'].tolist())))
+        return self._exchanges.get(symbol, default)
+
+    def stats(self):
+        """Returns the catalog size and query cache counters."""
+        return {
+            'size': self.size,
+            'ngrams': len(self._ngrams) if self._ngrams is not None else 0,
+            'queries': self._queries.stats()
+        }
@@ -1,42 +1,107 @@
 import os
+import time
 import pytz
-import yfinance as yf
+import threading
 import pandas as pd
-import alpaca
 from dotenv import load_dotenv
 from datetime import datetime, UTC, timedelta
-from alpaca.trading.client import TradingClient
-from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.trading.requests import GetAssetsRequest
-from alpaca.trading.enums import AssetClass, AssetStatus
-from alpaca.data.requests import StockLatestQuoteRequest
+from concurrent.futures import ThreadPoolExecutor, wait
+from .cache import ClockCache, TTLCache
+from .assets import AssetUniverse
+from .bars import BarRepository
+from .screener import Screener
+from .providers import create_provider
+from .gateway import ProviderGateway, call_timeout, in_background
+from .. import analysis, metrics
 
 # Load environment variables
 load_dotenv()
 
+# Latency of every public fetcher and the errors they raise or handle
+FETCH_SECONDS = metrics.histogram('fetcher_seconds', 'Latency of data fetcher calls', ('function',))
+FETCH_ERRORS = metrics.counter('fetcher_errors_total', 'Data fetcher errors', ('function',))
+DETAIL_COMPONENT_SECONDS = metrics.histogram(
+    'detail_component_seconds', 'Latency of detail page component loads', ('component',))
 
-# Initialize Alpaca clients
-APCA_API_KEY_ID = os.getenv('APCA_API_KEY_ID')
-APCA_API_SECRET_KEY = os.getenv('APCA_API_SECRET_KEY')
 
-if not APCA_API_KEY_ID or not APCA_API_SECRET_KEY:
-    raise ValueError(
-        "Please set APCA_API_KEY_ID and APCA_API_SECRET_KEY environment variables")
+def _instrumented(func):
+    """Records the latency and raised errors of a fetcher under its function name."""
+    return metrics.timed(FETCH_SECONDS, (func.__name__,), FETCH_ERRORS)(func)
 
-trading_client = TradingClient(
-    APCA_API_KEY_ID, APCA_API_SECRET_KEY, paper=True)
 
-stock_data_client = StockHistoricalDataClient(
-    APCA_API_KEY_ID, APCA_API_SECRET_KEY
-)
+def _fetch_error(function, message):
+    """Reports an error a fetcher handled itself."""
+    FETCH_ERRORS.inc(labels=(function,))
+    print(message)
 
-# Fetch all active US equity assets once on startup
-assets_request = GetAssetsRequest(
-    asset_class=AssetClass.US_EQUITY, status=AssetStatus.ACTIVE)
-all_assets = trading_client.get_all_assets(assets_request)
-symbol_to_exchange = {asset.symbol: asset.exchange for asset in all_assets}
 
+# Market data source: Alpaca + yFinance by default, or the offline simulator
+# (DATA_PROVIDER=simulator). Credentials are only checked on first use.
+# Every call goes through the gateway's per-service rate limits.
+provider = ProviderGateway.from_env(create_provider(os.getenv('DATA_PROVIDER')))
+metrics.gauge('provider_tokens_available', 'Rate limit tokens available per upstream service',
+              ('upstream',), func=lambda: {
+                  (upstream,): bucket.available() for upstream, bucket in provider.buckets.items()})
 
+# Snapshot of all active US equity assets, loaded on first use and
+# refreshed in the background once it is older than a day. Simulated data
+# gets its own files so it never mixes with real market data.
+INSTANCE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'instance')
+_DATA_SUFFIX = '' if provider.name == 'alpaca' else f'-{provider.name}'
+ASSET_SNAPSHOT_PATH = os.getenv('ASSET_SNAPSHOT_PATH', os.path.join(
+    INSTANCE_DIR, f'asset_snapshot{_DATA_SUFFIX}.npy'))
+
+
+def _fetch_all_assets():
+    """Fetches all active US equity assets from the data provider."""
+    return provider.get_all_assets()
+
+
+asset_universe = AssetUniverse(_fetch_all_assets, ASSET_SNAPSHOT_PATH)
+
+# Shared market clock, refreshed at most once a minute or at the next open/close
+clock_cache = ClockCache(max_ttl=60)
+
+# Per-symbol detail page components, cached with a TTL per component
+DETAIL_CACHE_SIZE = 2048
+QUOTE_TTL = 5
+BARS_MIN_TTL = 60
+FUNDAMENTALS_TTL = 6 * 60 * 60
+NEWS_TTL = 10 * 60
+detail_cache = TTLCache(max_entries=DETAIL_CACHE_SIZE)
+
+# Shared pool for the independent detail page fetches
+DETAIL_FETCH_WORKERS = 16
+DETAIL_FETCH_TIMEOUT = 8
+detail_executor = ThreadPoolExecutor(
+    max_workers=DETAIL_FETCH_WORKERS, thread_name_prefix='detail_fetch')
+
+# Per-component timing of detail fetches (component -> stats)
+detail_timings = {}
+detail_timings_lock = threading.Lock()
+
+
+# Maximum number of symbols sent in a single multi-symbol latest-quote request
+QUOTE_BATCH_SIZE = 200
+
+
+def _format_quote(symbol, quote, market_open):
+    """Convert an Alpaca quote model into the dict emitted to clients."""
+    eastern = pytz.timezone('US/Eastern')
+    timestamp = quote.timestamp.astimezone(eastern)
+    return {
+        'symbol': symbol,
+        'bid_price': float(quote.bid_price),
+        'ask_price': float(quote.ask_price),
+        'bid_size': int(quote.bid_size),
+        'ask_size': int(quote.ask_size),
+        'timestamp': timestamp.isoformat(),
+        'market_hours': 'open' if market_open else 'closed'
+    }
+
+
+@_instrumented
 def fetch_latest_quote(symbol):
     """
     Fetch the latest quote for a symbol using Alpaca REST API.
@@ -48,41 +113,72 @@ def fetch_latest_quote(symbol):
         dict: Quote data.
     """
     try:
-        latest_quote_request = StockLatestQuoteRequest(symbol_or_symbols=symbol)
-        latest_quote = stock_data_client.get_stock_latest_quote(latest_quote_request)
+        latest_quote = provider.get_latest_quotes([symbol])
         if symbol in latest_quote:
-            quote = latest_quote[symbol]
-            eastern = pytz.timezone('US/Eastern')
-            timestamp = quote.timestamp.astimezone(eastern)
-            return {
-                'symbol': symbol,
-                'bid_price': float(quote.bid_price),
-                'ask_price': float(quote.ask_price),
-                'bid_size': int(quote.bid_size),
-                'ask_size': int(quote.ask_size),
-                'timestamp': timestamp.isoformat(),
-                'market_hours': 'closed' if not is_market_open() else 'open'
-            }
+            return _format_quote(symbol, latest_quote[symbol], is_market_open())
         return None
     except Exception as e:
-        print(f"Error fetching quote for {symbol}: {e}")
+        _fetch_error('fetch_latest_quote', f"Error fetching quote for {symbol}: {e}")
         return None
 
 
+@_instrumented
+def fetch_latest_quotes(symbols, market_open=None):
+    """
+    Fetch the latest quotes for many symbols using multi-symbol Alpaca requests.
+
+    Symbols are sent in chunks of QUOTE_BATCH_SIZE and the market clock is
+    read at most once for the whole call.
+
+    Args:
+        symbols (iterable): The stock symbols.
+        market_open (bool, optional): Market state already known to the
+            caller. The clock is queried when omitted.
+
+    Returns:
+        dict: Quote data keyed by symbol. Symbols without a quote, or whose
+        chunk failed, are omitted.
+    """
+    symbols = sorted(set(symbols))
+    quotes = {}
+    if not symbols:
+        return quotes
+
+    if market_open is None:
+        market_open = is_market_open()
+    for i in range(0, len(symbols), QUOTE_BATCH_SIZE):
+        chunk = symbols[i:i + QUOTE_BATCH_SIZE]
+        try:
+            latest_quotes = provider.get_latest_quotes(chunk)
+            for symbol, quote in latest_quotes.items():
+                quotes[symbol] = _format_quote(symbol, quote, market_open)
+        except Exception as e:
+            _fetch_error('fetch_latest_quotes', f"Error fetching quotes for {len(chunk)} symbols: {e}")
+    return quotes
+
+
+@_instrumented
+def get_clock():
+    """Returns the market clock from the shared cache."""
+    return clock_cache.get(provider.get_clock)
+
+
+@_instrumented
 def is_market_open():
     """Checks if the US stock market is currently open."""
     try:
-        clock = trading_client.get_clock()
+        clock = get_clock()
         return clock.is_open
     except Exception as e:
-        print(f"Error checking market status: {e}")
+        _fetch_error('is_market_open', f"Error checking market status: {e}")
         return False
 
 
+@_instrumented
 def get_market_status():
     """Gets detailed market status information."""
     try:
-        clock = trading_client.get_clock()
+        clock = get_clock()
         eastern = pytz.timezone('US/Eastern')
         next_open_dt_utc = clock.next_open
         next_close_dt_utc = clock.next_close
@@ -95,94 +191,506 @@ def get_market_status():
             'next_close': next_close_eastern.strftime('%Y-%m-%d %I:%M %p %Z') if next_close_eastern else None
         }
     except Exception as e:
-        print(f"Error getting market status: {e}")
+        _fetch_error('get_market_status', f"Error getting market status: {e}")
         return {'is_open': False, 'next_open': None, 'next_close': None}
 
 
-def get_stock_details(symbol):
-    """Fetches comprehensive stock data from Alpaca and yFinance."""
-    data = {}
+@_instrumented
+def get_asset_catalog():
+    """Returns the asset catalog, loading the on-disk snapshot on first use."""
+    return asset_universe.catalog()
+
+
+@_instrumented
+def get_symbol_exchange(symbol):
+    """
+    Returns the exchange a symbol is listed on.
+
+    Returns:
+        str: The exchange, or 'N/A' when the asset catalog is unavailable.
+        None: The symbol is not in the asset catalog.
+    """
     try:
-        # Alpaca Data
-        latest_quote_request = StockLatestQuoteRequest(symbol_or_symbols=symbol)
-        latest_quote = stock_data_client.get_stock_latest_quote(latest_quote_request)
-        
-        start_date = (datetime.now() - timedelta(days=365)).date().isoformat()
-        bars_request = alpaca.data.requests.StockBarsRequest(
-            symbol_or_symbols=[symbol],
-            timeframe=alpaca.data.timeframe.TimeFrame.Day,
-            start=start_date
-        )
-        bars = stock_data_client.get_stock_bars(bars_request).df
-
-        data['symbol'] = symbol
-        data['exchange'] = symbol_to_exchange.get(symbol, 'N/A')
-        
-        if symbol in latest_quote:
-            quote = latest_quote[symbol]
-            data['current_price'] = float(quote.ask_price)
-            data['bid_price'] = float(quote.bid_price)
-            data['ask_price'] = float(quote.ask_price)
-        else:
-            data['current_price'] = 0
-            data['bid_price'] = 0
-            data['ask_price'] = 0
-
-        # yFinance Data
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-
-        data['name'] = info.get('longName', 'N/A')
-        data['description'] = info.get('longBusinessSummary', 'N/A')
-        data['sector'] = info.get('sector', 'N/A')
-        data['industry'] = info.get('industry', 'N/A')
-        data['website'] = info.get('website', 'N/A')
-        data['market_cap'] = info.get('marketCap', 'N/A')
-        data['pe_ratio'] = info.get('trailingPE', 'N/A')
-        data['eps'] = info.get('trailingEps', 'N/A')
-        data['earnings_growth'] = info.get('earningsGrowth') # Can be None
-        data['fifty_two_week_high'] = info.get('fiftyTwoWeekHigh', 'N/A')
-        data['fifty_two_week_low'] = info.get('fiftyTwoWeekLow', 'N/A')
-
-        # Financials and News
-        data['financials'] = {
-            'income_statement': {k: str(v) for k, v in ticker.financials.iloc[:, 0].items()} if not ticker.financials.empty else {},
-            'balance_sheet': {k: str(v) for k, v in ticker.balance_sheet.iloc[:, 0].items()} if not ticker.balance_sheet.empty else {},
-            'cash_flow': {k: str(v) for k, v in ticker.cashflow.iloc[:, 0].items()} if not ticker.cashflow.empty else {},
+        catalog = get_asset_catalog()
+    except Exception as e:
+        _fetch_error('get_symbol_exchange', f"Error looking up exchange for {symbol}: {e}")
+        return 'N/A'
+    if not len(catalog):
+        return 'N/A'
+    return catalog.exchange_of(symbol, default=None)
+
+
+def _seconds_until_next_close(_value=None):
+    """Seconds until the next daily market close, used as the bars TTL."""
+    try:
+        next_close = get_clock().next_close
+        return max(BARS_MIN_TTL, next_close.timestamp() - datetime.now(UTC).timestamp())
+    except Exception as e:
+        print(f"Error reading next market close: {e}")
+        return BARS_MIN_TTL
+
+
+def _load_detail_quote(symbol):
+    """Fetches the latest quote prices shown on the detail page."""
+    latest_quote = provider.get_latest_quotes([symbol])
+    if symbol in latest_quote:
+        quote = latest_quote[symbol]
+        return {
+            'current_price': float(quote.ask_price),
+            'bid_price': float(quote.bid_price),
+            'ask_price': float(quote.ask_price)
         }
+    return {'current_price': 0, 'bid_price': 0, 'ask_price': 0}
+
+
+# Bar history kept on disk; pages only fetch bars newer than the stored tail
+BAR_STORE_PATH = os.getenv('BAR_STORE_PATH', os.path.join(
+    INSTANCE_DIR, f'bars{_DATA_SUFFIX}.sqlite3'))
+DAILY_BARS = '1Day'
+BAR_HISTORY_DAYS = 365
+bar_repository = BarRepository(
+    BAR_STORE_PATH, lambda symbols, timeframe, start: provider.get_bars(symbols, timeframe, start))
+
+
+def _bar_history_start():
+    return datetime.now(UTC) - timedelta(days=BAR_HISTORY_DAYS)
+
+
+def _load_bars(symbol):
+    """Returns one year of daily bars as a flat DataFrame from the local bar store, or None."""
+    start = _bar_history_start()
+    try:
+        bar_repository.sync([symbol], DAILY_BARS, start)
+    except Exception as e:
+        # Serve what is stored rather than nothing when the provider is down
+        if bar_repository.load(symbol, DAILY_BARS, start).empty:
+            raise
+        print(f"Error syncing bars for {symbol}, serving stored bars: {e}")
+    bars = bar_repository.load(symbol, DAILY_BARS, start)
+    return None if bars.empty else bars
+
+
+@_instrumented
+def backfill_daily_bars(symbols):
+    """
+    Brings the stored daily bars of many symbols up to date with bulk
+    multi-symbol requests.
+
+    Args:
+        symbols (iterable): The stock symbols.
+
+    Returns:
+        int: Number of bars fetched.
+    """
+    return bar_repository.sync(symbols, DAILY_BARS, _bar_history_start())
+
+
+@_instrumented
+def get_daily_close_matrix(symbols, sync=True):
+    """
+    Returns one year of daily closes for many symbols, shaped for
+    analysis.calculate_batch_indicators.
+
+    Args:
+        symbols (iterable): The stock symbols.
+        sync (bool): Backfill missing bars from the provider first.
+
+    Returns:
+        DataFrame: One row per symbol and one column per trading day.
+    """
+    symbols = list(symbols)
+    if sync:
+        try:
+            backfill_daily_bars(symbols)
+        except Exception as e:
+            _fetch_error('get_daily_close_matrix', f"Error backfilling daily bars for {len(symbols)} symbols: {e}")
+    return bar_repository.close_matrix(symbols, DAILY_BARS, _bar_history_start())
+
+
+def _load_info(symbol):
+    """Fetches company info fields (yFinance-shaped) from the data provider."""
+    info = provider.get_fundamental(symbol, 'info')
+    return {
+        'name': info.get('longName', 'N/A'),
+        'description': info.get('longBusinessSummary', 'N/A'),
+        'sector': info.get('sector', 'N/A'),
+        'industry': info.get('industry', 'N/A'),
+        'website': info.get('website', 'N/A'),
+        'market_cap': info.get('marketCap', 'N/A'),
+        'pe_ratio': info.get('trailingPE', 'N/A'),
+        'eps': info.get('trailingEps', 'N/A'),
+        'earnings_growth': info.get('earningsGrowth'),  # Can be None
+        'fifty_two_week_high': info.get('fiftyTwoWeekHigh', 'N/A'),
+        'fifty_two_week_low': info.get('fiftyTwoWeekLow', 'N/A'),
+    }
+
+
+def _latest_statement(statement):
+    """Returns the latest column of a yFinance statement as a dict of strings."""
+    return {k: str(v) for k, v in statement.iloc[:, 0].items()} if not statement.empty else {}
+
+
+def _load_income_statement(symbol):
+    """Fetches the latest income statement from yFinance."""
+    return _latest_statement(provider.get_fundamental(symbol, 'financials'))
+
+
+def _load_balance_sheet(symbol):
+    """Fetches the latest balance sheet from yFinance."""
+    return _latest_statement(provider.get_fundamental(symbol, 'balance_sheet'))
+
+
+def _load_cash_flow(symbol):
+    """Fetches the latest cash flow statement from yFinance."""
+    return _latest_statement(provider.get_fundamental(symbol, 'cashflow'))
+
+
+def _load_news(symbol):
+    """Fetches the five most recent news items from yFinance."""
+    news = []
+    for item in provider.get_fundamental(symbol, 'news')[:5]:
+        news_content = item.get('content', {})
+        if not news_content:
+            continue
+
+        published_at = 'N/A'
+        pub_date_str = news_content.get('pubDate')
+        if pub_date_str:
+            # pubDate is in '2025-09-05T19:01:00Z' format
+            published_dt = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
+            published_at = published_dt.strftime('%Y-%m-%d %H:%M')
+
+        news.append({
+            'title': news_content.get('title', 'N/A'),
+            'publisher': news_content.get('provider', {}).get('displayName', 'N/A'),
+            'link': news_content.get('canonicalUrl', {}).get('url', '#'),
+            'published_at': published_at,
+            'summary': news_content.get('summary', 'N/A')
+        })
+    return news
+
+
+# Detail page components: name -> (loader, TTL in seconds or TTL callable)
+DETAIL_COMPONENTS = {
+    'quote': (_load_detail_quote, QUOTE_TTL),
+    'bars': (_load_bars, _seconds_until_next_close),
+    'info': (_load_info, FUNDAMENTALS_TTL),
+    'income_statement': (_load_income_statement, FUNDAMENTALS_TTL),
+    'balance_sheet': (_load_balance_sheet, FUNDAMENTALS_TTL),
+    'cash_flow': (_load_cash_flow, FUNDAMENTALS_TTL),
+    'news': (_load_news, NEWS_TTL),
+}
+
+# Value used for a component that failed or timed out
+DETAIL_FALLBACKS = {
+    'quote': {'current_price': 0, 'bid_price': 0, 'ask_price': 0},
+    'bars': None,
+    'info': {
+        'name': 'N/A', 'description': 'N/A', 'sector': 'N/A', 'industry': 'N/A',
+        'website': 'N/A', 'market_cap': 'N/A', 'pe_ratio': 'N/A', 'eps': 'N/A',
+        'earnings_growth': None, 'fifty_two_week_high': 'N/A', 'fifty_two_week_low': 'N/A'
+    },
+    'income_statement': {},
+    'balance_sheet': {},
+    'cash_flow': {},
+    'news': [],
+}
+
+
+@_instrumented
+def get_detail_component(symbol, component, timeout=None):
+    """
+    Returns one cached component of the stock detail data.
+
+    Args:
+        symbol (str): The stock symbol.
+        component (str): A key of DETAIL_COMPONENTS.
+        timeout (float, optional): Seconds to wait for a load another
+            caller is running.
+
+    Returns:
+        The component value, loaded once per TTL and shared between callers.
+    """
+    loader, ttl = DETAIL_COMPONENTS[component]
+    return detail_cache.get_or_load((component, symbol), lambda: loader(symbol), ttl, timeout=timeout)
+
+
+def refresh_detail_component(symbol, component):
+    """
+    Reloads one detail component into the cache ahead of its expiry.
+
+    Callers keep getting the cached value until the fresh one replaces it.
+    """
+    loader, ttl = DETAIL_COMPONENTS[component]
+    return detail_cache.get_or_load((component, symbol), lambda: loader(symbol), ttl, refresh=True)
+
+
+def detail_staleness(symbol, components, horizon=None):
+    """
+    Returns how close cached detail components are to expiring.
+
+    Args:
+        symbol (str): The stock symbol.
+        components (iterable): Keys of DETAIL_COMPONENTS.
+        horizon (float, optional): Seconds before expiry at which data
+            starts to count as stale. Without it only missing data is stale.
+
+    Returns:
+        float: 1.0 if any component is missing or expired, otherwise
+        between 0.0 (fresh) and 1.0 for the one closest to expiry.
+    """
+    staleness = 0.0
+    for component in components:
+        remaining = detail_cache.expires_in((component, symbol))
+        if remaining is None:
+            return 1.0
+        if horizon:
+            staleness = max(staleness, 1 - remaining / horizon)
+    return staleness
+
+
+def peek_detail_component(symbol, component):
+    """Returns a cached detail component without loading it, or None."""
+    return detail_cache.peek((component, symbol))
+
+
+def _indicators_key(symbol, bars):
+    return ('indicators', symbol, str(bars['timestamp'].iloc[-1]))
+
+
+@_instrumented
+def get_technical_indicators(symbol, bars):
+    """
+    Returns MA50, MA200 and RSI for a symbol's daily bars, cached until
+    the bars change.
+
+    Args:
+        symbol (str): The stock symbol.
+        bars (DataFrame): The symbol's daily bars, as from the 'bars' component.
+
+    Returns:
+        dict: ma_50, ma_200 and rsi ('N/A' without enough history); empty
+        without bars.
+    """
+    if bars is None or bars.empty:
+        return {}
+    return dict(detail_cache.get_or_load(
+        _indicators_key(symbol, bars),
+        lambda: analysis.calculate_technical_indicators(bars),
+        _seconds_until_next_close))
+
+
+def has_technical_indicators(symbol, bars):
+    """True if the indicators of these bars are cached."""
+    return detail_cache.peek(_indicators_key(symbol, bars)) is not None
+
+
+def _record_detail_timing(component, elapsed, ok):
+    """Accumulates timing stats for one detail component fetch."""
+    with detail_timings_lock:
+        stats = detail_timings.setdefault(
+            component, {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+        stats['count'] += 1
+        stats['errors'] += 0 if ok else 1
+        stats['total'] += elapsed
+        stats['max'] = max(stats['max'], elapsed)
+        stats['last'] = elapsed
+    DETAIL_COMPONENT_SECONDS.observe(elapsed, (component,))
+
+
+def get_detail_timings():
+    """Returns a snapshot of per-component detail fetch timings in seconds."""
+    with detail_timings_lock:
+        return {name: dict(stats) for name, stats in detail_timings.items()}
+
+
+def _timed_component(symbol, component, deadline):
+    """Loads a detail component by `deadline` (monotonic) and records how long it took."""
+    started = time.perf_counter()
+    try:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"No time left to load {component}")
+        # Rate limit waits and shared loads give up with the page
+        with call_timeout(remaining):
+            value = get_detail_component(symbol, component, timeout=remaining)
+    except Exception:
+        _record_detail_timing(component, time.perf_counter() - started, ok=False)
+        raise
+    _record_detail_timing(component, time.perf_counter() - started, ok=True)
+    return value
+
+
+@_instrumented
+def fetch_detail_components(symbol, timeout=None):
+    """
+    Loads every detail component for a symbol concurrently.
 
-        yf_news = ticker.news[:5]
-        data['news'] = []
-        for item in yf_news:
-            news_content = item.get('content', {})
-            if not news_content:
-                continue
-
-            published_at = 'N/A'
-            pub_date_str = news_content.get('pubDate')
-            if pub_date_str:
-                # pubDate is in '2025-09-05T19:01:00Z' format
-                published_dt = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
-                published_at = published_dt.strftime('%Y-%m-%d %H:%M')
-
-            data['news'].append({
-                'title': news_content.get('title', 'N/A'),
-                'publisher': news_content.get('provider', {}).get('displayName', 'N/A'),
-                'link': news_content.get('canonicalUrl', {}).get('url', '#'),
-                'published_at': published_at,
-                'summary': news_content.get('summary', 'N/A')
-            })
-
-        # Historical data for charts and indicators
-        if not bars.empty:
-            # Alpaca returns a multi-index dataframe, we need to reset it for a single symbol
-            bars = bars.reset_index()
-            bars.rename(columns={'close': 'c'}, inplace=True)
-            data['history_df'] = bars
+    Args:
+        symbol (str): The stock symbol.
+        timeout (float, optional): Seconds to wait for all components;
+            their rate limit waits give up by then too. Defaults to
+            DETAIL_FETCH_TIMEOUT.
+
+    Returns:
+        tuple: (components, failed) where components maps each component
+        name to its value (or its fallback) and failed lists the names that
+        raised or did not finish in time.
+    """
+    timeout = DETAIL_FETCH_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    futures = {detail_executor.submit(_timed_component, symbol, name, deadline): name
+               for name in DETAIL_COMPONENTS}
+    done, _ = wait(futures, timeout=timeout)
+
+    components = {}
+    failed = []
+    for future, name in futures.items():
+        if future in done and future.exception() is None:
+            components[name] = future.result()
+            continue
+        if future in done:
+            print(f"Error fetching {name} for {symbol}: {future.exception()}")
         else:
-            data['history_df'] = None
+            # Free the pool of components that have not started yet
+            future.cancel()
+            print(f"Timed out fetching {name} for {symbol}")
+        failed.append(name)
+        components[name] = DETAIL_FALLBACKS.get(name)
+    return components, failed
+
+
+@_instrumented
+def get_stock_details(symbol):
+    """
+    Fetches comprehensive stock data from Alpaca and yFinance.
+
+    Returns:
+        dict: The detail page data, or None for symbols that are not in the
+        asset catalog or have neither a quote nor price history.
+    """
+    exchange = get_symbol_exchange(symbol)
+    if exchange is None:
+        print(f"Error fetching details for {symbol}: not a listed asset")
+        return None
+    components, failed = fetch_detail_components(symbol)
+    if not components['quote'].get('current_price') and components['bars'] is None:
+        _fetch_error('get_stock_details', f"Error fetching details for {symbol}: no quote or price history")
+        return None
+
+    data = {
+        'symbol': symbol,
+        'exchange': exchange,
+    }
+    data.update(components['quote'])
+    data.update(components['info'])
+    data['financials'] = {
+        'income_statement': components['income_statement'],
+        'balance_sheet': components['balance_sheet'],
+        'cash_flow': components['cash_flow'],
+    }
+    data['news'] = list(components['news'])
+    # Historical data for charts and indicators
+    data['history_df'] = components['bars']
+    data['unavailable_sections'] = failed
+    return data
+
+
+# Current AAA corporate bond yield for Graham valuations. BOND_YIELD_AAA
+# pins it; otherwise it is fetched daily, retried after a few minutes on
+# failure, with analysis.BOND_YIELD_AAA as the fallback meanwhile.
+BOND_YIELD_OVERRIDE = os.getenv('BOND_YIELD_AAA')
+BOND_YIELD_TTL = 24 * 60 * 60
+BOND_YIELD_RETRY = 5 * 60
+
+
+def _load_bond_yield():
+    try:
+        return float(provider.get_bond_yield())
     except Exception as e:
-        print(f"Error fetching details for {symbol}: {e}")
+        _fetch_error('get_bond_yield', f"Error fetching AAA bond yield: {e}")
         return None
 
-    return data
\ No newline at end of file
+
+@_instrumented
+def get_bond_yield():
+    """
+    Returns the AAA corporate bond yield in percent used for intrinsic values.
+
+    Returns:
+        float: The pinned, cached or freshly fetched yield, or
+        analysis.BOND_YIELD_AAA when none is available.
+    """
+    if BOND_YIELD_OVERRIDE:
+        return float(BOND_YIELD_OVERRIDE)
+    bond_yield = detail_cache.get_or_load(
+        ('bond_yield', 'AAA'), _load_bond_yield,
+        lambda value: BOND_YIELD_TTL if value is not None else BOND_YIELD_RETRY)
+    return analysis.BOND_YIELD_AAA if bond_yield is None else bond_yield
+
+
+# The universe's daily bars only change at the close, so screener passes
+# sync them once per close and otherwise rebuild from the stored bars
+_next_screener_sync = 0.0
+
+
+def _screener_closes(symbols):
+    """Daily closes for a screener pass, synced with the provider at most once per close."""
+    global _next_screener_sync
+    symbols = list(symbols)
+    if time.time() >= _next_screener_sync:
+        try:
+            backfill_daily_bars(symbols)
+            _next_screener_sync = time.time() + _seconds_until_next_close()
+        except Exception as e:
+            _fetch_error('get_daily_close_matrix', f"Error backfilling daily bars for {len(symbols)} symbols: {e}")
+    return get_daily_close_matrix(symbols, sync=False)
+
+
+# Whole-universe screener table, rebuilt in bulk in the background. Each
+# pass fetches fundamentals for a limited number of symbols, uncached so
+# that the detail page cache is not flushed. Its provider calls yield to
+# page loads.
+SCREENER_REFRESH_INTERVAL = float(os.getenv('SCREENER_REFRESH_INTERVAL', 15 * 60))
+SCREENER_FUNDAMENTALS_BATCH = int(os.getenv('SCREENER_FUNDAMENTALS_BATCH', '100'))
+screener = Screener(
+    lambda: get_asset_catalog().assets(),
+    in_background(lambda symbols: _screener_closes(symbols)),
+    in_background(lambda symbol: _load_info(symbol)),
+    load_bond_yield=lambda: get_bond_yield(),
+    interval=SCREENER_REFRESH_INTERVAL, fundamentals_batch=SCREENER_FUNDAMENTALS_BATCH)
+
+
+@_instrumented
+def get_screener_table():
+    """Returns the current screener table, or None while the first pass runs."""
+    return screener.table()
+
+
+@_instrumented
+def fetch_daily_closes(symbol):
+    """
+    Returns the completed daily closes of the cached one-year bars.
+
+    Today's bar is left out while the market is open, since its close is
+    still moving.
+
+    Args:
+        symbol (str): The stock symbol.
+
+    Returns:
+        list: (date, close) pairs in ascending order, dates in US/Eastern.
+    """
+    bars = get_detail_component(symbol, 'bars')
+    if bars is None:
+        return []
+    eastern = pytz.timezone('US/Eastern')
+    today = datetime.now(eastern).date()
+    market_open = is_market_open()
+    history = []
+    for timestamp, close in zip(bars['timestamp'], bars['c']):
+        date = timestamp.astimezone(eastern).date()
+        if market_open and date >= today:
+            continue
+        history.append((date, float(close)))
+    return history
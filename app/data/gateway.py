@@ -0,0 +1,231 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from functools import wraps
+from .. import metrics
+from ..ratelimit import BACKGROUND, INTERACTIVE, LANES, TokenBucket
+
+# Calls per minute allowed to each upstream service. Alpaca's free plan
+# allows 200 per minute; yFinance and FRED publish no limit, so these stay
+# well below where they start answering 429. Services not listed are not
+# limited. Override with PROVIDER_RATE_LIMITS, e.g. "alpaca=180,yfinance=60".
+DEFAULT_RATE_LIMITS = {'alpaca': 180, 'yfinance': 60, 'fred': 10}
+
+PROVIDER_CALLS = metrics.counter(
+    'provider_calls_total', 'Outbound provider calls', ('upstream', 'lane'))
+PROVIDER_WAIT_SECONDS = metrics.histogram(
+    'provider_wait_seconds', 'Time calls waited for a rate limit token', ('upstream', 'lane'))
+PROVIDER_DEDUPLICATED = metrics.counter(
+    'provider_deduplicated_total', 'Calls that joined an identical in-flight call', ('upstream',))
+PROVIDER_THROTTLED = metrics.counter(
+    'provider_throttled_total', 'Calls refused after waiting too long for a token', ('upstream', 'lane'))
+PROVIDER_RATE_LIMITED = metrics.counter(
+    'provider_rate_limited_total', 'Calls answered with HTTP 429', ('upstream',))
+
+_lane = threading.local()
+_call_timeout = threading.local()
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call gets no rate limit token within the gateway timeout."""
+
+
+class _Flight(Future):
+    """A running provider call, in the highest-priority lane of the callers waiting on it."""
+
+    def __init__(self, lane):
+        super().__init__()
+        self.lane = lane
+
+
+def current_lane():
+    """The priority lane of outbound calls made by the current thread."""
+    return getattr(_lane, 'value', INTERACTIVE)
+
+
+@contextmanager
+def background():
+    """Runs the provider calls made inside the block in the background lane."""
+    previous = current_lane()
+    _lane.value = BACKGROUND
+    try:
+        yield
+    finally:
+        _lane.value = previous
+
+
+@contextmanager
+def call_timeout(seconds):
+    """
+    Caps how long provider calls made inside the block wait for a rate limit
+    token or for an identical call already in flight.
+    """
+    previous = getattr(_call_timeout, 'value', None)
+    _call_timeout.value = seconds if previous is None else min(previous, seconds)
+    try:
+        yield
+    finally:
+        _call_timeout.value = previous
+
+
+def in_background(func):
+    """Decorates a function so its provider calls run in the background lane."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with background():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def parse_rate_limits(spec):
+    """Parses "name=calls_per_minute,..." over DEFAULT_RATE_LIMITS."""
+    limits = dict(DEFAULT_RATE_LIMITS)
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, _, value = item.partition('=')
+        try:
+            limits[name.strip()] = float(value)
+        except ValueError:
+            raise ValueError(f"PROVIDER_RATE_LIMITS entries must look like name=calls, got {item!r}")
+    return limits
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(value)) if isinstance(value, (set, frozenset)) else tuple(value)
+    return value
+
+
+class ProviderGateway:
+    """
+    Single outbound path for a data provider's REST calls.
+
+    Each upstream service of the provider (see its `upstreams`) gets a token
+    bucket of `rate_limits[service]` calls per minute. Calls wait for a
+    token in their lane: interactive calls (the default) go ahead of calls
+    made inside `background()`, which also leave `background_reserve` of
+    the bucket for interactive bursts. A call that gets no token within
+    `timeout` seconds (or the shorter limit of an enclosing `call_timeout`)
+    raises RateLimitExceeded. Identical concurrent calls share one request;
+    an interactive caller joining a background call promotes it to the
+    interactive lane. When a service answers 429 its
+    bucket is paused for `cooldown` seconds so the remaining calls wait
+    instead of failing too.
+
+    Everything else (name, stream_url, stream_auth, ...) is passed through
+    to the provider.
+    """
+
+    def __init__(self, provider, rate_limits=None, timeout=30, background_reserve=0.25,
+                 cooldown=30):
+        self.provider = provider
+        self.name = provider.name
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.buckets = {}
+        for upstream, per_minute in (DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits).items():
+            if per_minute and per_minute > 0:
+                capacity = max(per_minute / 6, 1)  # at most 10 seconds' worth in a burst
+                # Background calls must still fit through a bucket this small
+                reserve = min(capacity * background_reserve, capacity - 1)
+                self.buckets[upstream] = TokenBucket(per_minute / 60, capacity=capacity, reserve=reserve)
+        self._inflight = {}  # (method, args) -> _Flight of the running call
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, provider):
+        return cls(
+            provider,
+            rate_limits=parse_rate_limits(os.getenv('PROVIDER_RATE_LIMITS')),
+            timeout=float(os.getenv('PROVIDER_RATE_LIMIT_TIMEOUT', '30')),
+            cooldown=float(os.getenv('PROVIDER_RATE_LIMIT_COOLDOWN', '30')))
+
+    def __getattr__(self, name):
+        return getattr(self.provider, name)
+
+    def upstream(self, method):
+        """The upstream service a provider method calls."""
+        return self.provider.upstreams.get(method, self.provider.name)
+
+    def call(self, method, *args):
+        """Calls a provider method through its rate limit, sharing identical in-flight calls."""
+        key = (method,) + tuple(_freeze(arg) for arg in args)
+        lane = current_lane()
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight(lane)
+                self._inflight[key] = flight
+            promote = lane < flight.lane
+            if promote:
+                flight.lane = lane
+
+        if not leader:
+            upstream = self.upstream(method)
+            PROVIDER_DEDUPLICATED.inc(labels=(upstream,))
+            if promote and upstream in self.buckets:
+                # The call may be waiting for a token behind the background reserve
+                self.buckets[upstream].wake()
+            return flight.result(timeout=getattr(_call_timeout, 'value', None))
+
+        try:
+            result = self._send(method, args, flight)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            flight.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+        flight.set_result(result)
+        return result
+
+    def _send(self, method, args, flight):
+        upstream = self.upstream(method)
+        bucket = self.buckets.get(upstream)
+        if bucket is not None:
+            limit = getattr(_call_timeout, 'value', None)
+            timeout = self.timeout if limit is None else min(self.timeout, limit)
+            started = time.perf_counter()
+            acquired = bucket.acquire(lane=lambda: flight.lane, timeout=timeout)
+            labels = (upstream, LANES[flight.lane])
+            PROVIDER_WAIT_SECONDS.observe(time.perf_counter() - started, labels)
+            if not acquired:
+                PROVIDER_THROTTLED.inc(labels=labels)
+                raise RateLimitExceeded(
+                    f"No {upstream} rate limit capacity within {timeout:g}s")
+        PROVIDER_CALLS.inc(labels=(upstream, LANES[flight.lane]))
+        try:
+            return getattr(self.provider, method)(*args)
+        except Exception as e:
+            if self.provider.is_rate_limit_error(e):
+                PROVIDER_RATE_LIMITED.inc(labels=(upstream,))
+                if bucket is not None:
+                    bucket.pause(self.cooldown)
+            raise
+
+    def get_all_assets(self):
+        return self.call('get_all_assets')
+
+    def get_clock(self):
+        return self.call('get_clock')
+
+    def get_latest_quotes(self, symbols):
+        return self.call('get_latest_quotes', symbols)
+
+    def get_bars(self, symbols, timeframe, start):
+        return self.call('get_bars', symbols, timeframe, start)
+
+    def get_fundamental(self, symbol, kind):
+        return self.call('get_fundamental', symbol, kind)
+
+    def get_bond_yield(self):
+        return self.call('get_bond_yield')
+
+    def stats(self):
+        """Returns available tokens and waiting callers per rate-limited upstream."""
+        return {upstream: {'available': round(bucket.available(), 2),
+                           'waiting': {name: bucket.waiting(lane) for lane, name in LANES.items()}}
+                for upstream, bucket in self.buckets.items()}
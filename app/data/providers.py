@@ -0,0 +1,178 @@
+import os
+import threading
+import requests
+import yfinance as yf
+from curl_cffi import requests as curl_requests
+from requests.adapters import HTTPAdapter
+import alpaca
+from alpaca.trading.client import TradingClient
+from alpaca.data.historical import StockHistoricalDataClient
+from alpaca.trading.requests import GetAssetsRequest
+from alpaca.trading.enums import AssetClass, AssetStatus
+from alpaca.data.requests import StockLatestQuoteRequest
+from ..concurrency import offload
+
+
+class AlpacaProvider:
+    """
+    Market data from Alpaca (assets, clock, quotes, bars and the realtime
+    stream) and fundamentals from yFinance.
+
+    Every provider exposes the same methods:
+        get_all_assets()                     objects with symbol, name, exchange
+        get_clock()                          object with is_open, next_open, next_close
+        get_latest_quotes(symbols)           {symbol: object with bid/ask price and size, timestamp}
+        get_bars(symbols, timeframe, start)  DataFrame with symbol, timestamp, OHLCV columns, or None
+        get_fundamental(symbol, kind)        yFinance-shaped info, financials, balance_sheet,
+                                             cashflow or news
+        get_bond_yield()                     current AAA corporate bond yield in percent
+        is_rate_limit_error(error)           True if a call failed with HTTP 429
+        stream_url, stream_auth()            websocket endpoint and its auth frame
+
+    and `upstreams`, the external service each method calls (methods not
+    listed call the service named after the provider).
+
+    Clients are created on first use, so importing the app does not need
+    credentials; a missing key raises ValueError when data is first requested.
+    Both Alpaca clients and the FRED download share one pooled requests
+    session of HTTP_POOL_SIZE connections per host, and every yFinance
+    ticker shares one curl_cffi session.
+    """
+
+    name = 'alpaca'
+    stream_url = 'wss://stream.data.alpaca.markets/v2/delayed_sip'
+    # Moody's seasoned AAA corporate bond yield (monthly) from FRED
+    bond_yield_url = 'https://fred.stlouisfed.org/graph/fredgraph.csv?id=AAA'
+
+    upstreams = {
+        'get_all_assets': 'alpaca',
+        'get_clock': 'alpaca',
+        'get_latest_quotes': 'alpaca',
+        'get_bars': 'alpaca',
+        'get_fundamental': 'yfinance',
+        'get_bond_yield': 'fred',
+    }
+
+    TIMEFRAMES = {
+        '1Day': alpaca.data.timeframe.TimeFrame.Day,
+        '1Hour': alpaca.data.timeframe.TimeFrame.Hour,
+        '1Min': alpaca.data.timeframe.TimeFrame.Minute,
+    }
+
+    def __init__(self, key_id=None, secret_key=None):
+        self.key_id = key_id or os.getenv('APCA_API_KEY_ID')
+        self.secret_key = secret_key or os.getenv('APCA_API_SECRET_KEY')
+        self._trading_client = None
+        self._data_client = None
+        self._yf_session = None
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        pool_size = int(os.getenv('HTTP_POOL_SIZE', '20'))
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=pool_size))
+
+    def _check_keys(self):
+        if not self.key_id or not self.secret_key:
+            raise ValueError(
+                "Please set APCA_API_KEY_ID and APCA_API_SECRET_KEY environment variables")
+
+    @property
+    def trading_client(self):
+        if self._trading_client is None:
+            self._check_keys()
+            with self._lock:
+                if self._trading_client is None:
+                    self._trading_client = self._pooled(
+                        TradingClient(self.key_id, self.secret_key, paper=True))
+        return self._trading_client
+
+    @property
+    def data_client(self):
+        if self._data_client is None:
+            self._check_keys()
+            with self._lock:
+                if self._data_client is None:
+                    self._data_client = self._pooled(
+                        StockHistoricalDataClient(self.key_id, self.secret_key))
+        return self._data_client
+
+    def _pooled(self, client):
+        # alpaca-py gives every client its own requests session; share ours
+        # so connections are pooled across clients and threads
+        client._session = self.session
+        return client
+
+    @property
+    def yf_session(self):
+        if self._yf_session is None:
+            with self._lock:
+                if self._yf_session is None:
+                    self._yf_session = curl_requests.Session(impersonate='chrome')
+        return self._yf_session
+
+    def get_all_assets(self):
+        assets_request = GetAssetsRequest(
+            asset_class=AssetClass.US_EQUITY, status=AssetStatus.ACTIVE)
+        return self.trading_client.get_all_assets(assets_request)
+
+    def get_clock(self):
+        return self.trading_client.get_clock()
+
+    def get_latest_quotes(self, symbols):
+        latest_quote_request = StockLatestQuoteRequest(symbol_or_symbols=list(symbols))
+        return self.data_client.get_stock_latest_quote(latest_quote_request)
+
+    def get_bars(self, symbols, timeframe, start):
+        bars_request = alpaca.data.requests.StockBarsRequest(
+            symbol_or_symbols=list(symbols),
+            timeframe=self.TIMEFRAMES[timeframe],
+            start=start
+        )
+        bars = self.data_client.get_stock_bars(bars_request).df
+        if bars.empty:
+            return None
+        # Alpaca returns a (symbol, timestamp) multi-index dataframe
+        return bars.reset_index()
+
+    def get_fundamental(self, symbol, kind):
+        # yfinance does native (curl_cffi) I/O that cannot yield to green
+        # threads, so the read is offloaded
+        return offload(getattr, yf.Ticker(symbol, session=self.yf_session), kind)
+
+    def get_bond_yield(self):
+        response = self.session.get(self.bond_yield_url, timeout=10)
+        response.raise_for_status()
+        # CSV of date,value rows, oldest first; '.' marks a missing observation
+        for line in reversed(response.text.strip().splitlines()[1:]):
+            value = line.rsplit(',', 1)[-1].strip()
+            if value not in ('', '.'):
+                return float(value)
+        raise ValueError("No AAA bond yield observations in the FRED response")
+
+    def is_rate_limit_error(self, error):
+        if isinstance(error, yf.exceptions.YFRateLimitError):
+            return True
+        # alpaca-py's APIError exposes status_code; requests' HTTPError the response
+        status = getattr(error, 'status_code', None)
+        if status is None:
+            status = getattr(getattr(error, 'response', None), 'status_code', None)
+        return status == 429
+
+    def stream_auth(self):
+        return {"action": "auth", "key": self.key_id, "secret": self.secret_key}
+
+
+PROVIDERS = ('alpaca', 'simulator')
+
+
+def create_provider(name=None):
+    """
+    Returns the data provider selected by `name` or DATA_PROVIDER
+    ('alpaca' by default, or 'simulator').
+    """
+    name = name or os.getenv('DATA_PROVIDER', 'alpaca')
+    if name == 'alpaca':
+        return AlpacaProvider()
+    if name == 'simulator':
+        from .simulator import SimulatorProvider
+        return SimulatorProvider.from_env()
+    raise ValueError(f"DATA_PROVIDER must be one of {', '.join(PROVIDERS)}, got {name!r}")
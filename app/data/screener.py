@@ -0,0 +1,312 @@
+import math
+import time
+import threading
+import numpy as np
+from datetime import datetime, UTC
+from .cache import TTLCache
+from ..analysis import BOND_YIELD_AAA, calculate_batch_indicators, calculate_intrinsic_values
+
+# Numeric columns that can be filtered with min_/max_ bounds and sorted on
+NUMERIC_COLUMNS = ('price', 'ma_50', 'ma_200', 'ma_gap', 'rsi', 'intrinsic_value',
+                   'intrinsic_gap', 'market_cap', 'pe_ratio')
+TEXT_COLUMNS = ('symbol', 'name', 'exchange')
+# trend: 1 while MA50 is above MA200, -1 below, 0 without enough history.
+# cross: 1 (golden) or -1 (death) if MA50 crossed MA200 in the last CROSS_LOOKBACK bars.
+# recommendation: analysis.RECOMMEND_* code from the intrinsic value gap.
+FLAG_COLUMNS = ('trend', 'cross', 'recommendation')
+SORT_COLUMNS = TEXT_COLUMNS + NUMERIC_COLUMNS
+
+CROSS_LOOKBACK = 5
+RSI_BANDS = {'oversold': (-math.inf, 30), 'neutral': (30, 70), 'overbought': (70, math.inf)}
+FLAG_VALUES = {
+    'trend': {'up': 1, 'down': -1},
+    'cross': {'golden': 1, 'death': -1},
+    'recommendation': {'buy': 1, 'hold': 0, 'sell': -1},
+}
+
+
+def _number(value):
+    """Returns a float, or NaN for None, 'N/A' and other non-numbers."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return value
+
+
+def build_metrics_table(assets, closes, fundamentals, bond_yield=BOND_YIELD_AAA):
+    """
+    Builds the columnar screener table.
+
+    Args:
+        assets (list): (symbol, name, exchange) tuples, one per row.
+        closes (DataFrame): Daily closes, one row per symbol and one column
+            per day (see fetchers.get_daily_close_matrix).
+        fundamentals (dict): symbol -> dict with eps, earnings_growth,
+            market_cap and pe_ratio (fetchers' info component).
+        bond_yield (float): AAA corporate bond yield for the valuation.
+
+    Returns:
+        numpy.ndarray: A structured array with one row per asset and NaN
+        wherever a metric is unavailable.
+    """
+    symbols = [symbol for symbol, _, _ in assets]
+    closes = closes.reindex(symbols)
+    values = closes.to_numpy(dtype=float)
+    current = calculate_batch_indicators(values, symbols)
+    previous = calculate_batch_indicators(values[:, :-CROSS_LOOKBACK], symbols) \
+        if values.shape[1] > CROSS_LOOKBACK else current
+
+    # Last close per row, skipping trailing gaps
+    price = np.full(len(symbols), np.nan)
+    present = ~np.isnan(values)
+    has_close = present.any(axis=1)
+    if has_close.any():
+        last = values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+        price[has_close] = values[has_close, last[has_close]]
+
+    ma_50 = current['ma_50'].to_numpy()
+    ma_200 = current['ma_200'].to_numpy()
+    trend = np.sign(np.nan_to_num(ma_50 - ma_200)).astype('i1')
+    previous_trend = np.sign(np.nan_to_num(
+        previous['ma_50'].to_numpy() - previous['ma_200'].to_numpy())).astype('i1')
+    cross = np.where((trend != 0) & (previous_trend != 0) & (trend != previous_trend), trend, 0)
+
+    columns = {name: np.full(len(symbols), np.nan) for name in NUMERIC_COLUMNS}
+    columns.update(price=price, ma_50=ma_50, ma_200=ma_200, rsi=current['rsi'].to_numpy())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns['ma_gap'] = (ma_50 / ma_200 - 1) * 100
+
+    eps, growth = np.full(len(symbols), np.nan), np.full(len(symbols), np.nan)
+    for row, symbol in enumerate(symbols):
+        info = fundamentals.get(symbol)
+        if info:
+            columns['market_cap'][row] = _number(info.get('market_cap'))
+            columns['pe_ratio'][row] = _number(info.get('pe_ratio'))
+            eps[row] = _number(info.get('eps'))
+            growth[row] = _number(info.get('earnings_growth'))
+    # Growth is a fraction; the formula takes percent
+    valuation = calculate_intrinsic_values(eps, growth * 100, price, bond_yield)
+    columns['intrinsic_value'] = valuation['intrinsic_value']
+    columns['intrinsic_gap'] = valuation['percentage_difference']
+
+    text = {name: [asset[i] for asset in assets] for i, name in enumerate(TEXT_COLUMNS)}
+    dtype = [(name, f'U{max((len(v) for v in values), default=0) or 1}')
+             for name, values in text.items()]
+    dtype += [(name, 'f8') for name in NUMERIC_COLUMNS] + [(name, 'i1') for name in FLAG_COLUMNS]
+    table = np.zeros(len(symbols), dtype=dtype)
+    for name, values in text.items():
+        table[name] = values
+    for name, values in columns.items():
+        table[name] = values
+    table['trend'] = trend
+    table['cross'] = cross
+    table['recommendation'] = valuation['recommendation']
+    return table
+
+
+class ScreenerTable:
+    """
+    Immutable screener snapshot with cached, paginated queries.
+
+    A query is a tuple of filters (see `normalize_filters`), a sort column
+    and a direction. The matching row ids in display order are cached per
+    query, so paging through a result costs O(page).
+    """
+
+    def __init__(self, table, as_of=None, query_cache_size=256):
+        self.table = table
+        self.size = len(table)
+        self.as_of = as_of or datetime.now(UTC)
+        self._lowered = {name: np.char.lower(table[name]) for name in TEXT_COLUMNS}
+        self._queries = TTLCache(max_entries=query_cache_size)
+
+    def __len__(self):
+        return self.size
+
+    def _mask(self, filters):
+        mask = np.ones(self.size, dtype=bool)
+        for name, low, high in filters:
+            if name == 'exchange':
+                mask &= self._lowered['exchange'] == low
+            elif name in FLAG_COLUMNS:
+                mask &= self.table[name] == low
+            else:
+                column = self.table[name]
+                # NaN fails both comparisons, so rows without the metric drop out
+                if low is not None:
+                    mask &= column >= low
+                if high is not None:
+                    mask &= column <= high
+        return mask
+
+    def _ordered_rows(self, filters, sort, descending):
+        rows = np.flatnonzero(self._mask(filters))
+        if sort in TEXT_COLUMNS:
+            keys = self._lowered[sort][rows]
+            rows = rows[np.argsort(keys, kind='stable')]
+            return rows[::-1] if descending else rows
+        # Rows without the metric sort last in either direction
+        keys = self.table[sort][rows]
+        keys = np.where(np.isnan(keys), np.inf, -keys if descending else keys)
+        return rows[np.argsort(keys, kind='stable')]
+
+    def query(self, filters=(), sort='symbol', descending=False, start=0, length=100):
+        """
+        Returns one page of rows matching every filter.
+
+        Args:
+            filters (tuple): (column, low, high) triples from normalize_filters.
+            sort (str): One of SORT_COLUMNS.
+            descending (bool): Sort direction.
+            start (int): Offset of the first row of the page.
+            length (int): Page size.
+
+        Returns:
+            tuple: (rows, records_filtered) where rows are dicts with NaN
+            replaced by None.
+        """
+        sort = sort if sort in SORT_COLUMNS else 'symbol'
+        rows = self._queries.get_or_load(
+            (filters, sort, descending),
+            lambda: self._ordered_rows(filters, sort, descending),
+            ttl=math.inf)
+        page = self.table[rows[start:start + length]]
+        names = page.dtype.names
+        return [{name: None if isinstance(value, float) and math.isnan(value) else value
+                 for name, value in zip(names, row)} for row in page.tolist()], len(rows)
+
+    def stats(self):
+        """Returns the table size, snapshot time and query cache counters."""
+        return {'size': self.size, 'as_of': self.as_of.isoformat(),
+                'queries': self._queries.stats()}
+
+
+def normalize_filters(args):
+    """
+    Parses screener filters from query arguments into a hashable tuple.
+
+    Accepts min_<column> and max_<column> for NUMERIC_COLUMNS, trend
+    (up/down), cross (golden/death), recommendation (buy/hold/sell),
+    rsi_band (oversold/neutral/overbought) and exchange. Raises ValueError for malformed values.
+    """
+    bounds = {}
+    for name in NUMERIC_COLUMNS:
+        low, high = args.get(f'min_{name}'), args.get(f'max_{name}')
+        if low not in (None, '') or high not in (None, ''):
+            bounds[name] = (float(low) if low not in (None, '') else None,
+                            float(high) if high not in (None, '') else None)
+
+    band = args.get('rsi_band')
+    if band:
+        if band not in RSI_BANDS:
+            raise ValueError(f"rsi_band must be one of {', '.join(RSI_BANDS)}")
+        low, high = RSI_BANDS[band]
+        current_low, current_high = bounds.get('rsi', (None, None))
+        bounds['rsi'] = (max(low, current_low if current_low is not None else -math.inf),
+                         min(high, current_high if current_high is not None else math.inf))
+
+    filters = [(name, low, high) for name, (low, high) in sorted(bounds.items())]
+    for name, values in FLAG_VALUES.items():
+        value = args.get(name)
+        if value:
+            if value not in values:
+                raise ValueError(f"{name} must be one of {', '.join(values)}")
+            filters.append((name, values[value], None))
+    exchange = args.get('exchange')
+    if exchange:
+        filters.append(('exchange', exchange.lower(), None))
+    return tuple(filters)
+
+
+class Screener:
+    """
+    Keeps a ScreenerTable of the whole asset universe up to date.
+
+    A background thread rebuilds the table every `interval` seconds in one
+    bulk pass: the asset list, one year of daily closes for every symbol and
+    the fundamentals fetched so far. Fundamentals come from per-symbol calls,
+    so each pass fetches at most `fundamentals_batch` symbols, the ones
+    never fetched first and then the stalest.
+
+    Args:
+        load_assets (callable): Returns (symbol, name, exchange) tuples.
+        load_closes (callable): symbols -> daily close matrix.
+        load_fundamentals (callable): symbol -> fundamentals dict.
+        load_bond_yield (callable, optional): Returns the AAA bond yield.
+    """
+
+    def __init__(self, load_assets, load_closes, load_fundamentals, load_bond_yield=None,
+                 interval=15 * 60, fundamentals_batch=100):
+        self.load_assets = load_assets
+        self.load_closes = load_closes
+        self.load_fundamentals = load_fundamentals
+        self.load_bond_yield = load_bond_yield
+        self.interval = interval
+        self.fundamentals_batch = fundamentals_batch
+        self._table = None
+        self._fundamentals = {}
+        self._fetched_at = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.refreshes = 0
+        self.errors = 0
+        self.last_refresh_seconds = None
+
+    def table(self):
+        """Returns the current ScreenerTable (None until the first pass ends), starting the refresher."""
+        if self._thread is None:
+            self.start()
+        return self._table
+
+    def start(self):
+        """Starts the refresh thread unless it is running."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name='screener_refresh_thread', daemon=True)
+        self._thread.start()
+
+    def _update_fundamentals(self, symbols):
+        never = [s for s in symbols if s not in self._fetched_at]
+        stale = sorted((s for s in symbols if s in self._fetched_at), key=self._fetched_at.get)
+        for symbol in (never + stale)[:self.fundamentals_batch]:
+            try:
+                self._fundamentals[symbol] = self.load_fundamentals(symbol)
+            except Exception as e:
+                print(f"Error loading screener fundamentals for {symbol}: {e}")
+            self._fetched_at[symbol] = time.monotonic()
+
+    def refresh(self):
+        """Rebuilds the table in one bulk pass and swaps it in."""
+        started = time.perf_counter()
+        assets = list(self.load_assets())
+        symbols = [symbol for symbol, _, _ in assets]
+        self._update_fundamentals(symbols)
+        bond_yield = self.load_bond_yield() if self.load_bond_yield else BOND_YIELD_AAA
+        table = build_metrics_table(assets, self.load_closes(symbols), self._fundamentals, bond_yield)
+        self._table = ScreenerTable(table)
+        self.refreshes += 1
+        self.last_refresh_seconds = time.perf_counter() - started
+        return self._table
+
+    def run(self):
+        """Refreshes the table forever."""
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error refreshing screener: {e}")
+            time.sleep(self.interval)
+
+    def stats(self):
+        """Returns refresh counters and the current table's stats."""
+        table = self._table
+        return {
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'last_refresh_seconds': self.last_refresh_seconds,
+            'fundamentals': len(self._fundamentals),
+            'table': table.stats() if table is not None else None
+        }
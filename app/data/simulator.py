@@ -0,0 +1,493 @@
+"""
+Offline market data simulator.
+
+SimulatorProvider serves synthetic assets, clock, quotes, daily bars and
+fundamentals through the same interface as AlpacaProvider, and streams
+quotes, trades and minute bars in the Alpaca v2 wire format from a local
+websocket server. Everything is derived from a seed, so runs are
+reproducible.
+
+Run the stream server on its own (e.g. for several app workers):
+
+    python -m app.data.simulator --port 8765 --rate 5000
+"""
+import os
+import json
+import time
+import base64
+import socket
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta, UTC
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+SECTORS = (
+    ('Technology', 'Software'), ('Technology', 'Semiconductors'),
+    ('Healthcare', 'Biotechnology'), ('Financial Services', 'Banks'),
+    ('Consumer Cyclical', 'Retail'), ('Energy', 'Oil & Gas'),
+    ('Industrials', 'Aerospace & Defense'), ('Utilities', 'Electric Utilities'),
+)
+EXCHANGES = ('NASDAQ', 'NYSE', 'ARCA')
+# AAA corporate bond yield in percent reported by the simulator
+SIMULATED_BOND_YIELD = 5.0
+
+# Daily history starts here so every sync sees the same bars
+HISTORY_ANCHOR = pd.Timestamp('2018-01-02', tz='UTC')
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class SimAsset(NamedTuple):
+    symbol: str
+    name: str
+    exchange: str
+
+
+class SimQuote(NamedTuple):
+    bid_price: float
+    ask_price: float
+    bid_size: int
+    ask_size: int
+    timestamp: datetime
+
+
+class SimClock(NamedTuple):
+    is_open: bool
+    next_open: datetime
+    next_close: datetime
+
+
+def simulated_symbols(count):
+    """Returns `count` distinct four-letter tickers: AAAA, AAAB, ..."""
+    symbols = []
+    for i in range(count):
+        letters = []
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            letters.append(chr(ord('A') + r))
+        symbols.append(''.join(reversed(letters)))
+    return symbols
+
+
+def _symbol_seed(seed, symbol):
+    digest = hashlib.blake2b(f'{seed}:{symbol}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def _rfc3339(dt):
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class MarketSimulator:
+    """
+    Random-walk prices and stream messages for any symbol.
+
+    Each symbol starts from the last close of its synthetic daily history
+    and moves by a small normal step per stream message.
+    """
+
+    def __init__(self, seed=0, volatility=0.0005):
+        self.seed = seed
+        self.volatility = volatility
+        self._prices = {}
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._history = {}
+
+    def daily_closes(self, symbol, until=None):
+        """Business-day closes from HISTORY_ANCHOR to `until` (default today)."""
+        until = pd.Timestamp(until or datetime.now(UTC)).normalize()
+        days = pd.bdate_range(HISTORY_ANCHOR, until)
+        cached = self._history.get(symbol)
+        if cached is None or len(cached) < len(days):
+            rng = np.random.default_rng(_symbol_seed(self.seed, symbol))
+            base = rng.uniform(10, 500)
+            returns = rng.normal(0.0003, 0.015, len(days))
+            cached = pd.Series(base * np.exp(np.cumsum(returns)), index=days)
+            self._history[symbol] = cached
+        return cached.iloc[:len(days)]
+
+    def mid(self, symbol):
+        """Returns the current mid price of a symbol."""
+        price = self._prices.get(symbol)
+        if price is None:
+            price = self._prices[symbol] = float(self.daily_closes(symbol).iloc[-1])
+        return price
+
+    def step(self, symbol):
+        """Moves a symbol's price one random step and returns it."""
+        with self._lock:
+            price = self.mid(symbol) * float(np.exp(self._rng.normal(0, self.volatility)))
+            self._prices[symbol] = price
+            return price
+
+    def quote(self, symbol, now=None):
+        """Returns a quote around the current mid price."""
+        price = self.mid(symbol)
+        spread = max(0.01, round(price * 0.0002, 2))
+        return SimQuote(round(price - spread / 2, 2), round(price + spread / 2, 2),
+                        100, 100, now or datetime.now(UTC))
+
+    def messages(self, symbols, count, trade_ratio=0.2):
+        """Returns `count` quote and trade messages for random symbols."""
+        now = _rfc3339(datetime.now(UTC))
+        picks = self._rng.integers(0, len(symbols), count)
+        trades = self._rng.random(count) < trade_ratio
+        messages = []
+        for index, is_trade in zip(picks, trades):
+            symbol = symbols[index]
+            price = self.step(symbol)
+            if is_trade:
+                messages.append({'T': 't', 'S': symbol, 'i': int(self._rng.integers(1 << 30)),
+                                 'x': 'V', 'p': round(price, 2), 's': int(self._rng.integers(1, 500)),
+                                 'c': ['@'], 'z': 'C', 't': now})
+            else:
+                quote = self.quote(symbol)
+                messages.append({'T': 'q', 'S': symbol, 'bx': 'V', 'bp': quote.bid_price,
+                                 'bs': quote.bid_size, 'ax': 'V', 'ap': quote.ask_price,
+                                 'as': quote.ask_size, 'c': ['R'], 'z': 'C', 't': now})
+        return messages
+
+    def minute_bars(self, symbols):
+        """Returns one minute bar message per symbol at the current price."""
+        minute = datetime.now(UTC).replace(second=0, microsecond=0)
+        bars = []
+        for symbol in symbols:
+            close = self.mid(symbol)
+            bars.append({'T': 'b', 'S': symbol, 'o': round(close, 2), 'h': round(close * 1.001, 2),
+                         'l': round(close * 0.999, 2), 'c': round(close, 2),
+                         'v': int(self._rng.integers(1000, 100000)), 't': _rfc3339(minute)})
+        return bars
+
+
+def _encode_frame(payload, opcode=0x1):
+    """Encodes an unmasked, unfragmented server websocket frame."""
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header.append(length)
+    elif length < 1 << 16:
+        header.append(126)
+        header += length.to_bytes(2, 'big')
+    else:
+        header.append(127)
+        header += length.to_bytes(8, 'big')
+    return bytes(header) + payload
+
+
+def _read_exact(rfile, n):
+    data = rfile.read(n)
+    if len(data) < n:
+        raise ConnectionError('client closed the connection')
+    return data
+
+
+def _read_frame(rfile):
+    """Reads one (opcode, payload) client frame; fragments are not supported."""
+    head = _read_exact(rfile, 2)
+    opcode = head[0] & 0x0F
+    length = head[1] & 0x7F
+    if length == 126:
+        length = int.from_bytes(_read_exact(rfile, 2), 'big')
+    elif length == 127:
+        length = int.from_bytes(_read_exact(rfile, 8), 'big')
+    mask = _read_exact(rfile, 4) if head[1] & 0x80 else None
+    payload = _read_exact(rfile, length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+class SimulatorServer:
+    """
+    Local websocket server speaking the Alpaca v2 stream protocol.
+
+    Each connection gets `rate` messages per second spread over the symbols
+    it subscribed to, sent every `tick` seconds in frames of up to
+    `batch_size` messages, plus one minute bar per symbol each minute.
+    """
+
+    def __init__(self, simulator, host='127.0.0.1', port=0, rate=1000, batch_size=100, tick=0.05):
+        self.simulator = simulator
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.batch_size = batch_size
+        self.tick = tick
+        self._socket = None
+        self._stop = threading.Event()
+        self.connections = 0
+        self.sent_messages = 0
+
+    @property
+    def url(self):
+        return f'ws://{self.host}:{self.port}'
+
+    def start(self):
+        """Binds and serves on a background thread. Returns self."""
+        self._socket = socket.create_server((self.host, self.port))
+        self.port = self._socket.getsockname()[1]
+        threading.Thread(target=self.serve_forever, name='simulator_server', daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        if self._socket is None:
+            self._socket = socket.create_server((self.host, self.port))
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._socket is not None:
+            self._socket.close()
+
+    def _handshake(self, conn, rfile):
+        headers = {}
+        request_line = rfile.readline()
+        if not request_line:
+            raise ConnectionError('empty handshake')
+        while True:
+            line = rfile.readline().decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(hashlib.sha1(
+            (headers['sec-websocket-key'] + WEBSOCKET_GUID).encode()).digest()).decode()
+        conn.sendall((
+            'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept}\r\n\r\n').encode())
+
+    def _serve_client(self, conn):
+        send_lock = threading.Lock()
+        subscribed = set()
+        closed = threading.Event()
+
+        def send(messages, opcode=0x1):
+            payload = messages if isinstance(messages, bytes) else json.dumps(messages).encode()
+            with send_lock:
+                conn.sendall(_encode_frame(payload, opcode))
+
+        def read_loop():
+            try:
+                while not closed.is_set():
+                    opcode, payload = _read_frame(rfile)
+                    if opcode == 0x8:
+                        send(payload[:2], opcode=0x8)
+                        break
+                    if opcode == 0x9:
+                        send(payload, opcode=0xA)
+                        continue
+                    if opcode != 0x1:
+                        continue
+                    message = json.loads(payload)
+                    action = message.get('action')
+                    if action == 'auth':
+                        send([{'T': 'success', 'msg': 'authenticated'}])
+                    elif action in ('subscribe', 'unsubscribe'):
+                        symbols = set(message.get('quotes', [])) | set(message.get('trades', []))
+                        if action == 'subscribe':
+                            subscribed.update(symbols)
+                        else:
+                            subscribed.difference_update(symbols)
+                        send([{'T': 'subscription', 'quotes': sorted(subscribed),
+                               'trades': sorted(subscribed), 'bars': sorted(subscribed)}])
+            except (ConnectionError, OSError, ValueError):
+                pass
+            finally:
+                closed.set()
+
+        try:
+            rfile = conn.makefile('rb')
+            self._handshake(conn, rfile)
+            send([{'T': 'success', 'msg': 'connected'}])
+        except (ConnectionError, OSError, KeyError):
+            conn.close()
+            return
+        self.connections += 1
+        threading.Thread(target=read_loop, daemon=True).start()
+
+        owed = 0.0
+        next_bar = time.monotonic() + 60
+        try:
+            while not closed.is_set() and not self._stop.is_set():
+                time.sleep(self.tick)
+                symbols = list(subscribed)
+                if not symbols:
+                    continue
+                owed += self.rate * self.tick
+                count, owed = int(owed), owed - int(owed)
+                messages = self.simulator.messages(symbols, count)
+                if time.monotonic() >= next_bar:
+                    messages += self.simulator.minute_bars(symbols)
+                    next_bar += 60
+                for i in range(0, len(messages), self.batch_size):
+                    send(messages[i:i + self.batch_size])
+                self.sent_messages += len(messages)
+        except OSError:
+            pass
+        finally:
+            closed.set()
+            conn.close()
+
+
+class SimulatorProvider:
+    """
+    Synthetic data provider with the AlpacaProvider interface.
+
+    REST-style calls answer instantly from the seeded simulator; the stream
+    comes from `stream_url`, or from an embedded SimulatorServer started on
+    first use when no URL is configured.
+    """
+
+    name = 'simulator'
+    upstreams = {}
+
+    def __init__(self, symbols=500, rate=1000, seed=0, market_open=True, stream_url=None,
+                 batch_size=100):
+        self.symbols = simulated_symbols(symbols)
+        self.rate = rate
+        self.market_open = market_open
+        self.batch_size = batch_size
+        self.simulator = MarketSimulator(seed)
+        self._stream_url = stream_url
+        self._server = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            symbols=int(os.getenv('SIMULATOR_SYMBOLS', '500')),
+            rate=float(os.getenv('SIMULATOR_RATE', '1000')),
+            seed=int(os.getenv('SIMULATOR_SEED', '0')),
+            market_open=os.getenv('SIMULATOR_MARKET_OPEN', '1') not in ('0', 'false', 'False'),
+            stream_url=os.getenv('SIMULATOR_STREAM_URL'))
+
+    @property
+    def stream_url(self):
+        if self._stream_url is None:
+            with self._lock:
+                if self._server is None:
+                    self._server = SimulatorServer(
+                        self.simulator, rate=self.rate, batch_size=self.batch_size).start()
+            return self._server.url
+        return self._stream_url
+
+    def stream_auth(self):
+        return {'action': 'auth', 'key': 'simulator', 'secret': 'simulator'}
+
+    def get_all_assets(self):
+        assets = []
+        for i, symbol in enumerate(self.symbols):
+            assets.append(SimAsset(symbol, f'{symbol.title()} Simulated Inc.',
+                                   EXCHANGES[i % len(EXCHANGES)]))
+        return assets
+
+    def get_clock(self):
+        now = datetime.now(UTC)
+        if self.market_open:
+            return SimClock(True, now + timedelta(hours=18), now + timedelta(hours=1))
+        return SimClock(False, now + timedelta(hours=1), now + timedelta(hours=8))
+
+    def get_bond_yield(self):
+        return SIMULATED_BOND_YIELD
+
+    def is_rate_limit_error(self, error):
+        return False
+
+    def get_latest_quotes(self, symbols):
+        now = datetime.now(UTC)
+        return {symbol: self.simulator.quote(symbol, now) for symbol in symbols}
+
+    def get_bars(self, symbols, timeframe, start):
+        if timeframe != '1Day':
+            raise ValueError(f"The simulator only has 1Day bars, not {timeframe}")
+        start = pd.Timestamp(start)
+        frames = []
+        for symbol in symbols:
+            closes = self.simulator.daily_closes(symbol)
+            opens = closes.shift(1).fillna(closes.iloc[0])
+            frame = pd.DataFrame({
+                'symbol': symbol,
+                'timestamp': closes.index + pd.Timedelta(hours=5),
+                'open': opens.to_numpy(),
+                'high': np.maximum(opens, closes).to_numpy() * 1.005,
+                'low': np.minimum(opens, closes).to_numpy() * 0.995,
+                'close': closes.to_numpy(),
+                'volume': 1_000_000.0,
+                'trade_count': 10_000.0,
+                'vwap': ((opens + closes) / 2).to_numpy(),
+            })
+            frames.append(frame[frame['timestamp'] >= start])
+        bars = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        return None if bars.empty else bars
+
+    def get_fundamental(self, symbol, kind):
+        rng = np.random.default_rng(_symbol_seed(self.simulator.seed, f'fundamentals:{symbol}'))
+        closes = self.simulator.daily_closes(symbol).iloc[-252:]
+        price = float(closes.iloc[-1])
+        eps = round(float(rng.uniform(0.5, 12)), 2)
+        shares = float(rng.uniform(5e7, 5e9))
+        revenue = shares * eps * float(rng.uniform(4, 12))
+        column = pd.Timestamp(datetime.now(UTC).year - 1, 12, 31)
+        sector, industry = SECTORS[int(rng.integers(len(SECTORS)))]
+        if kind == 'info':
+            return {
+                'longName': f'{symbol.title()} Simulated Inc.',
+                'longBusinessSummary': f'{symbol} is a synthetic company generated by the market simulator.',
+                'sector': sector,
+                'industry': industry,
+                'website': f'https://{symbol.lower()}.example.com',
+                'marketCap': int(price * shares),
+                'trailingPE': round(price / eps, 2),
+                'trailingEps': eps,
+                'earningsGrowth': round(float(rng.uniform(-0.1, 0.3)), 3),
+                'fiftyTwoWeekHigh': round(float(closes.max()), 2),
+                'fiftyTwoWeekLow': round(float(closes.min()), 2),
+            }
+        if kind == 'financials':
+            return pd.DataFrame({column: {'Total Revenue': revenue, 'Net Income': eps * shares,
+                                          'Diluted EPS': eps}})
+        if kind == 'balance_sheet':
+            return pd.DataFrame({column: {'Total Assets': revenue * 1.5, 'Total Debt': revenue * 0.4,
+                                          'Cash And Cash Equivalents': revenue * 0.2}})
+        if kind == 'cashflow':
+            return pd.DataFrame({column: {'Operating Cash Flow': eps * shares * 1.2,
+                                          'Free Cash Flow': eps * shares * 0.9}})
+        if kind == 'news':
+            today = datetime.now(UTC).replace(microsecond=0)
+            return [{'content': {
+                'title': f'{symbol} simulated headline {i + 1}',
+                'provider': {'displayName': 'Simulator Wire'},
+                'canonicalUrl': {'url': f'https://news.example.com/{symbol.lower()}/{i + 1}'},
+                'pubDate': (today - timedelta(hours=i)).isoformat().replace('+00:00', 'Z'),
+                'summary': f'Synthetic news item {i + 1} about {symbol}.',
+            }} for i in range(5)]
+        raise ValueError(f"Unknown fundamental {kind!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the market data simulator stream server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=1000,
+                        help='Messages per second per connection')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = SimulatorServer(MarketSimulator(args.seed), host=args.host, port=args.port,
+                             rate=args.rate, batch_size=args.batch_size)
+    print(f"Simulator streaming on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+# Per-symbol capacity; one regular session has 390 minute bars
+TICK_STORE_BARS = int(os.getenv('TICK_STORE_BARS', '390'))
+TICK_STORE_TRADES = int(os.getenv('TICK_STORE_TRADES', '1000'))
+
+BAR_DTYPE = np.dtype([('timestamp', 'M8[ns]'), ('open', 'f8'), ('high', 'f8'),
+                      ('low', 'f8'), ('close', 'f8'), ('volume', 'f8')])
+TRADE_DTYPE = np.dtype([('timestamp', 'M8[ns]'), ('price', 'f8'), ('size', 'f8')])
+
+
+def to_datetime64(timestamp):
+    """Converts an RFC 3339 stream timestamp to numpy datetime64[ns] (UTC)."""
+    if timestamp.endswith('Z'):
+        timestamp = timestamp[:-1]
+    return np.datetime64(timestamp, 'ns')
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of structured rows backed by one preallocated array."""
+
+    __slots__ = ('_rows', '_head', '_count')
+
+    def __init__(self, capacity, dtype):
+        self._rows = np.zeros(capacity, dtype=dtype)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return self._rows.nbytes
+
+    def append(self, row):
+        self._rows[self._head] = row
+        self._head = (self._head + 1) % len(self._rows)
+        self._count = min(self._count + 1, len(self._rows))
+
+    def to_array(self):
+        """Returns a copy of the rows, oldest first."""
+        if self._count < len(self._rows):
+            return self._rows[:self._count].copy()
+        return np.concatenate([self._rows[self._head:], self._rows[:self._head]])
+
+
+class TickStore:
+    """
+    Bounded in-memory store of recent minute bars and trades per symbol.
+
+    Every symbol gets two preallocated ring buffers, so memory per symbol is
+    fixed at `bar_capacity * BAR_DTYPE.itemsize + trade_capacity *
+    TRADE_DTYPE.itemsize` bytes regardless of stream volume.
+    """
+
+    def __init__(self, bar_capacity=TICK_STORE_BARS, trade_capacity=TICK_STORE_TRADES):
+        self.bar_capacity = bar_capacity
+        self.trade_capacity = trade_capacity
+        self._bars = {}
+        self._trades = {}
+        self._lock = threading.Lock()
+
+    def bytes_per_symbol(self):
+        return self.bar_capacity * BAR_DTYPE.itemsize + self.trade_capacity * TRADE_DTYPE.itemsize
+
+    def _buffer(self, buffers, symbol, capacity, dtype):
+        buffer = buffers.get(symbol)
+        if buffer is None:
+            buffer = buffers[symbol] = RingBuffer(capacity, dtype)
+        return buffer
+
+    def add_bars(self, records):
+        """Appends BarRecords; the lock is taken once per batch."""
+        with self._lock:
+            for r in records:
+                self._buffer(self._bars, r.symbol, self.bar_capacity, BAR_DTYPE).append(
+                    (to_datetime64(r.timestamp), r.open, r.high, r.low, r.close, r.volume))
+
+    def add_trades(self, records):
+        """Appends TradeRecords; the lock is taken once per batch."""
+        with self._lock:
+            for r in records:
+                self._buffer(self._trades, r.symbol, self.trade_capacity, TRADE_DTYPE).append(
+                    (to_datetime64(r.timestamp), r.price, r.size))
+
+    def bars(self, symbol):
+        """Returns the stored minute bars of a symbol as a DataFrame, oldest first."""
+        with self._lock:
+            buffer = self._bars.get(symbol)
+            rows = buffer.to_array() if buffer is not None else np.zeros(0, dtype=BAR_DTYPE)
+        df = pd.DataFrame(rows)
+        df['timestamp'] = df['timestamp'].dt.tz_localize('UTC')
+        return df
+
+    def trades(self, symbol):
+        """Returns the stored trades of a symbol as a DataFrame, oldest first."""
+        with self._lock:
+            buffer = self._trades.get(symbol)
+            rows = buffer.to_array() if buffer is not None else np.zeros(0, dtype=TRADE_DTYPE)
+        df = pd.DataFrame(rows)
+        df['timestamp'] = df['timestamp'].dt.tz_localize('UTC')
+        return df
+
+    def drop(self, symbol):
+        """Frees the buffers of a symbol."""
+        with self._lock:
+            self._bars.pop(symbol, None)
+            self._trades.pop(symbol, None)
+
+    def stats(self):
+        """Returns symbol counts and allocated bytes."""
+        with self._lock:
+            nbytes = sum(b.nbytes for b in self._bars.values()) + \
+                sum(t.nbytes for t in self._trades.values())
+            return {
+                'bar_symbols': len(self._bars),
+                'trade_symbols': len(self._trades),
+                'bytes': nbytes,
+                'bytes_per_symbol': self.bytes_per_symbol()
+            }
@@ -0,0 +1,253 @@
+import threading
+from datetime import date, datetime
+import numpy as np
+import pytz
+
+EASTERN = pytz.timezone('US/Eastern')
+
+MA_SHORT = 50
+MA_LONG = 200
+RSI_PERIOD = 14
+
+
+def session_date(timestamp):
+    """Returns the US/Eastern trading date of an ISO-8601 timestamp, datetime or date."""
+    if isinstance(timestamp, datetime):
+        return timestamp.astimezone(EASTERN).date()
+    if isinstance(timestamp, date):
+        return timestamp
+    ts = timestamp.replace('Z', '+00:00')
+    # Stream timestamps carry nanoseconds; fromisoformat accepts microseconds
+    main, dot, rest = ts.partition('.')
+    if dot:
+        digits = len(rest) - len(rest.lstrip('0123456789'))
+        ts = f"{main}.{rest[:min(digits, 6)]}{rest[digits:]}"
+    return datetime.fromisoformat(ts).astimezone(EASTERN).date()
+
+
+class IndicatorState:
+    """
+    Streaming MA50/MA200/RSI for one symbol, updated in O(1).
+
+    Completed daily closes live in a fixed-size ring buffer. Running sums of
+    the last MA_SHORT - 1 and MA_LONG - 1 closes and Wilder's average gain and
+    loss are updated once per daily close; a live price then yields the
+    indicators as if it were today's close, without touching the history.
+
+    When the session date moves on, the last live price stands in as the
+    previous session's close until `commit_closes` replaces it with the
+    official close from the daily bars.
+    """
+
+    __slots__ = ('_closes', '_count', '_head', '_short_sum', '_long_sum',
+                 '_avg_gain', '_avg_loss', '_seed_gain', '_seed_loss',
+                 '_last_close', '_provisional', 'close_date', 'live_price', 'live_date')
+
+    def __init__(self):
+        self._closes = np.zeros(MA_LONG)
+        self._count = 0
+        self._head = 0
+        self._short_sum = 0.0
+        self._long_sum = 0.0
+        self._avg_gain = None
+        self._avg_loss = None
+        self._seed_gain = 0.0
+        self._seed_loss = 0.0
+        self._last_close = None
+        self._provisional = None  # state before the provisional close was pushed
+        self.close_date = None
+        self.live_price = None
+        self.live_date = None
+
+    def _close_ago(self, n):
+        """Returns the completed close `n` closes back (1 is the latest)."""
+        return self._closes[(self._head - n) % MA_LONG]
+
+    def push_close(self, close, date=None):
+        """Records a completed daily close."""
+        close = float(close)
+        # Closes leaving the live MA windows (which hold window - 1 completed closes)
+        if self._count >= MA_SHORT - 1:
+            self._short_sum -= self._close_ago(MA_SHORT - 1)
+        if self._count >= MA_LONG - 1:
+            self._long_sum -= self._close_ago(MA_LONG - 1)
+        self._short_sum += close
+        self._long_sum += close
+
+        if self._last_close is not None:
+            change = close - self._last_close
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            if self._avg_gain is None:
+                self._seed_gain += gain
+                self._seed_loss += loss
+                if self._count == RSI_PERIOD:
+                    self._avg_gain = self._seed_gain / RSI_PERIOD
+                    self._avg_loss = self._seed_loss / RSI_PERIOD
+            else:
+                self._avg_gain = (self._avg_gain * (RSI_PERIOD - 1) + gain) / RSI_PERIOD
+                self._avg_loss = (self._avg_loss * (RSI_PERIOD - 1) + loss) / RSI_PERIOD
+
+        self._closes[self._head] = close
+        self._head = (self._head + 1) % MA_LONG
+        self._count += 1
+        self._last_close = close
+        self.close_date = date
+
+    def _snapshot(self):
+        return (self._closes[self._head], self._count, self._head, self._short_sum,
+                self._long_sum, self._avg_gain, self._avg_loss, self._seed_gain,
+                self._seed_loss, self._last_close, self.close_date)
+
+    def _restore(self, snapshot):
+        (overwritten, self._count, self._head, self._short_sum, self._long_sum, self._avg_gain,
+         self._avg_loss, self._seed_gain, self._seed_loss, self._last_close,
+         self.close_date) = snapshot
+        self._closes[self._head] = overwritten
+
+    @property
+    def provisional(self):
+        """True while the latest close is a live price awaiting the official close."""
+        return self._provisional is not None
+
+    def commit_closes(self, history):
+        """
+        Records official closes of sessions before the live one, replacing
+        the provisional close of the same date.
+
+        Args:
+            history (list): (date, close) pairs in ascending date order.
+        """
+        for day, close in history:
+            if self.live_date is not None and day >= self.live_date:
+                break
+            if self._provisional is not None and day >= self.close_date:
+                self._restore(self._provisional)
+                self._provisional = None
+            # Days up to the latest official close are already recorded
+            if self.close_date is None or day > self.close_date:
+                self.push_close(close, day)
+
+    def update_price(self, price, timestamp=None):
+        """
+        Applies a live price. When the trading date moves on, the previous
+        live price is committed as that day's provisional close first,
+        unless that day's official close is already recorded.
+        """
+        if price is None or price <= 0:
+            return
+        date = None
+        if timestamp:
+            try:
+                date = session_date(timestamp)
+            except (TypeError, ValueError):
+                date = None
+        if date is not None:
+            if (self.live_date is not None and date > self.live_date and self.live_price is not None
+                    and (self.close_date is None or self.live_date > self.close_date)):
+                snapshot = self._snapshot()
+                self.push_close(self.live_price, self.live_date)
+                self._provisional = snapshot
+            if self.live_date is None or date >= self.live_date:
+                self.live_date = date
+        self.live_price = float(price)
+
+    def values(self):
+        """Returns ma_50, ma_200 and rsi for the live price (None if unknown)."""
+        price = self.live_price if self.live_price is not None else self._last_close
+        if price is None:
+            return {'ma_50': None, 'ma_200': None, 'rsi': None}
+        live = self.live_price is not None
+
+        def moving_average(window, window_sum):
+            # window_sum covers the last window - 1 completed closes
+            if live:
+                return (window_sum + price) / window if self._count >= window - 1 else None
+            return (window_sum + self._close_ago(window)) / window if self._count >= window else None
+
+        rsi = None
+        if self._avg_gain is not None:
+            avg_gain, avg_loss = self._avg_gain, self._avg_loss
+            if live:
+                change = price - self._last_close
+                avg_gain = (avg_gain * (RSI_PERIOD - 1) + max(change, 0.0)) / RSI_PERIOD
+                avg_loss = (avg_loss * (RSI_PERIOD - 1) + max(-change, 0.0)) / RSI_PERIOD
+            rsi = 100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+
+        return {
+            'ma_50': moving_average(MA_SHORT, self._short_sum),
+            'ma_200': moving_average(MA_LONG, self._long_sum),
+            'rsi': rsi
+        }
+
+
+# Streaming state per subscribed symbol
+_states = {}
+_states_lock = threading.Lock()
+
+
+def quote_price(quote):
+    """Returns the mid price of a quote dict, or whichever side is quoted."""
+    bid = quote.get('bid_price') or 0
+    ask = quote.get('ask_price') or 0
+    if bid > 0 and ask > 0:
+        return (bid + ask) / 2
+    return ask or bid or None
+
+
+def seed_symbol(symbol, history):
+    """
+    Starts tracking a symbol from its completed daily closes.
+
+    Args:
+        symbol (str): The stock symbol.
+        history (list): (date, close) pairs in ascending date order.
+    """
+    state = IndicatorState()
+    for day, close in history:
+        state.push_close(close, day)
+    if history:
+        state.live_date = history[-1][0]
+    with _states_lock:
+        previous = _states.get(symbol)
+        if previous is not None and previous.live_price is not None:
+            state.update_price(previous.live_price, previous.live_date)
+        _states[symbol] = state
+
+
+def drop_symbol(symbol):
+    """Stops tracking a symbol."""
+    with _states_lock:
+        _states.pop(symbol, None)
+
+
+def is_tracked(symbol):
+    return symbol in _states
+
+
+def provisional_symbols():
+    """Tracked symbols whose latest close is still a live price."""
+    with _states_lock:
+        return [symbol for symbol, state in _states.items() if state.provisional]
+
+
+def push_daily_closes(symbol, history):
+    """Records official daily closes, as (date, close) pairs, for a tracked symbol."""
+    with _states_lock:
+        state = _states.get(symbol)
+        if state is not None:
+            state.commit_closes(history)
+
+
+def update_quote(symbol, quote):
+    """
+    Applies a quote to a tracked symbol.
+
+    Returns:
+        dict: Live ma_50, ma_200 and rsi, or None if the symbol is not tracked.
+    """
+    with _states_lock:
+        state = _states.get(symbol)
+        if state is None:
+            return None
+        state.update_price(quote_price(quote), quote.get('timestamp'))
+        return state.values()
@@ -0,0 +1,260 @@
+import time
+import bisect
+import threading
+from functools import wraps
+
+# Every exported metric name starts with this prefix
+PREFIX = 'stockmaster_'
+
+# Default histogram buckets in seconds, from sub-millisecond stream work up
+# to slow provider calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class _Metric:
+    """
+    Base of the metric types: a value per tuple of label values.
+
+    Label values are passed positionally in `labelnames` order. A metric
+    built with `func` has no stored values; `func()` is called at scrape
+    time and returns a number, or {label values tuple: number}.
+    """
+
+    kind = None
+
+    def __init__(self, name, help, labelnames=(), func=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.func = func
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _check(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {labels!r}")
+
+    def value(self, labels=()):
+        """Returns the current value for one set of label values."""
+        if self.func is not None:
+            values = self._collected()
+            return values.get(tuple(labels), 0)
+        return self._values.get(tuple(labels), 0)
+
+    def _collected(self):
+        values = self.func()
+        return values if isinstance(values, dict) else {(): values}
+
+    def samples(self):
+        """Returns (suffix, label names, label values, value) rows for exposition."""
+        values = self._collected() if self.func is not None else dict(self._values)
+        return [('', self.labelnames, labels, value)
+                for labels, value in sorted(values.items()) if value is not None]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. frames received or errors raised."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, labels=()):
+        if len(labels) != len(self.labelnames):
+            self._check(labels)
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. connected clients."""
+
+    kind = 'gauge'
+
+    def set(self, value, labels=()):
+        self._check(labels)
+        with self._lock:
+            self._values[tuple(labels)] = value
+
+    def inc(self, amount=1, labels=()):
+        self._check(labels)
+        with self._lock:
+            self._values[tuple(labels)] = self._values.get(tuple(labels), 0) + amount
+
+    def dec(self, amount=1, labels=()):
+        self.inc(-amount, labels)
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values in fixed buckets, plus their sum and count.
+
+    Observations only increment one bucket under a lock; buckets are made
+    cumulative when scraped.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=()):
+        if len(labels) != len(self.labelnames):
+            self._check(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, labels=()):
+        """Context manager observing the duration of its block."""
+        return _Timer(self, labels)
+
+    def value(self, labels=()):
+        """Returns {'count', 'sum'} for one set of label values."""
+        with self._lock:
+            series = self._values.get(tuple(labels))
+            if series is None:
+                return {'count': 0, 'sum': 0.0}
+            return {'count': sum(series[0]), 'sum': series[1]}
+
+    def samples(self):
+        with self._lock:
+            values = {labels: (list(counts), total)
+                      for labels, (counts, total) in self._values.items()}
+        names = self.labelnames + ('le',)
+        rows = []
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                rows.append(('_bucket', names, labels + (_format_value(bound),), cumulative))
+            rows.append(('_sum', self.labelnames, labels, total))
+            rows.append(('_count', self.labelnames, labels, cumulative))
+        return rows
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = tuple(labels)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.labels)
+        return False
+
+
+class Registry:
+    """Named metrics rendered together in the Prometheus text format."""
+
+    def __init__(self, prefix=PREFIX):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                print(f"Error collecting metric {metric.name}: {e}")
+                continue
+            name = self.prefix + metric.name
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for suffix, names, labels, value in samples:
+                lines.append(f'{name}{suffix}{_format_labels(names, labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help, labelnames=(), func=None):
+    """Creates and registers a Counter."""
+    return REGISTRY.register(Counter(name, help, labelnames, func))
+
+
+def gauge(name, help, labelnames=(), func=None):
+    """Creates and registers a Gauge."""
+    return REGISTRY.register(Gauge(name, help, labelnames, func))
+
+
+def histogram(name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+    """Creates and registers a Histogram."""
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+def render():
+    """Returns all registered metrics in the Prometheus text format."""
+    return REGISTRY.render()
+
+
+def timed(histogram, labels=(), errors=None):
+    """
+    Decorator observing each call's duration in `histogram` and counting
+    calls that raise in the `errors` counter, both with `labels`.
+    """
+    labels = tuple(labels)
+
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                if errors is not None:
+                    errors.inc(labels=labels)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started, labels)
+        return wrapper
+    return decorate
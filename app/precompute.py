@@ -0,0 +1,215 @@
+import math
+import time
+import threading
+from typing import Callable, NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+from .ratelimit import TokenBucket
+
+
+class WarmTask(NamedTuple):
+    """
+    One kind of precomputed data kept warm per symbol.
+
+    `staleness(symbol)` returns 1.0 when nothing is cached, a value between
+    0 and 1 as the cached data nears expiry and 0.0 while it is fresh.
+    `warm(symbol)` (re)loads it. `cost` is the number of provider calls one
+    warm makes; heavy tasks are only refreshed while the market is open.
+    """
+    name: str
+    warm: Callable
+    staleness: Callable
+    cost: int = 1
+    heavy: bool = True
+
+
+class PopularityTracker:
+    """
+    Exponentially decayed request counts per symbol.
+
+    Each request adds 1 to a symbol's score and scores halve every
+    `half_life` seconds, so yesterday's spike fades while daily favourites
+    stay on top. At most `max_symbols` symbols are kept: going over prunes
+    the least popular down to `prune_to` of the cap, so the sort is paid
+    once per batch of new symbols rather than on every request.
+    """
+
+    def __init__(self, half_life=24 * 60 * 60, max_symbols=5000, clock=time.monotonic, prune_to=0.9):
+        self.half_life = half_life
+        self.max_symbols = max_symbols
+        self.prune_to = prune_to
+        self.clock = clock
+        self._scores = {}  # symbol -> (score, as of)
+        self._lock = threading.Lock()
+
+    def _decayed(self, score, since, now):
+        return score * 0.5 ** ((now - since) / self.half_life)
+
+    def record(self, symbol):
+        now = self.clock()
+        with self._lock:
+            score, since = self._scores.get(symbol, (0.0, now))
+            self._scores[symbol] = (self._decayed(score, since, now) + 1, now)
+            if len(self._scores) > self.max_symbols:
+                self._prune(now)
+
+    def _prune(self, now):
+        keep = int(self.max_symbols * self.prune_to)
+        ranked = sorted(self._scores.items(), key=lambda item: self._decayed(*item[1], now))
+        for symbol, _ in ranked[:len(self._scores) - keep]:
+            del self._scores[symbol]
+
+    def top(self, n):
+        """Returns the `n` most popular symbols as (symbol, score), highest first."""
+        now = self.clock()
+        with self._lock:
+            scores = [(symbol, self._decayed(score, since, now))
+                      for symbol, (score, since) in self._scores.items()]
+        scores.sort(key=lambda item: -item[1])
+        return scores[:n]
+
+    def __len__(self):
+        return len(self._scores)
+
+
+class PrecomputeScheduler:
+    """
+    Keeps detail page data warm for the symbols users are most likely to open.
+
+    Every `interval` seconds the scheduler ranks the `top_n` most requested
+    symbols plus every watched symbol (watched ones get `watched_weight`
+    extra score), and for each WarmTask computes priority = score x
+    staleness. Due work runs highest priority first on `max_concurrency`
+    worker threads, as long as the provider-call budget of
+    `calls_per_minute` allows; the rest waits for the next round. While the
+    market is closed, heavy tasks only fill missing data and do not refresh.
+
+    Args:
+        tasks (list): WarmTask entries.
+        watched (callable): Returns the set of watched symbols.
+        is_market_open (callable): Returns True while the market is open.
+    """
+
+    def __init__(self, tasks, watched, is_market_open, top_n=50, watched_weight=5.0,
+                 max_concurrency=4, calls_per_minute=120, interval=30, tracker=None):
+        self.tasks = {task.name: task for task in tasks}
+        self.watched = watched
+        self.is_market_open = is_market_open
+        self.top_n = top_n
+        self.watched_weight = watched_weight
+        self.max_concurrency = max_concurrency
+        self.interval = interval
+        self.tracker = tracker or PopularityTracker()
+        self.budget = TokenBucket(calls_per_minute / 60, capacity=calls_per_minute)
+        self._executor = None
+        self._inflight = set()
+        self._paused = set()  # (symbol, task name) refreshes held back while closed
+        self._lock = threading.Lock()
+        self._thread = None
+        self.rounds = 0
+        self.warmed = 0
+        self.errors = 0
+        self.deferred = 0
+        self.paused = 0
+
+    def record(self, symbol):
+        """Counts one user request for a symbol."""
+        self.tracker.record(symbol)
+
+    def candidates(self):
+        """Returns {symbol: score} for the popular and watched symbols."""
+        scores = dict(self.tracker.top(self.top_n))
+        for symbol in self.watched():
+            scores[symbol] = scores.get(symbol, 0.0) + self.watched_weight
+        return scores
+
+    def plan(self, scores, market_open):
+        """Returns due (priority, symbol, task) work for {symbol: score}, highest priority first."""
+        work = []
+        paused = set()
+        for symbol, score in scores.items():
+            for task in self.tasks.values():
+                if (symbol, task.name) in self._inflight:
+                    continue
+                staleness = task.staleness(symbol)
+                if staleness <= 0:
+                    continue
+                if task.heavy and not market_open and staleness < 1:
+                    paused.add((symbol, task.name))
+                    continue
+                work.append((score * staleness, symbol, task))
+        # Counted once per refresh held back, not again every round it stays held
+        self.paused += len(paused - self._paused)
+        self._paused = paused
+        work.sort(key=lambda item: (-item[0], item[1], item[2].name))
+        return work
+
+    def run_once(self):
+        """Plans one round and dispatches as much work as the budgets allow. Returns jobs started."""
+        self.rounds += 1
+        scores = self.candidates()
+        if not scores:
+            return 0
+        work = self.plan(scores, self.is_market_open())
+        started = 0
+        for priority, symbol, task in work:
+            with self._lock:
+                if len(self._inflight) >= self.max_concurrency:
+                    break
+            if task.cost and not self.budget.try_acquire(task.cost):
+                # Cheaper tasks further down may still fit the budget
+                self.deferred += 1
+                continue
+            with self._lock:
+                self._inflight.add((symbol, task.name))
+            self._submit(symbol, task)
+            started += 1
+        return started
+
+    def _submit(self, symbol, task):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix='precompute')
+        self._executor.submit(self._warm, symbol, task)
+
+    def _warm(self, symbol, task):
+        try:
+            task.warm(symbol)
+            self.warmed += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Error precomputing {task.name} for {symbol}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.discard((symbol, task.name))
+
+    def start(self):
+        """Starts the scheduler thread unless it is running."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name='precompute_thread', daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """Runs a round every `interval` seconds forever."""
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error scheduling precompute: {e}")
+            time.sleep(self.interval)
+
+    def stats(self):
+        """Returns round, warm, deferral and pause counters."""
+        return {
+            'running': self._thread is not None,
+            'tracked_symbols': len(self.tracker),
+            'inflight': len(self._inflight),
+            'budget_available': math.floor(self.budget.available()),
+            'rounds': self.rounds,
+            'warmed': self.warmed,
+            'errors': self.errors,
+            'deferred': self.deferred,
+            'paused': self.paused
+        }
@@ -0,0 +1,132 @@
+import sys
+import time
+import threading
+from collections import Counter
+from .concurrency import ASYNC_MODE
+
+
+def _native_threading():
+    """Returns the unpatched threading and time modules, so sampling runs on an OS thread."""
+    if ASYNC_MODE == 'eventlet':
+        from eventlet.patcher import original
+        return original('threading'), original('time')
+    return threading, time
+
+
+def _collapse(frame, max_depth):
+    """Returns a stack as 'outer;...;inner' of module:function entries."""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        module = frame.f_globals.get('__name__', '?')
+        names.append(f'{module}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Opt-in statistical profiler for the running server.
+
+    While started, a native thread wakes every `interval` seconds and
+    records the stack of every other thread. Reports list the hottest
+    stacks in the collapsed 'frame;frame;frame count' format read by
+    flamegraph tools. Sampling costs nothing while stopped, so it can be
+    switched on and off at runtime.
+
+    In eventlet mode all green threads share one OS thread, so each sample
+    shows whichever green thread was running at that moment.
+    """
+
+    def __init__(self, interval=0.01, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self.started_at = None
+        self.sampled_seconds = 0.0
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, interval=None):
+        """Starts sampling. Returns False if it was already running."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            if interval:
+                self.interval = interval
+            native_threading, native_time = _native_threading()
+            self._stop = native_threading.Event()
+            self._thread = native_threading.Thread(
+                target=self._run, args=(self._stop, native_time), name='sampling_profiler', daemon=True)
+            self.started_at = time.monotonic()
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Stops sampling and keeps the collected stacks. Returns False if it was not running."""
+        with self._lock:
+            if self._thread is None:
+                return False
+            self._stop.set()
+            thread, self._thread = self._thread, None
+            self.sampled_seconds += time.monotonic() - self.started_at
+            self.started_at = None
+        thread.join(timeout=1)
+        return True
+
+    def reset(self):
+        """Drops the collected stacks."""
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+            self.sampled_seconds = 0.0
+            if self.started_at is not None:
+                self.started_at = time.monotonic()
+
+    def sample(self, skip=None):
+        """Records the current stack of every thread except `skip` (a thread ident)."""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            stack = _collapse(frame, self.max_depth)
+            stacks.append(f"{names.get(ident, ident)};{stack}")
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
+
+    def _run(self, stop, native_time):
+        ident = threading.get_ident()
+        while not stop.is_set():
+            try:
+                self.sample(skip=ident)
+            except Exception as e:
+                print(f"Error sampling stacks: {e}")
+            native_time.sleep(self.interval)
+
+    def report(self, limit=None):
+        """Returns the collected stacks, hottest first, in collapsed format."""
+        with self._lock:
+            stacks = self._stacks.most_common(limit)
+        return '\n'.join(f'{stack} {count}' for stack, count in stacks)
+
+    def stats(self):
+        """Returns sampling state and counters."""
+        with self._lock:
+            elapsed = self.sampled_seconds
+            if self.started_at is not None:
+                elapsed += time.monotonic() - self.started_at
+            return {
+                'running': self._thread is not None,
+                'interval': self.interval,
+                'samples': self.samples,
+                'stacks': len(self._stacks),
+                'seconds': elapsed
+            }
@@ -0,0 +1,122 @@
+import time
+import threading
+from collections import Counter
+
+# Priority lanes for TokenBucket.acquire; lower lanes are served first
+INTERACTIVE = 0
+BACKGROUND = 1
+LANES = {INTERACTIVE: 'interactive', BACKGROUND: 'background'}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, holding at most
+    `capacity` tokens. A full bucket allows a burst of `capacity` calls.
+
+    Callers waiting in `acquire` are served by lane: a background caller
+    only gets a token while no interactive caller is waiting, and never
+    takes the last `reserve` tokens, which are kept for interactive bursts.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, reserve=0):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.clock = clock
+        self.reserve = reserve
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._waiting = Counter()  # lane -> callers blocked in acquire
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+
+    def _refill(self):
+        now = self.clock()
+        # Nothing accrues while paused
+        elapsed = max(now - max(self._updated, self._paused_until), 0)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def _can_take(self, tokens, lane):
+        if self.clock() < self._paused_until:
+            return False
+        if any(count for waiting, count in self._waiting.items() if waiting < lane):
+            return False
+        return self._tokens - self._reserve_for(lane) >= tokens
+
+    def _reserve_for(self, lane):
+        return self.reserve if lane != INTERACTIVE else 0
+
+    def try_acquire(self, tokens=1, lane=INTERACTIVE):
+        """Takes `tokens` if available. Returns False without waiting otherwise."""
+        with self._lock:
+            self._refill()
+            if self._can_take(tokens, lane):
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, lane=INTERACTIVE, timeout=None):
+        """
+        Takes `tokens`, waiting behind callers in lower lanes until they are
+        available.
+
+        `lane` may be a callable returning the lane; it is re-read whenever
+        the caller wakes, so a waiting call can be promoted (see `wake`).
+        A promoted call gets a fresh `timeout`.
+
+        Returns:
+            bool: False if they could not be taken within `timeout` seconds.
+        """
+        lane_of = lane if callable(lane) else lambda: lane
+        lane = lane_of()
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._ready:
+            self._waiting[lane] += 1
+            try:
+                while True:
+                    promoted = lane_of()
+                    if promoted != lane:
+                        self._waiting[lane] -= 1
+                        self._waiting[promoted] += 1
+                        lane = promoted
+                        if timeout is not None:
+                            deadline = self.clock() + timeout
+                    self._refill()
+                    if self._can_take(tokens, lane):
+                        self._tokens -= tokens
+                        return True
+                    now = self.clock()
+                    shortfall = tokens + self._reserve_for(lane) - self._tokens
+                    wait = max(self._paused_until - now, shortfall / self.rate, 0.001)
+                    if deadline is not None:
+                        if now >= deadline:
+                            return False
+                        wait = min(wait, deadline - now)
+                    self._ready.wait(wait)
+            finally:
+                self._waiting[lane] -= 1
+                self._ready.notify_all()
+
+    def wake(self):
+        """Wakes waiting callers to re-read their lanes."""
+        with self._ready:
+            self._ready.notify_all()
+
+    def pause(self, seconds):
+        """Empties the bucket and hands out no tokens for `seconds`, e.g. after a 429."""
+        with self._lock:
+            self._refill()
+            self._tokens = 0
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+    def available(self):
+        """Tokens that can be taken right now."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def waiting(self, lane):
+        """Callers of `lane` currently blocked in acquire."""
+        with self._lock:
+            return self._waiting[lane]
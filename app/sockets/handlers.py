@@ -1,20 +1,77 @@
 import os
 import json
+import uuid
 import certifi
 import threading
 import websocket
 from flask import request
-from flask_socketio import emit
+from flask_socketio import emit, join_room, leave_room
+import time
 from datetime import datetime, UTC
 from threading import Lock
-
-# WebSocket URL
-WEBSOCKET_URL = 'wss://stream.data.alpaca.markets/v2/delayed_sip'
+from .. import indicators, metrics
+from ..data.gateway import background
+from ..data.ticks import TickStore
+from .ingest import IngestPipeline, QuoteRecord, TradeRecord, BarRecord
+from .pipeline import QuoteEmitPipeline
+from .state import create_state_store
+from .subscriptions import SubscriptionBatcher
+from .upstream import UpstreamSupervisor
 
 # Track per-client watchlists (sid -> set of tickers)
 watchlists = {}
 MAX_TICKERS = 30
 
+# Reverse index of watchlists (symbol -> set of sids) used for quote fan-out
+symbol_subscribers = {}
+
+# With a shared store one worker, the ingest leader, owns the upstream stream
+INSTANCE_ID = uuid.uuid4().hex
+LEADER_TTL = float(os.getenv('LEADER_TTL', '15'))
+is_leader = False
+
+# Watchlist state lives in these dicts, or in Redis when STATE_STORE_URL is set
+# so that several worker processes share one view of who watches what. Each
+# worker's clients are dropped LEADER_TTL seconds after it stops heartbeating.
+state_store = create_state_store(
+    os.getenv('STATE_STORE_URL'), instance_id=INSTANCE_ID, instance_ttl=LEADER_TTL,
+    watchlists=watchlists, symbol_subscribers=symbol_subscribers)
+
+# Stream, emit and refresh metrics exposed on /metrics
+STREAM_FRAMES = metrics.counter('stream_frames_total', 'Upstream websocket frames received')
+STREAM_BYTES = metrics.counter('stream_bytes_total', 'Upstream websocket payload bytes received')
+STREAM_QUOTES = metrics.counter('stream_quotes_total', 'Stream quotes stored and queued for clients')
+INGEST_BATCH_SECONDS = metrics.histogram(
+    'ingest_batch_seconds', 'Time to store one decoded batch of stream records')
+EMIT_FLUSH_SECONDS = metrics.histogram(
+    'emit_flush_seconds', 'Time to fan one flush of pending quotes out to clients')
+EMIT_QUEUE_SECONDS = metrics.histogram(
+    'emit_queue_seconds', 'Time the oldest quote of a flush waited before being emitted')
+EMITTED_QUOTES = metrics.counter('emitted_quotes_total', 'Quotes flushed to clients')
+REFRESH_SECONDS = metrics.histogram(
+    'quote_refresh_seconds', 'Duration of one periodic REST quote refresh')
+REFRESHED_QUOTES = metrics.counter('quote_refresh_quotes_total', 'Quotes fetched by the periodic refresh')
+REFRESH_ERRORS = metrics.counter('quote_refresh_errors_total', 'Periodic quote refreshes that failed')
+REFRESH_LAST_RUN = metrics.gauge(
+    'quote_refresh_last_run_timestamp_seconds', 'Unix time the periodic quote refresh last ran')
+
+
+def _observe_flush(flush_seconds, queue_seconds, quotes):
+    EMIT_FLUSH_SECONDS.observe(flush_seconds)
+    EMIT_QUEUE_SECONDS.observe(queue_seconds)
+    EMITTED_QUOTES.inc(quotes)
+
+
+def symbol_room(symbol):
+    """Return the Socket.IO room name that receives quotes for a symbol."""
+    return f'quote:{symbol}'
+
+
+# Outbound quotes are conflated per symbol and flushed to the symbol rooms every tick
+QUOTE_FLUSH_INTERVAL = float(os.getenv('QUOTE_FLUSH_INTERVAL', '0.1'))
+quote_pipeline = QuoteEmitPipeline(
+    symbol_room, interval=QUOTE_FLUSH_INTERVAL, on_flush=_observe_flush)
+
 # Track websocket connection and current subscription
 ws_app = None
 current_subscribed = set()
@@ -24,28 +81,138 @@ ws_connected = False
 latest_stock_data = {}
 stock_data_lock = Lock()
 
+# Stream channels subscribed for every watched symbol
+STREAM_CHANNELS = ('quotes', 'trades', 'bars')
 
-def on_message_handler(ws, message, socketio):
-    """Handle incoming WebSocket messages from Alpaca stream."""
+# Recent minute bars and trades per watched symbol
+tick_store = TickStore()
+
+
+def owns_stream():
+    """True if this process runs the upstream stream and quote refresh."""
+    return not state_store.shared or is_leader
+
+
+def subscribed_symbols():
+    """A copy of the symbols this process keeps subscribed upstream."""
+    with subscription_batcher.lock:
+        return set(current_subscribed)
+
+
+def subscribe_sid(sid, ticker):
+    """Add a ticker to a client's watchlist and symbol room. Returns True if nobody watched it before."""
+    join_room(symbol_room(ticker), sid=sid, namespace='/ws/watchlist')
+    return state_store.add_ticker(sid, ticker)
+
+
+def unsubscribe_sid(sid, ticker):
+    """Remove a ticker from a client's watchlist and symbol room. Returns True if nobody watches it anymore."""
+    leave_room(symbol_room(ticker), sid=sid, namespace='/ws/watchlist')
+    return state_store.remove_ticker(sid, ticker)
+
+
+def change_subscriptions(added=(), removed=()):
+    """Track symbols gaining their first or losing their last watcher; upstream frames are batched."""
+    if not owns_stream():
+        return
+    added, removed = set(added), set(removed)
+    with subscription_batcher.lock:
+        current_subscribed.update(added)
+        current_subscribed.difference_update(removed)
+    for ticker in removed:
+        indicators.drop_symbol(ticker)
+        tick_store.drop(ticker)
+    subscription_batcher.mark(added | removed)
+
+
+def sync_subscriptions(fetchers):
+    """Reconcile the upstream subscription with the symbols watched across all workers."""
+    watched = state_store.symbols()
+    subscribed = subscribed_symbols()
+    added = watched - subscribed
+    removed = subscribed - watched
+    change_subscriptions(added=added, removed=removed)
+    for ticker in added:
+        if not indicators.is_tracked(ticker):
+            fetchers.detail_executor.submit(seed_indicators, fetchers, ticker)
+
+
+def seed_indicators(fetchers, symbol):
+    """Seed streaming indicators for a symbol from its daily bar history."""
     try:
-        messages = json.loads(message)
-        for msg in messages:
-            if msg['T'] == 'q':
-                data = {
-                    'symbol': msg['S'],
-                    'bid_price': float(msg.get('bp', 0)),
-                    'ask_price': float(msg.get('ap', 0)),
-                    'timestamp': msg.get('t', ''),
-                    'market_hours': 'open'
-                }
-                with stock_data_lock:
-                    latest_stock_data[data['symbol']] = data
-                for sid, tickers in watchlists.items():
-                    if data['symbol'] in tickers:
-                        socketio.emit(
-                            'quote', {'data': data, 'type': 'quote'}, namespace='/ws/watchlist', to=sid)
+        history = fetchers.fetch_daily_closes(symbol)
     except Exception as e:
-        print(f"Error processing message: {e}")
+        print(f"Error seeding indicators for {symbol}: {e}")
+        return
+    if state_store.is_watched(symbol):
+        indicators.seed_symbol(symbol, history)
+
+
+def commit_daily_closes(fetchers):
+    """Replace provisional daily closes with the official closes from the bar store."""
+    for symbol in indicators.provisional_symbols():
+        try:
+            indicators.push_daily_closes(symbol, fetchers.fetch_daily_closes(symbol))
+        except Exception as e:
+            print(f"Error committing daily closes for {symbol}: {e}")
+
+
+def apply_indicators(symbol, data):
+    """Attach live MA/RSI values to a quote dict for tracked symbols."""
+    values = indicators.update_quote(symbol, data)
+    if values is not None:
+        data['indicators'] = values
+    return data
+
+
+def store_quotes(records):
+    """Store a decoded batch of stream quotes and queue them for clients."""
+    newest = {}
+    for record in records:
+        newest[record.symbol] = record
+
+    updates = {}
+    for symbol, record in newest.items():
+        data = {
+            'symbol': symbol,
+            'bid_price': record.bid_price,
+            'ask_price': record.ask_price,
+            'timestamp': record.timestamp,
+            'market_hours': 'open'
+        }
+        updates[symbol] = apply_indicators(symbol, data)
+
+    with stock_data_lock:
+        latest_stock_data.update(updates)
+    state_store.save_quotes(updates)
+    for symbol, data in updates.items():
+        quote_pipeline.publish(symbol, data)
+    STREAM_QUOTES.inc(len(updates))
+
+
+def store_batch(records):
+    """Route a decoded batch of stream records to the quote and tick stores."""
+    with INGEST_BATCH_SECONDS.time():
+        quotes = [r for r in records if type(r) is QuoteRecord]
+        trades = [r for r in records if type(r) is TradeRecord]
+        bars = [r for r in records if type(r) is BarRecord]
+        if quotes:
+            store_quotes(quotes)
+        if trades:
+            tick_store.add_trades(trades)
+        if bars:
+            tick_store.add_bars(bars)
+
+
+# Raw upstream frames are decoded and stored in batches off the websocket thread
+ingest_pipeline = IngestPipeline(store_batch)
+
+
+def on_message_handler(ws, message, socketio):
+    """Handle incoming WebSocket messages from Alpaca stream."""
+    STREAM_FRAMES.inc()
+    STREAM_BYTES.inc(len(message))
+    ingest_pipeline.enqueue(message)
 
 
 def on_error_handler(ws, error):
@@ -59,63 +226,96 @@ def on_close_handler(ws, close_status_code, close_msg):
     """Handle WebSocket connection close."""
     global ws_connected
     ws_connected = False
+    upstream.closed()
     print("WebSocket closed.")
 
 
-def on_open_handler(ws):
+def on_open_handler(ws, auth_message):
     """Handle WebSocket connection open."""
     print("WebSocket connected.")
     global ws_connected
     ws_connected = True
-    auth_message = {
-        "action": "auth",
-        "key": os.getenv('APCA_API_KEY_ID'),
-        "secret": os.getenv('APCA_API_SECRET_KEY')
-    }
     ws.send(json.dumps(auth_message))
 
     # After auth, re-subscribe to all currently watched tickers
-    update_ws_subscription()
+    subscription_batcher.replay()
+    upstream.opened()
 
-def run_websocket(socketio, fetchers):
-    """Run the WebSocket connection in a thread."""
+
+# Pings detect a dead upstream connection that never sent a close frame
+UPSTREAM_PING_INTERVAL = 20
+UPSTREAM_PING_TIMEOUT = 10
+
+
+def connect_upstream(socketio, provider):
+    """Open one upstream WebSocket connection to the data provider and block until it drops."""
     global ws_app
+    url = provider.stream_url
     ws_app = websocket.WebSocketApp(
-        WEBSOCKET_URL,
+        url,
         on_message=lambda ws, msg: on_message_handler(
             ws, msg, socketio),
         on_error=lambda ws, err: on_error_handler(ws, err),
         on_close=lambda ws, a, b: on_close_handler(ws, a, b),
-        on_open=lambda ws: on_open_handler(ws)
+        on_open=lambda ws: on_open_handler(ws, provider.stream_auth())
     )
-    ws_app.run_forever(sslopt={"ca_certs": certifi.where()})
+    sslopt = {"ca_certs": certifi.where()} if url.startswith('wss:') else None
+    ws_app.run_forever(sslopt=sslopt,
+                       ping_interval=UPSTREAM_PING_INTERVAL, ping_timeout=UPSTREAM_PING_TIMEOUT)
 
 
-def update_ws_subscription():
-    """Update WebSocket subscription for current watchlist."""
-    global ws_app, ws_connected
-    if ws_app and ws_connected:
-        try:
-            # This is a simplified update. For more complex scenarios,
-            # you might want to calculate the diff between old and new subscriptions.
-            if current_subscribed:
-                subscribe_message = {"action": "subscribe",
-                                     "quotes": list(current_subscribed)}
-                ws_app.send(json.dumps(subscribe_message))
-        except Exception as e:
-            print(f"Error updating subscription: {e}")
+def backfill_quotes(fetchers):
+    """Fill the gap left by an upstream outage with one bulk latest-quote fetch."""
+    symbols = subscribed_symbols()
+    if symbols:
+        publish_quotes(fetchers.fetch_latest_quotes(symbols))
 
-def update_ws_subscription_diff(added=None, removed=None):
-    """Update WebSocket subscription with added/removed tickers."""
-    global ws_app, ws_connected
-    if ws_app and ws_connected:
-        try:
-            if added:
-                ws_app.send(json.dumps({"action": "subscribe", "quotes": list(added)}))
-            if removed:
-                ws_app.send(json.dumps({"action": "unsubscribe", "quotes": list(removed)}))
-        except Exception as e:
-            print(f"Error updating subscription diff: {e}")
+
+# Reconnects the upstream stream with jittered exponential backoff
+upstream = UpstreamSupervisor(connect=None)
+
+
+def run_websocket(socketio, fetchers):
+    """Run the supervised WebSocket connection in a thread."""
+    upstream.connect = lambda: connect_upstream(socketio, fetchers.provider)
+    upstream.on_reconnect = lambda: backfill_quotes(fetchers)
+    upstream.run()
+
+
+def subscription_message(action, symbols):
+    """Build a subscribe/unsubscribe frame covering every stream channel."""
+    symbols = list(symbols)
+    message = {"action": action}
+    for channel in STREAM_CHANNELS:
+        message[channel] = symbols
+    return message
+
+
+def send_subscription(action, symbols):
+    """Send one subscribe/unsubscribe frame upstream. Returns False if the stream is down."""
+    if not (ws_app and ws_connected):
+        return False
+    ws_app.send(json.dumps(subscription_message(action, symbols)))
+    return True
+
+
+# Subscription changes are coalesced into at most one subscribe and one
+# unsubscribe frame per window
+SUBSCRIPTION_WINDOW = float(os.getenv('SUBSCRIPTION_WINDOW', '0.25'))
+subscription_batcher = SubscriptionBatcher(
+    lambda action, symbols: send_subscription(action, symbols),
+    lambda: current_subscribed, window=SUBSCRIPTION_WINDOW)
+
+
+def publish_quotes(quotes):
+    """Store REST-fetched quotes and queue them for clients."""
+    for symbol, quote_data in quotes.items():
+        apply_indicators(symbol, quote_data)
+    with stock_data_lock:
+        latest_stock_data.update(quotes)
+    state_store.save_quotes(quotes)
+    for symbol, quote_data in quotes.items():
+        quote_pipeline.publish(symbol, quote_data)
 
 
 def refresh_all_quotes(socketio, fetchers):
@@ -123,17 +323,22 @@ def refresh_all_quotes(socketio, fetchers):
     while True:
         market_status = fetchers.get_market_status()
 
-        if current_subscribed:
-            for symbol in current_subscribed:
-                quote_data = fetchers.fetch_latest_quote(symbol)
-                if quote_data:
-                    with stock_data_lock:
-                        latest_stock_data[symbol] = quote_data
-                    # Use a copy of watchlists to avoid issues with concurrent modifications
-                    for sid, tickers in list(watchlists.items()):
-                        if symbol in tickers and sid in watchlists: # Check if sid still exists
-                            socketio.emit('quote', {'data': quote_data, 'type': 'quote'}, namespace='/ws/watchlist', to=sid)
-        
+        symbols = subscribed_symbols()
+        if symbols and owns_stream():
+            try:
+                # Provider calls of the refresh wait behind page loads
+                with REFRESH_SECONDS.time(), background():
+                    quotes = fetchers.fetch_latest_quotes(
+                        symbols, market_open=market_status['is_open'])
+                    publish_quotes(quotes)
+                REFRESHED_QUOTES.inc(len(quotes))
+            except Exception as e:
+                REFRESH_ERRORS.inc()
+                print(f"Error refreshing quotes: {e}")
+            with background():
+                commit_daily_closes(fetchers)
+        REFRESH_LAST_RUN.set(time.time())
+
         socketio.emit('market_status', market_status, namespace='/ws/watchlist')
 
         # Dynamic sleep time calculation
@@ -144,91 +349,193 @@ def refresh_all_quotes(socketio, fetchers):
         socketio.sleep(sleep_time)
 
 
-def register_socket_handlers(socketio, fetchers):
-    """Registers all SocketIO event handlers."""
+# Background threads whose liveness is exported as stockmaster_thread_alive
+STREAM_THREADS = ('websocket_thread', 'quote_refresh_thread', 'quote_ingest_thread',
+                  'quote_emit_thread', 'subscription_flush_thread', 'ingest_leader_thread')
+
+
+def _thread_health():
+    running = {t.name for t in threading.enumerate() if t.is_alive()}
+    return {(name,): int(name in running) for name in STREAM_THREADS}
+
+
+metrics.gauge('thread_alive', 'Whether a background stream thread is running', ('thread',),
+              func=_thread_health)
+metrics.gauge('connected_clients', 'Socket.IO clients connected to the watchlist namespace',
+              func=lambda: state_store.client_count())
+metrics.gauge('watched_symbols', 'Symbols on at least one watchlist',
+              func=lambda: len(state_store.symbols()))
+metrics.gauge('upstream_subscribed_symbols', 'Symbols subscribed on this worker\'s upstream stream',
+              func=lambda: len(current_subscribed))
+metrics.gauge('ingest_leader', 'Whether this worker owns the upstream stream',
+              func=lambda: int(owns_stream()))
+metrics.gauge('ingest_queue_depth', 'Raw stream frames waiting to be decoded',
+              func=lambda: ingest_pipeline.stats()['depth'])
+metrics.counter('ingest_dropped_frames_total', 'Stream frames dropped because the ingest buffer was full',
+                func=lambda: ingest_pipeline.dropped)
+metrics.counter('ingest_decode_errors_total', 'Stream frames that failed to decode',
+                func=lambda: ingest_pipeline.errors)
+metrics.gauge('emit_queue_depth', 'Symbols with a quote waiting to be emitted',
+              func=lambda: quote_pipeline.stats()['depth'])
+metrics.counter('emit_conflated_total', 'Quotes replaced by a newer quote before being emitted',
+                func=lambda: quote_pipeline.conflated)
+metrics.gauge('upstream_connected', 'Whether the upstream stream is connected',
+              func=lambda: int(upstream.stats()['connected']))
+metrics.counter('upstream_reconnects_total', 'Upstream stream reconnects',
+                func=lambda: upstream.reconnects)
+metrics.counter('subscription_frames_total', 'Subscribe and unsubscribe frames sent upstream',
+                func=lambda: subscription_batcher.frames)
+
+
+def start_stream_threads(socketio, fetchers):
+    """Start the upstream websocket, quote refresh, ingest and emit threads if not running."""
+    if not any(t.name == 'websocket_thread' for t in threading.enumerate()):
+        ws_thread = threading.Thread(
+            target=run_websocket, name='websocket_thread', daemon=True, args=(socketio, fetchers))
+        ws_thread.start()
+
+    if not any(t.name == 'quote_refresh_thread' for t in threading.enumerate()):
+        refresh_thread = threading.Thread(
+            target=refresh_all_quotes, name='quote_refresh_thread', daemon=True, args=(socketio, fetchers))
+        refresh_thread.start()
+
+    if not any(t.name == 'quote_ingest_thread' for t in threading.enumerate()):
+        ingest_thread = threading.Thread(
+            target=ingest_pipeline.run, name='quote_ingest_thread', daemon=True)
+        ingest_thread.start()
+
+    if not any(t.name == 'quote_emit_thread' for t in threading.enumerate()):
+        emit_thread = threading.Thread(
+            target=quote_pipeline.run, name='quote_emit_thread', daemon=True, args=(socketio,))
+        emit_thread.start()
+
+    if not any(t.name == 'subscription_flush_thread' for t in threading.enumerate()):
+        flush_thread = threading.Thread(
+            target=subscription_batcher.run, name='subscription_flush_thread', daemon=True, args=(socketio,))
+        flush_thread.start()
+
+
+def run_ingest_leader(socketio, fetchers):
+    """
+    Compete for the ingest leader lock in the shared state store. The leader
+    runs the stream threads and keeps the upstream subscription in sync with
+    every worker's watchlists; the lock expires if the leader dies, so
+    another worker takes over within LEADER_TTL seconds. Every worker
+    heartbeats here, and the leader drops the clients of workers that
+    stopped.
+    """
+    global is_leader
+    while True:
+        try:
+            state_store.heartbeat()
+            leader = state_store.acquire_leadership(INSTANCE_ID, LEADER_TTL)
+        except Exception as e:
+            print(f"Error acquiring ingest leadership: {e}")
+            leader = False
+
+        if leader:
+            if not is_leader:
+                print(f"Worker {INSTANCE_ID} is now the ingest leader.")
+            is_leader = True
+            start_stream_threads(socketio, fetchers)
+            try:
+                unwatched = state_store.reap_dead_instances()
+                if unwatched:
+                    print(f"Dropped {len(unwatched)} symbols watched only by clients of dead workers.")
+                sync_subscriptions(fetchers)
+            except Exception as e:
+                print(f"Error syncing subscriptions: {e}")
+        elif is_leader:
+            print(f"Worker {INSTANCE_ID} lost ingest leadership.")
+            is_leader = False
+            with subscription_batcher.lock:
+                current_subscribed.clear()
+            subscription_batcher.reset()
+            upstream.stop()
+            if ws_app:
+                ws_app.close()
+        socketio.sleep(LEADER_TTL / 3)
+
+
+def register_socket_handlers(socketio, fetchers, start_background=None):
+    """
+    Registers all SocketIO event handlers. `start_background`, if given, is
+    called with the stream threads on each connect to start other
+    background work.
+    """
     @socketio.on('connect', namespace='/ws/watchlist')
     def handle_connect(auth=None):
         sid = request.sid
-        watchlists[sid] = set()
+        state_store.add_client(sid)
         socketio.emit('watchlist', {'tickers': list(
-            watchlists[sid])}, namespace='/ws/watchlist', to=sid)
+            state_store.tickers(sid))}, namespace='/ws/watchlist', to=sid)
         market_status = fetchers.get_market_status()
         socketio.emit('market_status', market_status,
                       namespace='/ws/watchlist', to=sid)
 
-        if not any(t.name == 'websocket_thread' for t in threading.enumerate()):
-            ws_thread = threading.Thread(
-                target=run_websocket, name='websocket_thread', daemon=True, args=(socketio, fetchers))
-            ws_thread.start()
-
-        if not any(t.name == 'quote_refresh_thread' for t in threading.enumerate()):
-            refresh_thread = threading.Thread(
-                target=refresh_all_quotes, name='quote_refresh_thread', daemon=True, args=(socketio, fetchers))
-            refresh_thread.start()
+        if not state_store.shared:
+            start_stream_threads(socketio, fetchers)
+        elif not any(t.name == 'ingest_leader_thread' for t in threading.enumerate()):
+            leader_thread = threading.Thread(
+                target=run_ingest_leader, name='ingest_leader_thread', daemon=True, args=(socketio, fetchers))
+            leader_thread.start()
+        if start_background is not None:
+            start_background()
 
     @socketio.on('disconnect', namespace='/ws/watchlist')
     def handle_disconnect():
         sid = request.sid
-        if sid in watchlists:
-            global current_subscribed
-            previous_subscribed = current_subscribed.copy()
-            del watchlists[sid]
-            current_subscribed = set.union(
-                *watchlists.values()) if watchlists else set()
-            removed = previous_subscribed - current_subscribed
-            update_ws_subscription_diff(removed=removed)
+        if state_store.has_client(sid):
+            removed = state_store.remove_client(sid)
+            change_subscriptions(removed=removed)
 
     @socketio.on('add_ticker', namespace='/ws/watchlist')
     def handle_add_ticker(data):
         sid = request.sid
         ticker = data.get('ticker', '').upper().strip()
-        if not ticker or len(ticker) > 5 or ticker in watchlists[sid]:
+        if not ticker or len(ticker) > 5 or ticker in state_store.tickers(sid):
             return
 
-        watchlists[sid].add(ticker)
-        global current_subscribed
-        previous_subscribed = current_subscribed.copy()
-        current_subscribed = set.union(
-            *watchlists.values()) if watchlists else set()
-        
-        newly_added = current_subscribed - previous_subscribed
-        update_ws_subscription_diff(added=newly_added)
+        if subscribe_sid(sid, ticker):
+            change_subscriptions(added={ticker})
+        if owns_stream() and not indicators.is_tracked(ticker):
+            fetchers.detail_executor.submit(seed_indicators, fetchers, ticker)
 
         quote_data = fetchers.fetch_latest_quote(ticker)
         if quote_data:
+            apply_indicators(ticker, quote_data)
             with stock_data_lock:
                 latest_stock_data[ticker] = quote_data
             socketio.emit('quote', {
                           'data': quote_data, 'type': 'quote'}, namespace='/ws/watchlist', to=sid)
 
         socketio.emit('watchlist', {'tickers': list(
-            watchlists[sid])}, namespace='/ws/watchlist', to=sid)
+            state_store.tickers(sid))}, namespace='/ws/watchlist', to=sid)
 
     @socketio.on('remove_ticker', namespace='/ws/watchlist')
     def handle_remove_ticker(data):
         sid = request.sid
         ticker = data.get('ticker', '').upper().strip()
-        if sid in watchlists and ticker in watchlists[sid]:
-            watchlists[sid].remove(ticker)
-            
-            global current_subscribed
-            previous_subscribed = current_subscribed.copy()
-            current_subscribed = set.union(
-                *watchlists.values()) if watchlists else set()
-            removed = previous_subscribed - current_subscribed
-            update_ws_subscription_diff(removed=removed)
+        if ticker in state_store.tickers(sid):
+            if unsubscribe_sid(sid, ticker):
+                change_subscriptions(removed={ticker})
             with stock_data_lock:
                 if ticker in latest_stock_data:
                     del latest_stock_data[ticker]
         socketio.emit('watchlist', {'tickers': list(
-            watchlists.get(sid, []))}, namespace='/ws/watchlist', to=sid)
+            state_store.tickers(sid))}, namespace='/ws/watchlist', to=sid)
 
     @socketio.on('request_all_data', namespace='/ws/watchlist')
     def handle_request_all_data():
         sid = request.sid
-        if sid in watchlists:
-            with stock_data_lock:
-                for ticker in watchlists[sid]:
-                    if ticker in latest_stock_data:
-                        socketio.emit('quote', {
-                                      'data': latest_stock_data[ticker], 'type': 'quote'}, namespace='/ws/watchlist', to=sid)
+        if state_store.has_client(sid):
+            tickers = state_store.tickers(sid)
+            if state_store.shared:
+                # Quotes are stored by the ingest leader, which may be another worker
+                quotes = state_store.get_quotes(tickers)
+            else:
+                with stock_data_lock:
+                    quotes = {t: latest_stock_data[t] for t in tickers if t in latest_stock_data}
+            for ticker, quote_data in quotes.items():
+                socketio.emit('quote', {
+                              'data': quote_data, 'type': 'quote'}, namespace='/ws/watchlist', to=sid)
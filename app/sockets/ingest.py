@@ -0,0 +1,163 @@
+import json
+import threading
+from collections import deque
+from typing import NamedTuple
+
+# orjson is optional; it decodes stream frames several times faster
+try:
+    import orjson
+    DECODER = 'orjson'
+    _loads = orjson.loads
+except ImportError:
+    DECODER = 'json'
+    _loads = json.loads
+
+
+class QuoteRecord(NamedTuple):
+    """Compact quote decoded from an Alpaca `q` stream message."""
+    symbol: str
+    bid_price: float
+    ask_price: float
+    timestamp: str
+
+
+class TradeRecord(NamedTuple):
+    """Trade decoded from an Alpaca `t` stream message."""
+    symbol: str
+    price: float
+    size: float
+    timestamp: str
+
+
+class BarRecord(NamedTuple):
+    """Minute bar decoded from an Alpaca `b` stream message."""
+    symbol: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    timestamp: str
+
+
+def _decode_message(msg):
+    """Returns the record for a stream message, or None for other message types."""
+    kind = msg['T']
+    if kind == 'q':
+        return QuoteRecord(
+            msg['S'], float(msg.get('bp', 0)), float(msg.get('ap', 0)), msg.get('t', ''))
+    if kind == 't':
+        return TradeRecord(msg['S'], float(msg['p']), float(msg.get('s', 0)), msg['t'])
+    if kind == 'b':
+        return BarRecord(msg['S'], float(msg['o']), float(msg['h']), float(msg['l']),
+                         float(msg['c']), float(msg.get('v', 0)), msg['t'])
+    return None
+
+
+def decode_frames(frames, loads=None):
+    """
+    Decodes raw stream frames into quote, trade and bar records.
+
+    Args:
+        frames (iterable): Raw JSON frames (str or bytes), each a list of messages.
+        loads (callable, optional): JSON decoder, defaults to the fastest available.
+
+    Returns:
+        tuple: (records, errors) with records in arrival order and the
+        number of frames or messages that could not be decoded.
+    """
+    loads = loads or _loads
+    records = []
+    errors = 0
+    for frame in frames:
+        try:
+            messages = loads(frame)
+        except ValueError:
+            errors += 1
+            continue
+        for msg in messages:
+            try:
+                record = _decode_message(msg)
+            except (KeyError, TypeError, ValueError):
+                errors += 1
+                continue
+            if record is not None:
+                records.append(record)
+    return records, errors
+
+
+class IngestPipeline:
+    """
+    Bounded hand-off between the upstream websocket thread and quote storage.
+
+    The websocket callback only appends raw frames to a ring buffer of
+    `capacity` frames (the oldest frame is dropped when full). A worker
+    drains up to `batch_size` frames at a time, decodes them and passes the
+    resulting records to `handle_batch` in one call.
+    """
+
+    def __init__(self, handle_batch, capacity=10000, batch_size=500, loads=None):
+        self.handle_batch = handle_batch
+        self.loads = loads
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self._frames = deque(maxlen=capacity)
+        self._ready = threading.Event()
+        self.enqueued = 0
+        self.dropped = 0
+        self.decoded = 0
+        self.errors = 0
+        self.batches = 0
+
+    def enqueue(self, frame):
+        """Queues a raw frame; never blocks."""
+        if len(self._frames) == self.capacity:
+            self.dropped += 1
+        self._frames.append(frame)
+        self.enqueued += 1
+        self._ready.set()
+
+    def drain(self):
+        """Decodes and handles every queued frame. Returns records handled."""
+        handled = 0
+        while self._frames:
+            frames = []
+            try:
+                for _ in range(self.batch_size):
+                    frames.append(self._frames.popleft())
+            except IndexError:
+                pass
+            records, errors = decode_frames(frames, loads=self.loads)
+            self.errors += errors
+            self.decoded += len(records)
+            self.batches += 1
+            if records:
+                try:
+                    self.handle_batch(records)
+                except Exception as e:
+                    print(f"Error storing stream records: {e}")
+            handled += len(records)
+        return handled
+
+    def run(self, poll_interval=1.0):
+        """Drains frames forever as they arrive."""
+        while True:
+            self._ready.wait(poll_interval)
+            self._ready.clear()
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"Error processing message: {e}")
+
+    def stats(self):
+        """Returns queue depth and ingest counters."""
+        return {
+            'decoder': DECODER if self.loads is None else getattr(self.loads, '__module__', 'custom'),
+            'depth': len(self._frames),
+            'capacity': self.capacity,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'decoded': self.decoded,
+            'errors': self.errors,
+            'batches': self.batches
+        }
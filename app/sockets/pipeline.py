@@ -0,0 +1,91 @@
+import time
+import threading
+
+
+class QuoteEmitPipeline:
+    """
+    Conflating outbound buffer between quote ingestion and Socket.IO emits.
+
+    `publish()` only stores the newest quote per symbol, replacing any quote
+    that has not been sent yet, so the ingest thread never waits on clients.
+    A worker calls `flush()` every `interval` seconds and emits each pending
+    quote once, as a `quotes` batch, to the room `room_of(symbol)` of the
+    clients watching it, so the cost of a flush grows with the number of
+    changed symbols and not with the number of clients.
+
+    `on_flush(flush_seconds, queue_seconds, quotes)` is called after each
+    non-empty flush; queue_seconds is how long the oldest quote waited.
+    """
+
+    def __init__(self, room_of, interval=0.1, max_pending=10000,
+                 namespace='/ws/watchlist', on_flush=None):
+        self.room_of = room_of
+        self.interval = interval
+        self.max_pending = max_pending
+        self.namespace = namespace
+        self.on_flush = on_flush
+        self._pending = {}
+        self._first_queued = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.conflated = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.emits = 0
+        self.last_flush_seconds = 0.0
+
+    def publish(self, symbol, data):
+        """Queues a quote, replacing an unsent quote for the same symbol."""
+        with self._lock:
+            self.published += 1
+            if symbol in self._pending:
+                self.conflated += 1
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            elif not self._pending:
+                self._first_queued = time.perf_counter()
+            self._pending[symbol] = data
+
+    def flush(self, socketio):
+        """Emits all pending quotes to their symbol rooms. Returns quotes sent."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            first_queued = self._first_queued
+        if not pending:
+            return 0
+
+        started = time.perf_counter()
+        for symbol, data in pending.items():
+            try:
+                socketio.emit('quotes', {'data': [data], 'type': 'quotes'},
+                              namespace=self.namespace, to=self.room_of(symbol))
+                self.emits += 1
+            except Exception as e:
+                print(f"Error emitting quotes for {symbol}: {e}")
+        self.flushed += len(pending)
+        self.last_flush_seconds = time.perf_counter() - started
+        if self.on_flush is not None:
+            self.on_flush(self.last_flush_seconds, started - first_queued, len(pending))
+        return len(pending)
+
+    def run(self, socketio):
+        """Flushes pending quotes forever on a fixed tick."""
+        while True:
+            try:
+                self.flush(socketio)
+            except Exception as e:
+                print(f"Error flushing quotes: {e}")
+            socketio.sleep(self.interval)
+
+    def stats(self):
+        """Returns queue depth and publish/conflate/drop counters."""
+        return {
+            'depth': len(self._pending),
+            'published': self.published,
+            'conflated': self.conflated,
+            'dropped': self.dropped,
+            'flushed': self.flushed,
+            'emits': self.emits,
+            'last_flush_seconds': self.last_flush_seconds
+        }
@@ -0,0 +1,246 @@
+import json
+import threading
+
+
+class InProcessStateStore:
+    """
+    Watchlist and subscription state held in this process.
+
+    `watchlists` maps sid -> set of tickers and `symbol_subscribers` maps
+    symbol -> set of sids; a symbol is watched while its sid set is
+    non-empty. Suitable for a single worker process.
+    """
+
+    shared = False
+
+    def __init__(self, watchlists=None, symbol_subscribers=None):
+        self.watchlists = {} if watchlists is None else watchlists
+        self.symbol_subscribers = {} if symbol_subscribers is None else symbol_subscribers
+        self._lock = threading.RLock()
+
+    def add_client(self, sid):
+        with self._lock:
+            self.watchlists.setdefault(sid, set())
+
+    def has_client(self, sid):
+        return sid in self.watchlists
+
+    def client_count(self):
+        return len(self.watchlists)
+
+    def tickers(self, sid):
+        return set(self.watchlists.get(sid, ()))
+
+    def add_ticker(self, sid, ticker):
+        """Adds a ticker to a watchlist. Returns True if the symbol was not watched before."""
+        with self._lock:
+            self.watchlists.setdefault(sid, set()).add(ticker)
+            subscribers = self.symbol_subscribers.setdefault(ticker, set())
+            first = not subscribers
+            subscribers.add(sid)
+            return first
+
+    def remove_ticker(self, sid, ticker):
+        """Removes a ticker from a watchlist. Returns True if nobody watches it anymore."""
+        with self._lock:
+            self.watchlists.get(sid, set()).discard(ticker)
+            subscribers = self.symbol_subscribers.get(ticker)
+            if subscribers is None:
+                return False
+            subscribers.discard(sid)
+            if subscribers:
+                return False
+            del self.symbol_subscribers[ticker]
+            return True
+
+    def remove_client(self, sid):
+        """Drops a client. Returns the symbols that nobody watches anymore."""
+        with self._lock:
+            unwatched = {ticker for ticker in self.tickers(sid)
+                         if self.remove_ticker(sid, ticker)}
+            self.watchlists.pop(sid, None)
+            return unwatched
+
+    def subscribers(self, symbol):
+        return self.symbol_subscribers.get(symbol, ())
+
+    def is_watched(self, symbol):
+        return symbol in self.symbol_subscribers
+
+    def symbols(self):
+        return set(self.symbol_subscribers)
+
+    def save_quotes(self, quotes):
+        """Quotes stay in the process-local cache for a single worker."""
+
+    def get_quotes(self, symbols):
+        return {}
+
+    def acquire_leadership(self, owner, ttl):
+        """The only process is always the ingest leader."""
+        return True
+
+    def heartbeat(self):
+        """Nothing to keep alive for a single worker."""
+
+    def reap_dead_instances(self):
+        """A single worker never sees clients of other processes."""
+        return set()
+
+
+class RedisStateStore:
+    """
+    Watchlist, subscription and latest-quote state shared through Redis.
+
+    Keys (under `prefix`):
+        clients                 set of connected sids
+        client:<sid>            set of tickers watched by a sid
+        symbol:<symbol>         set of sids watching a symbol
+        symbols                 set of symbols watched by anyone
+        quotes                  hash of symbol -> latest quote JSON
+        leader                  instance id of the ingest leader, with a TTL
+        instances               set of worker instance ids
+        instance:<id>           heartbeat of a worker, expiring after `instance_ttl`
+        instance:<id>:clients   set of sids connected to a worker
+
+    A worker that crashes cannot remove its clients, so the leader calls
+    reap_dead_instances() to drop the sids of workers whose heartbeat
+    expired.
+
+    Works with any Redis-compatible client, e.g. redis.Redis or
+    fakeredis.FakeRedis.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix='stockmaster', instance_id='default', instance_ttl=15):
+        self.client = client
+        self.prefix = prefix
+        self.instance_id = instance_id
+        self.instance_ttl = instance_ttl
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _key(self, *parts):
+        return ':'.join((self.prefix,) + parts)
+
+    def add_client(self, sid):
+        pipe = self.client.pipeline()
+        pipe.sadd(self._key('clients'), sid)
+        pipe.sadd(self._key('instance', self.instance_id, 'clients'), sid)
+        self._heartbeat(pipe)
+        pipe.execute()
+
+    def _heartbeat(self, pipe):
+        pipe.set(self._key('instance', self.instance_id), 1, px=int(self.instance_ttl * 1000))
+        pipe.sadd(self._key('instances'), self.instance_id)
+
+    def heartbeat(self):
+        """Marks this worker alive for another `instance_ttl` seconds."""
+        pipe = self.client.pipeline()
+        self._heartbeat(pipe)
+        pipe.execute()
+
+    def has_client(self, sid):
+        return bool(self.client.sismember(self._key('clients'), sid))
+
+    def client_count(self):
+        return self.client.scard(self._key('clients'))
+
+    def tickers(self, sid):
+        return set(self.client.smembers(self._key('client', sid)))
+
+    def add_ticker(self, sid, ticker):
+        pipe = self.client.pipeline()
+        pipe.sadd(self._key('client', sid), ticker)
+        pipe.sadd(self._key('symbol', ticker), sid)
+        pipe.sadd(self._key('symbols'), ticker)
+        _, _, new_symbol = pipe.execute()
+        return bool(new_symbol)
+
+    def remove_ticker(self, sid, ticker):
+        symbol_key = self._key('symbol', ticker)
+
+        def unwatch(pipe):
+            remaining = set(pipe.smembers(symbol_key)) - {sid}
+            pipe.multi()
+            pipe.srem(self._key('client', sid), ticker)
+            pipe.srem(symbol_key, sid)
+            if not remaining:
+                pipe.srem(self._key('symbols'), ticker)
+                pipe.hdel(self._key('quotes'), ticker)
+            return not remaining
+
+        # WATCH the symbol so a concurrent add on another worker retries us
+        return self.client.transaction(unwatch, symbol_key, value_from_callable=True)
+
+    def remove_client(self, sid, instance_id=None):
+        unwatched = {ticker for ticker in self.tickers(sid) if self.remove_ticker(sid, ticker)}
+        pipe = self.client.pipeline()
+        pipe.delete(self._key('client', sid))
+        pipe.srem(self._key('clients'), sid)
+        pipe.srem(self._key('instance', instance_id or self.instance_id, 'clients'), sid)
+        pipe.execute()
+        return unwatched
+
+    def reap_dead_instances(self):
+        """Drops the clients of workers whose heartbeat expired. Returns the symbols nobody watches anymore."""
+        unwatched = set()
+        for instance_id in self.client.smembers(self._key('instances')):
+            if self.client.exists(self._key('instance', instance_id)):
+                continue
+            clients_key = self._key('instance', instance_id, 'clients')
+            for sid in self.client.smembers(clients_key):
+                unwatched |= self.remove_client(sid, instance_id)
+            pipe = self.client.pipeline()
+            pipe.delete(clients_key)
+            pipe.srem(self._key('instances'), instance_id)
+            pipe.execute()
+        # A symbol removed here may have been added again by a live worker meanwhile
+        return {symbol for symbol in unwatched if not self.is_watched(symbol)}
+
+    def subscribers(self, symbol):
+        return self.client.smembers(self._key('symbol', symbol))
+
+    def is_watched(self, symbol):
+        return bool(self.client.sismember(self._key('symbols'), symbol))
+
+    def symbols(self):
+        return set(self.client.smembers(self._key('symbols')))
+
+    def save_quotes(self, quotes):
+        if quotes:
+            self.client.hset(self._key('quotes'), mapping={
+                symbol: json.dumps(data) for symbol, data in quotes.items()})
+
+    def get_quotes(self, symbols):
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        values = self.client.hmget(self._key('quotes'), symbols)
+        return {symbol: json.loads(value) for symbol, value in zip(symbols, values) if value}
+
+    def acquire_leadership(self, owner, ttl):
+        """Takes or renews the ingest leader lock. Returns True if `owner` holds it."""
+        key = self._key('leader')
+        if self.client.set(key, owner, nx=True, px=int(ttl * 1000)):
+            return True
+
+        def renew(pipe):
+            if pipe.get(key) != owner:
+                return False
+            pipe.multi()
+            pipe.pexpire(key, int(ttl * 1000))
+            return True
+
+        return self.client.transaction(renew, key, value_from_callable=True)
+
+
+def create_state_store(url=None, instance_id='default', instance_ttl=15, **kwargs):
+    """Returns a Redis-backed store for a redis:// URL, else an in-process store."""
+    if url:
+        return RedisStateStore.from_url(url, instance_id=instance_id, instance_ttl=instance_ttl)
+    return InProcessStateStore(**kwargs)
@@ -0,0 +1,113 @@
+import threading
+
+
+class SubscriptionBatcher:
+    """
+    Debounced upstream subscribe/unsubscribe frames.
+
+    Handlers only `mark()` symbols whose watched state changed, which is
+    O(1) per change. Every `window` seconds `flush()` compares each marked
+    symbol with what the upstream stream was last told and sends at most one
+    subscribe and one unsubscribe frame, so a symbol added and removed within
+    a window costs nothing and a mass disconnect becomes one unsubscribe.
+
+    `send(action, symbols)` sends one frame and returns False if the stream
+    is not connected; `watched()` returns the set of symbols that should be
+    subscribed. Change that set only while holding `lock`; the batcher
+    reads a copy of it under the same lock.
+    """
+
+    def __init__(self, send, watched, window=0.25, max_symbols_per_frame=1000):
+        self.send = send
+        self.watched = watched
+        self.window = window
+        self.max_symbols_per_frame = max_symbols_per_frame
+        self._dirty = set()
+        self._sent = set()
+        self.lock = threading.Lock()
+        self.marked = 0
+        self.frames = 0
+        self.subscribed = 0
+        self.unsubscribed = 0
+        self.replays = 0
+
+    def mark(self, symbols):
+        """Queues symbols whose watched state changed."""
+        with self.lock:
+            self._dirty.update(symbols)
+            self.marked += len(symbols)
+
+    def _send_chunks(self, action, symbols):
+        symbols = sorted(symbols)
+        for i in range(0, len(symbols), self.max_symbols_per_frame):
+            if not self.send(action, symbols[i:i + self.max_symbols_per_frame]):
+                return False
+            self.frames += 1
+        return True
+
+    def flush(self):
+        """Sends the coalesced changes. Returns (subscribed, unsubscribed) symbols."""
+        with self.lock:
+            dirty, self._dirty = self._dirty, set()
+            if not dirty:
+                return set(), set()
+            watched = set(self.watched())
+            added = {s for s in dirty if s in watched and s not in self._sent}
+            removed = {s for s in dirty if s not in watched and s in self._sent}
+            try:
+                sent = ((not added or self._send_chunks('subscribe', added)) and
+                        (not removed or self._send_chunks('unsubscribe', removed)))
+            except Exception as e:
+                print(f"Error updating subscription: {e}")
+                sent = False
+            if not sent:
+                # Stream is down; retried next window or covered by replay()
+                self._dirty |= dirty
+                return set(), set()
+            self._sent |= added
+            self._sent -= removed
+            self.subscribed += len(added)
+            self.unsubscribed += len(removed)
+            return added, removed
+
+    def replay(self):
+        """Subscribes every watched symbol on a fresh connection, in as few frames as possible."""
+        with self.lock:
+            symbols = set(self.watched())
+            self._dirty.clear()
+            self._sent = set()
+            self.replays += 1
+            try:
+                if symbols and not self._send_chunks('subscribe', symbols):
+                    return
+            except Exception as e:
+                print(f"Error replaying subscription: {e}")
+                return
+            self._sent = symbols
+
+    def reset(self):
+        """Forgets pending changes and what upstream was told."""
+        with self.lock:
+            self._dirty.clear()
+            self._sent = set()
+
+    def run(self, socketio):
+        """Flushes pending changes forever, once per window."""
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing subscriptions: {e}")
+            socketio.sleep(self.window)
+
+    def stats(self):
+        """Returns pending and sent symbol counts and frame counters."""
+        return {
+            'pending': len(self._dirty),
+            'subscribed_upstream': len(self._sent),
+            'marked': self.marked,
+            'frames': self.frames,
+            'subscribed': self.subscribed,
+            'unsubscribed': self.unsubscribed,
+            'replays': self.replays
+        }
@@ -0,0 +1,122 @@
+import time
+import random
+import threading
+
+
+class UpstreamSupervisor:
+    """
+    Keeps the upstream market data websocket connected.
+
+    `connect()` opens one connection and blocks until it drops. The
+    supervisor then reconnects with jittered exponential backoff: after the
+    n-th consecutive failure it waits a random time between half and all of
+    min(max_delay, base_delay * 2 ** n). The failure count resets once a
+    connection has stayed up for `stable_after` seconds. Liveness is checked
+    by the connection itself with websocket pings.
+
+    When a connection opens after an earlier one dropped, `on_reconnect()`
+    runs on its own thread to backfill whatever was missed during the gap.
+    """
+
+    def __init__(self, connect, on_reconnect=None, base_delay=1.0, max_delay=60.0,
+                 stable_after=30.0, rng=random.random):
+        self.connect = connect
+        self.on_reconnect = on_reconnect
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.rng = rng
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.connected_at = None
+        self.failures = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.total_uptime = 0.0
+        self.last_delay = 0.0
+        self.backfills = 0
+        self.backfill_errors = 0
+        self.last_backfill_seconds = None
+        self.max_backfill_seconds = 0.0
+
+    def next_delay(self):
+        """Returns the jittered backoff before the next connection attempt."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** self.failures)
+        return ceiling * (0.5 + self.rng() / 2)
+
+    def opened(self):
+        """Records an open connection; backfills if it replaces a dropped one."""
+        with self._lock:
+            self.connected_at = time.monotonic()
+            self.connects += 1
+            reconnect = self.connects > 1
+            if reconnect:
+                self.reconnects += 1
+        if reconnect and self.on_reconnect is not None:
+            threading.Thread(target=self._backfill, name='upstream_backfill_thread',
+                             daemon=True).start()
+
+    def closed(self):
+        """Records a dropped connection; safe to call more than once per drop."""
+        with self._lock:
+            if self.connected_at is None:
+                return
+            uptime = time.monotonic() - self.connected_at
+            self.total_uptime += uptime
+            self.connected_at = None
+            self.failures = 0 if uptime >= self.stable_after else self.failures + 1
+
+    def _backfill(self):
+        started = time.perf_counter()
+        try:
+            self.on_reconnect()
+        except Exception as e:
+            self.backfill_errors += 1
+            print(f"Error backfilling after reconnect: {e}")
+            return
+        elapsed = time.perf_counter() - started
+        self.backfills += 1
+        self.last_backfill_seconds = elapsed
+        self.max_backfill_seconds = max(self.max_backfill_seconds, elapsed)
+
+    def run(self):
+        """Connects and reconnects until stop() is called."""
+        self._stop.clear()
+        while not self._stop.is_set():
+            connects = self.connects
+            try:
+                self.connect()
+            except Exception as e:
+                print(f"Upstream connection failed: {e}")
+            self.closed()
+            if self.connects == connects:
+                # Never opened, e.g. DNS or TLS failure
+                self.failures += 1
+            if self._stop.is_set():
+                break
+            self.last_delay = self.next_delay()
+            print(f"Reconnecting upstream in {self.last_delay:.1f}s.")
+            self._stop.wait(self.last_delay)
+
+    def stop(self):
+        """Stops reconnecting; the caller closes the current connection."""
+        self._stop.set()
+
+    def stats(self):
+        """Returns connection uptime, reconnect and backfill metrics."""
+        with self._lock:
+            connected_at = self.connected_at
+            uptime = time.monotonic() - connected_at if connected_at is not None else 0.0
+            return {
+                'connected': connected_at is not None,
+                'uptime_seconds': uptime,
+                'total_uptime_seconds': self.total_uptime + uptime,
+                'connects': self.connects,
+                'reconnects': self.reconnects,
+                'consecutive_failures': self.failures,
+                'last_delay_seconds': self.last_delay,
+                'backfills': self.backfills,
+                'backfill_errors': self.backfill_errors,
+                'last_backfill_seconds': self.last_backfill_seconds,
+                'max_backfill_seconds': self.max_backfill_seconds
+            }
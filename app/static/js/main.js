@@ -47,19 +47,20 @@ if (msg.type === 'test') {
 return;
         }
 
-const data = msg.data;
-if (!data.symbol || (data.bid_price === 0 && data.ask_price === 0)) {
-    console.warn('Invalid quote data:', data);
-return;
+if (applyQuote(msg.data, receivedTime)) {
+    updateAlpacaTable();
         }
+    });
 
-stockData[data.symbol] = {
-    ...data,
-    receivedTime: receivedTime
-        };
-
-updateStockCard(data.symbol);
-updateAlpacaTable();
+    socket.on('quotes', (msg) => {
+        const receivedTime = new Date();
+let updated = false;
+(msg.data || []).forEach((data) => {
+    updated = applyQuote(data, receivedTime) || updated;
+        });
+if (updated) {
+    updateAlpacaTable();
+        }
     });
     
     socket.on('trade', (msg) => {
@@ -85,6 +86,21 @@ updateMarketStatus(status);
 showError(error.message || 'An error occurred');
     });
 
+function applyQuote(data, receivedTime) {
+        if (!data.symbol || (data.bid_price === 0 && data.ask_price === 0)) {
+    console.warn('Invalid quote data:', data);
+return false;
+        }
+
+stockData[data.symbol] = {
+    ...data,
+    receivedTime: receivedTime
+        };
+
+updateStockCard(data.symbol);
+return true;
+    }
+
 // UI Functions
 function updateConnectionStatus(connected) {
         const status = document.getElementById('connection-status');
@@ -170,6 +186,7 @@ return;
             <div class="price-value ask-price" id="ask-${ticker}">—</div>
         </div>
     </div>
+    <div class="update-time" id="indicators-${ticker}"></div>
     <div class="update-time" id="time-${ticker}">Waiting for data...</div>
 </div>
 `).join('');
@@ -192,6 +209,7 @@ const timeEl = document.getElementById(`time-${ticker}`);
 
 if (bidEl) bidEl.textContent = `$${data.bid_price.toFixed(2)}`;
 if (askEl) askEl.textContent = `$${data.ask_price.toFixed(2)}`;
+updateIndicators(ticker, data.indicators);
 if (timeEl) {
             const time = data.receivedTime || new Date();
 let timeText = `Updated: ${time.toLocaleTimeString()}`;
@@ -211,6 +229,14 @@ if (card) {
         }
     }
 
+function updateIndicators(ticker, indicators) {
+        const indicatorsEl = document.getElementById(`indicators-${ticker}`);
+if (!indicatorsEl || !indicators) return;
+
+const format = (value) => (value === null || value === undefined) ? 'N/A' : value.toFixed(2);
+indicatorsEl.textContent = `MA50: ${format(indicators.ma_50)} | MA200: ${format(indicators.ma_200)} | RSI: ${format(indicators.rsi)}`;
+    }
+
 function updateAlpacaTable() {
         const tbody = document.getElementById('alpaca-tbody');
 const table = document.getElementById('alpaca-table');
@@ -0,0 +1,189 @@
+"""
+Connection capacity and emit latency load test for the Socket.IO server.
+
+Starts the app once per async mode with stubbed market data, connects
+many websocket clients that all watch one synthetic symbol, and reports
+how many stayed connected and the p50/p99 delay between the server
+publishing a quote and clients receiving it.
+
+    python benchmarks/load_test.py --clients 2000 --duration 20
+    python benchmarks/load_test.py --modes eventlet --clients 20000 --output load.json
+
+Raise the open file limit (ulimit -n) for large client counts.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NAMESPACE = '/ws/watchlist'
+SYMBOL = 'SIM'
+
+
+def serve(mode, port, publish_interval):
+    """Runs the app in `mode` with stubbed fetchers and a synthetic quote publisher."""
+    os.environ['SOCKETIO_ASYNC_MODE'] = mode
+    os.environ.setdefault('APCA_API_KEY_ID', 'load-test')
+    os.environ.setdefault('APCA_API_SECRET_KEY', 'load-test')
+    sys.path.insert(0, ROOT)
+    from app.concurrency import monkey_patch
+    monkey_patch()
+
+    import logging
+    from app.app import app, socketio
+    from app.data import fetchers
+    from app.sockets import handlers
+    logging.getLogger('engineio.server').setLevel(logging.WARNING)
+    logging.getLogger('socketio.server').setLevel(logging.WARNING)
+
+    status = {'is_open': True, 'next_open': None, 'next_close': None}
+    fetchers.get_market_status = lambda: status
+    fetchers.fetch_latest_quote = lambda symbol: None
+    fetchers.fetch_daily_closes = lambda symbol: []
+
+    def publish_quotes():
+        price = 100.0
+        while True:
+            price += 0.01
+            handlers.quote_pipeline.publish(SYMBOL, {
+                'symbol': SYMBOL, 'bid_price': price, 'ask_price': price + 0.01,
+                'sent_at': time.time(), 'market_hours': 'open'})
+            socketio.sleep(publish_interval)
+
+    started = []
+
+    def start_stream_threads(socketio, fetchers):
+        # Only the emit path; the upstream stream and REST refresh are replaced
+        if not started:
+            started.append(True)
+            socketio.start_background_task(handlers.quote_pipeline.run, socketio)
+            socketio.start_background_task(publish_quotes)
+
+    handlers.start_stream_threads = start_stream_threads
+    socketio.run(app, host='127.0.0.1', port=port, debug=False, log_output=False,
+                 allow_unsafe_werkzeug=True)
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+async def run_clients(port, clients, duration, connect_concurrency):
+    """Connects `clients` websocket clients and collects quote latencies."""
+    import socketio
+
+    url = f'http://127.0.0.1:{port}'
+    latencies = []
+    connected = []
+    failures = 0
+    limit = asyncio.Semaphore(connect_concurrency)
+
+    async def connect_one():
+        nonlocal failures
+        client = socketio.AsyncClient(reconnection=False)
+
+        @client.on('quotes', namespace=NAMESPACE)
+        async def on_quotes(message):
+            now = time.time()
+            for quote in message['data']:
+                if 'sent_at' in quote:
+                    latencies.append(now - quote['sent_at'])
+
+        async with limit:
+            try:
+                await client.connect(url, namespaces=[NAMESPACE], transports=['websocket'])
+                await client.emit('add_ticker', {'ticker': SYMBOL}, namespace=NAMESPACE)
+                connected.append(client)
+            except Exception:
+                failures += 1
+
+    connect_started = time.perf_counter()
+    await asyncio.gather(*(connect_one() for _ in range(clients)))
+    connect_seconds = time.perf_counter() - connect_started
+
+    latencies.clear()
+    await asyncio.sleep(duration)
+    still_connected = sum(1 for c in connected if c.connected)
+    samples = list(latencies)
+    await asyncio.gather(*(c.disconnect() for c in connected), return_exceptions=True)
+
+    return {
+        'clients': clients,
+        'connected': still_connected,
+        'connect_failures': failures,
+        'connect_seconds': round(connect_seconds, 3),
+        'quotes_received': len(samples),
+        'p50_ms': None if not samples else round(percentile(samples, 50) * 1000, 2),
+        'p99_ms': None if not samples else round(percentile(samples, 99) * 1000, 2),
+    }
+
+
+def measure(mode, args):
+    """Starts a server in `mode`, runs the clients against it and stops it."""
+    server = subprocess.Popen([
+        sys.executable, os.path.abspath(__file__), '--serve', mode,
+        '--port', str(args.port), '--publish-interval', str(args.publish_interval)],
+        cwd=ROOT, stdout=subprocess.DEVNULL)
+    try:
+        if not wait_for_port(args.port):
+            return {'mode': mode, 'error': 'server did not start'}
+        result = asyncio.run(run_clients(
+            args.port, args.clients, args.duration, args.connect_concurrency))
+        result['mode'] = mode
+        return result
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', nargs='+', default=['threading', 'eventlet'])
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds to collect quotes once all clients are connected')
+    parser.add_argument('--connect-concurrency', type=int, default=200)
+    parser.add_argument('--publish-interval', type=float, default=0.1)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--serve', metavar='MODE', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.publish_interval)
+        return
+
+    results = [measure(mode, args) for mode in args.modes]
+    for r in results:
+        if 'error' in r:
+            print(f"{r['mode']:>10}: {r['error']}")
+            continue
+        print(f"{r['mode']:>10}: {r['connected']}/{r['clients']} connected "
+              f"({r['connect_failures']} failed, {r['connect_seconds']}s), "
+              f"{r['quotes_received']} quotes, p50 {r['p50_ms']} ms, p99 {r['p99_ms']} ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
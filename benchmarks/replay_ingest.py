@@ -0,0 +1,88 @@
+"""
+Replay benchmark for the upstream quote ingest path.
+
+Feeds recorded (or synthetic) Alpaca stream frames through the ingest
+pipeline, quote store and emit pipeline, and reports messages per second.
+
+    python benchmarks/replay_ingest.py --frames recorded_frames.jsonl
+    python benchmarks/replay_ingest.py --symbols 500 --frames-count 20000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+# Allow running from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.sockets import handlers  # noqa: E402
+from app.sockets.ingest import IngestPipeline  # noqa: E402
+
+
+def load_frames(path):
+    """Loads raw frames from a file with one JSON frame per line."""
+    with open(path) as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+
+def synthetic_frames(symbols, frames_count, messages_per_frame, seed=0):
+    """Generates quote frames shaped like the Alpaca v2 stream."""
+    rng = random.Random(seed)
+    tickers = [f'SYM{i}' for i in range(symbols)]
+    frames = []
+    for _ in range(frames_count):
+        messages = []
+        for _ in range(messages_per_frame):
+            price = round(rng.uniform(10, 500), 2)
+            messages.append({'T': 'q', 'S': rng.choice(tickers), 'bx': 'V', 'bp': price,
+                             'bs': rng.randint(1, 10), 'ax': 'V', 'ap': round(price + 0.01, 2),
+                             'as': rng.randint(1, 10), 'c': ['R'], 'z': 'C',
+                             't': '2025-01-02T15:00:00.123456789Z'})
+        frames.append(json.dumps(messages))
+    return frames
+
+
+def replay(frames, loads=None):
+    """Runs frames through decode and store; returns (stats, seconds)."""
+    pipeline = IngestPipeline(handlers.store_batch, capacity=len(frames) + 1, loads=loads)
+    started = time.perf_counter()
+    for frame in frames:
+        pipeline.enqueue(frame)
+    pipeline.drain()
+    return pipeline.stats(), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', help='File with one recorded JSON frame per line')
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--frames-count', type=int, default=20000)
+    parser.add_argument('--messages-per-frame', type=int, default=10)
+    parser.add_argument('--clients', type=int, default=1000,
+                        help='Simulated clients subscribed to random symbols')
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames) if args.frames else synthetic_frames(
+        args.symbols, args.frames_count, args.messages_per_frame)
+    messages = sum(len(json.loads(frame)) for frame in frames)
+
+    rng = random.Random(1)
+    symbols = [f'SYM{i}' for i in range(args.symbols)]
+    for client in range(args.clients):
+        sid = f'client{client}'
+        handlers.watchlists[sid] = set()
+        for ticker in rng.sample(symbols, min(10, len(symbols))):
+            handlers.state_store.add_ticker(sid, ticker)
+
+    for loads in (None, json.loads):
+        handlers.latest_stock_data.clear()
+        stats, elapsed = replay(frames, loads=loads)
+        print(f"{stats['decoder']:>8} decoder: {messages} messages in {elapsed:.3f}s "
+              f"= {messages / elapsed:,.0f} msg/s ({stats['decoded']} quotes)")
+    print(f"emit pipeline: {handlers.quote_pipeline.stats()}")
+
+
+if __name__ == '__main__':
+    main()
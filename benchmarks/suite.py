@@ -0,0 +1,276 @@
+"""
+Benchmark suite for the ingest, fan-out and HTTP hot paths.
+
+Runs every case against synthetic data from the market simulator (no
+network or credentials), writes the results as JSON and compares them
+with a stored baseline. Exits with status 1 when a case's median is more
+than --tolerance slower than its baseline.
+
+    python benchmarks/suite.py                              # run and compare with baseline.json
+    python benchmarks/suite.py --only ingest_fanout charts
+    python benchmarks/suite.py --save-baseline              # record a new baseline
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timedelta, UTC
+from unittest.mock import patch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DATA_PROVIDER', 'simulator')
+os.environ.setdefault('BAR_STORE_PATH', os.path.join(tempfile.mkdtemp(), 'bars.sqlite3'))
+
+import numpy as np  # noqa: E402
+from app.app import app  # noqa: E402
+from app import analysis, charts, indicators  # noqa: E402
+from app.data import fetchers  # noqa: E402
+from app.data.catalog import AssetCatalog  # noqa: E402
+from app.data.simulator import MarketSimulator, SimulatorProvider  # noqa: E402
+from app.sockets import handlers  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def measure(func, repeat, warmup=1):
+    """Runs `func` warmup + repeat times; returns timing stats in milliseconds."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'repeat': repeat,
+        'median_ms': round(statistics.median(samples), 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 4),
+        'min_ms': round(samples[0], 4),
+    }
+
+
+class CountingSocketIO:
+    """Stands in for SocketIO and counts emits instead of sending them."""
+
+    def __init__(self):
+        self.emits = 0
+        self.recipients = 0
+
+    def emit(self, event, data, namespace=None, to=None):
+        self.emits += 1
+        self.recipients += len(to) if isinstance(to, list) else 1
+
+
+def bench_ingest_fanout(clients=1000, symbols=500, watch=10, frames=200, per_frame=50):
+    """on_message_handler -> ingest -> store -> batched emit, N clients x M symbols."""
+    rng = random.Random(0)
+    simulator = MarketSimulator(seed=0)
+    universe = [f'S{i:04d}' for i in range(symbols)]
+    handlers.watchlists.clear()
+    handlers.symbol_subscribers.clear()
+    for client in range(clients):
+        sid = f'client{client}'
+        handlers.state_store.add_client(sid)
+        for ticker in rng.sample(universe, watch):
+            handlers.state_store.add_ticker(sid, ticker)
+    payloads = [json.dumps(simulator.messages(universe, per_frame)) for _ in range(frames)]
+    socketio = CountingSocketIO()
+
+    def run():
+        for payload in payloads:
+            handlers.on_message_handler(None, payload, socketio)
+        handlers.ingest_pipeline.drain()
+        handlers.quote_pipeline.flush(socketio)
+
+    result = measure(run, repeat=10)
+    result['messages_per_s'] = round(frames * per_frame / (result['median_ms'] / 1000))
+    result['params'] = {'clients': clients, 'symbols': symbols, 'watch': watch,
+                        'messages': frames * per_frame}
+    handlers.watchlists.clear()
+    handlers.symbol_subscribers.clear()
+    return result
+
+
+def bench_api_assets(assets=12000):
+    """GET /api/assets for typical search and sort patterns."""
+    catalog = AssetCatalog.from_assets(SimulatorProvider(symbols=assets).get_all_assets())
+    client = app.test_client()
+    queries = [
+        'draw=1&start=0&length=25',
+        'draw=1&start=0&length=25&search[value]=aab',
+        'draw=1&start=0&length=100&search[value]=simulated&order[0][column]=1&order[0][dir]=desc',
+        'draw=1&start=5000&length=25&order[0][column]=2&order[0][dir]=asc',
+    ]
+
+    def run():
+        for query in queries:
+            assert client.get(f'/api/assets?{query}').status_code == 200
+
+    with patch.object(fetchers, 'get_asset_catalog', return_value=catalog):
+        result = measure(run, repeat=50)
+    result['params'] = {'assets': assets, 'requests_per_run': len(queries)}
+    return result
+
+
+def bench_stock_details():
+    """GET /stock/<symbol> with fetchers returning prepared detail data."""
+    provider = SimulatorProvider(symbols=10)
+    bars = provider.get_bars(['AAAA'], '1Day', datetime.now(UTC) - timedelta(days=365))
+    bars = bars.rename(columns={'close': 'c'})
+    info = provider.get_fundamental('AAAA', 'info')
+    details = {
+        'symbol': 'AAAA', 'exchange': 'NASDAQ', 'name': info['longName'],
+        'description': info['longBusinessSummary'], 'sector': info['sector'],
+        'industry': info['industry'], 'website': info['website'],
+        'market_cap': info['marketCap'], 'pe_ratio': info['trailingPE'], 'eps': info['trailingEps'],
+        'earnings_growth': info['earningsGrowth'], 'fifty_two_week_high': info['fiftyTwoWeekHigh'],
+        'fifty_two_week_low': info['fiftyTwoWeekLow'], 'current_price': float(bars['c'].iloc[-1]),
+        'bid_price': 0, 'ask_price': 0, 'income_statement': {}, 'balance_sheet': {},
+        'cash_flow': {}, 'news': [], 'unavailable_sections': [],
+    }
+    client = app.test_client()
+    renders = []
+    prerender_chart = charts.prerender_chart
+
+    def record_render(*args, **kwargs):
+        future = prerender_chart(*args, **kwargs)
+        renders.append(future)
+        return future
+
+    with patch.object(fetchers, 'get_stock_details',
+                      lambda symbol: dict(details, history_df=bars.copy())):
+        # Render the charts up front so their background renders do not
+        # compete with the measured requests
+        with patch.object(charts, 'prerender_chart', record_render):
+            client.get('/stock/AAAA')
+        for future in renders:
+            if future is not None:
+                future.result()
+        result = measure(lambda: client.get('/stock/AAAA'), repeat=30)
+    result['params'] = {'bars': len(bars)}
+    return result
+
+
+def bench_indicators(symbols=500, days=260):
+    """Batch MA50/MA200/RSI over a symbols x days close matrix, and streaming updates."""
+    rng = np.random.default_rng(0)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (symbols, days)), axis=1))
+    batch = measure(lambda: analysis.calculate_batch_indicators(closes), repeat=20)
+
+    history = [(None, float(c)) for c in closes[0]]
+    indicators.seed_symbol('BENCH', history)
+    quote = {'bid_price': 100.0, 'ask_price': 100.1, 'timestamp': None}
+
+    def stream():
+        for _ in range(10000):
+            indicators.update_quote('BENCH', quote)
+
+    streaming = measure(stream, repeat=10)
+    indicators.drop_symbol('BENCH')
+    batch['params'] = {'symbols': symbols, 'days': days}
+    batch['streaming_updates_per_s'] = round(10000 / (streaming['median_ms'] / 1000))
+    return batch
+
+
+def bench_charts():
+    """Uncached PNG render of one year of daily bars."""
+    bars = SimulatorProvider(symbols=1).get_bars(
+        ['AAAA'], '1Day', datetime.now(UTC) - timedelta(days=365)).rename(columns={'close': 'c'})
+    result = measure(lambda: charts.render_chart_png(bars, title='AAAA', intrinsic_value=100.0),
+                     repeat=10)
+    result['params'] = {'bars': len(bars)}
+    return result
+
+
+CASES = {
+    'ingest_fanout': bench_ingest_fanout,
+    'api_assets': bench_api_assets,
+    'stock_details': bench_stock_details,
+    'indicators': bench_indicators,
+    'charts': bench_charts,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Returns (name, current, baseline, ratio) for cases slower than tolerance allows."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        ratio = result['median_ms'] / base['median_ms']
+        print(f"{name:>15}: {result['median_ms']:10.3f} ms  baseline {base['median_ms']:10.3f} ms  "
+              f"x{ratio:.2f}")
+        if ratio > 1 + tolerance:
+            regressions.append((name, result['median_ms'], base['median_ms'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES), help='Cases to run')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='Allowed slowdown of the median before failing (0.3 = 30%%)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Write the results to the baseline file instead of comparing')
+    args = parser.parse_args()
+
+    app.config['TESTING'] = True
+    app.config['LOGIN_DISABLED'] = True
+
+    results = {}
+    for name in args.only or CASES:
+        print(f"running {name}...", flush=True)
+        results[name] = CASES[name]()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(UTC).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"saved baseline {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for name, current, base, ratio in regressions:
+        print(f"REGRESSION {name}: {current:.3f} ms vs {base:.3f} ms (x{ratio:.2f})")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
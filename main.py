@@ -1,3 +1,7 @@
+# The async mode has to be set up before anything else imports the stdlib
+from app.concurrency import monkey_patch
+monkey_patch()
+
 from app.app import app, socketio
 
 if __name__ == '__main__':
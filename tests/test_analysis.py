@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import analysis
+
+
+def reference_wilder_rsi(closes, period=14):
+    deltas = np.diff(closes)
+    gains = np.clip(deltas, 0, None)
+    losses = np.clip(-deltas, 0, None)
+    avg_gain = gains[:period].mean()
+    avg_loss = losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return 100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def test_batch_indicators_match_reference():
+    """Test the vectorized engine against rolling means and a loop RSI."""
+    rng = np.random.default_rng(0)
+    closes = 100 + np.cumsum(rng.normal(size=(3, 250)), axis=1)
+    closes[2, :100] = np.nan  # late listing: only 150 days of history
+
+    result = analysis.calculate_batch_indicators(
+        pd.DataFrame(closes, index=['A', 'B', 'C']))
+
+    for i, symbol in enumerate(['A', 'B']):
+        assert np.isclose(result.loc[symbol, 'ma_50'], closes[i, -50:].mean())
+        assert np.isclose(result.loc[symbol, 'ma_200'], closes[i, -200:].mean())
+        assert np.isclose(result.loc[symbol, 'rsi'], reference_wilder_rsi(closes[i]))
+    assert np.isclose(result.loc['C', 'ma_50'], closes[2, -50:].mean())
+    assert np.isnan(result.loc['C', 'ma_200'])
+    assert np.isclose(result.loc['C', 'rsi'], reference_wilder_rsi(closes[2, 100:]))
+
+
+def test_technical_indicators_wrap_batch_engine():
+    """Test the single-symbol wrapper and its 'N/A' placeholders."""
+    history = pd.DataFrame({'c': np.arange(1.0, 61.0)})
+    indicators = analysis.calculate_technical_indicators(history)
+    assert indicators['ma_50'] == np.arange(11.0, 61.0).mean()
+    assert indicators['ma_200'] == 'N/A'
+    assert indicators['rsi'] == 100.0
+    assert analysis.calculate_technical_indicators(None) == {}
+
+
+def test_batch_intrinsic_values_match_scalar():
+    """Test the vectorized valuation against the per-symbol function, sentinels included."""
+    eps = [5.0, 'N/A', None, -1.0, 2.0, 3.0]
+    growth = [10.0, 5.0, 5.0, 5.0, None, 0.0]
+    price = [90.0, 50.0, 50.0, 50.0, 20.0, 0.0]
+    batch = analysis.calculate_intrinsic_values(eps, growth, price, bond_yield=5.5)
+
+    for i in range(len(eps)):
+        scalar = analysis.calculate_intrinsic_value(eps[i], growth[i], price[i], bond_yield=5.5)
+        for key in ('intrinsic_value', 'price_difference', 'percentage_difference'):
+            if scalar[key] == 'N/A':
+                assert np.isnan(batch[key][i])
+            else:
+                assert batch[key][i] == pytest.approx(scalar[key], abs=0.01)
+        assert analysis.RECOMMENDATIONS[batch['recommendation'][i]] == scalar['recommendation']
+
+    # 5 * (8.5 + 20) * 4.4 / 5.5: a higher AAA yield lowers the value
+    assert batch['intrinsic_value'][0] == pytest.approx(114.0)
+    assert batch['recommendation'].tolist() == [analysis.RECOMMEND_BUY] + [analysis.RECOMMEND_HOLD] * 5
+    assert analysis.calculate_intrinsic_value(5.0, 10.0, 100.0)['intrinsic_value'] == 142.5
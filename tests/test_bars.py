@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, UTC
+import pandas as pd
+from app.data.bars import BarRepository
+from app.analysis import calculate_batch_indicators
+
+
+def daily_bars(symbol, start, days, price=100.0):
+    timestamps = pd.date_range(start, periods=days, freq='D', tz='UTC')
+    return pd.DataFrame({
+        'symbol': symbol, 'timestamp': timestamps,
+        'open': price, 'high': price, 'low': price,
+        'close': [price + i for i in range(days)],
+        'volume': 1000.0, 'trade_count': 10.0, 'vwap': price
+    })
+
+
+class FakeProvider:
+    def __init__(self, end):
+        self.end = end
+        self.calls = []
+
+    def __call__(self, symbols, timeframe, start):
+        self.calls.append((tuple(symbols), start))
+        days = (self.end - start).days + 1
+        return pd.concat([daily_bars(s, start, days) for s in symbols], ignore_index=True)
+
+
+def test_sync_fetches_only_the_tail(tmp_path):
+    """Test that a second sync asks only for bars from the last stored bar on."""
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+    provider = FakeProvider(end=start + timedelta(days=9))
+    repo = BarRepository(str(tmp_path / 'bars.sqlite3'), provider)
+
+    repo.sync(['AAPL'], '1Day', start)
+    assert provider.calls == [(('AAPL',), start)]
+
+    provider.end = start + timedelta(days=11)
+    repo.sync(['AAPL'], '1Day', start)
+    assert provider.calls[1] == (('AAPL',), start + timedelta(days=9))
+
+    bars = repo.load('AAPL', '1Day', start)
+    assert len(bars) == 12
+    assert list(bars.columns[:2]) == ['symbol', 'timestamp']
+    assert bars['timestamp'].is_monotonic_increasing
+    assert bars['c'].iloc[0] == 100.0
+
+
+def test_bulk_backfill_groups_symbols_by_range(tmp_path):
+    """Test that symbols needing the same range share one request."""
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+    provider = FakeProvider(end=start + timedelta(days=4))
+    repo = BarRepository(str(tmp_path / 'bars.sqlite3'), provider, bulk_size=2)
+
+    repo.sync(['AAPL', 'MSFT', 'TSLA'], '1Day', start)
+    assert [symbols for symbols, _ in provider.calls] == [('AAPL', 'MSFT'), ('TSLA',)]
+
+    matrix = repo.close_matrix(['MSFT', 'AAPL', 'NONE'], '1Day', start)
+    assert list(matrix.index) == ['MSFT', 'AAPL', 'NONE']
+    assert matrix.shape == (3, 5)
+    assert matrix.loc['NONE'].isna().all()
+    indicators = calculate_batch_indicators(matrix)
+    assert list(indicators.index) == ['MSFT', 'AAPL', 'NONE']
+
+
+def test_symbols_without_bars_sync_from_the_watermark(tmp_path):
+    """Test that a symbol the provider has no bars for is not refetched from the covered start."""
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+    calls = []
+
+    def no_bars(symbols, timeframe, since):
+        calls.append(since)
+        return None
+
+    repo = BarRepository(str(tmp_path / 'bars.sqlite3'), no_bars)
+    repo.sync(['WARRANT'], '1Day', start)
+    repo.sync(['WARRANT'], '1Day', start)
+
+    assert calls[0] == start
+    assert calls[1] > start
+    assert datetime.now(UTC) - calls[1] <= timedelta(days=2)
+    assert repo.load('WARRANT', '1Day', start).empty
+
+
+def test_store_without_watermark_column_is_migrated(tmp_path):
+    """Test that a coverage table from before the sync watermark gains its column."""
+    import sqlite3
+    path = str(tmp_path / 'bars.sqlite3')
+    with sqlite3.connect(path) as db:
+        db.execute('CREATE TABLE coverage (symbol TEXT NOT NULL, timeframe TEXT NOT NULL, '
+                   'start_ts INTEGER NOT NULL, PRIMARY KEY (symbol, timeframe)) WITHOUT ROWID')
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+    repo = BarRepository(path, FakeProvider(end=start + timedelta(days=2)))
+    repo.sync(['AAPL'], '1Day', start)
+    assert len(repo.load('AAPL', '1Day', start)) == 3
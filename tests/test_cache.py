@@ -0,0 +1,117 @@
+import threading
+import time
+from datetime import datetime, timedelta, UTC
+from types import SimpleNamespace
+
+import pytest
+
+from app.data.cache import ClockCache, TTLCache
+
+
+def make_clock(is_open, seconds_to_boundary):
+    boundary = datetime.now(UTC) + timedelta(seconds=seconds_to_boundary)
+    return SimpleNamespace(is_open=is_open, next_open=boundary, next_close=boundary)
+
+
+def test_clock_cache_hits_until_expiry():
+    """Test that the clock is fetched once and then served from cache."""
+    cache = ClockCache(max_ttl=60)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return make_clock(True, 3600)
+
+    for _ in range(5):
+        assert cache.get(fetch).is_open is True
+
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 4
+    assert cache.stats()['misses'] == 1
+
+
+def test_clock_cache_expires_at_market_transition():
+    """Test that the cached clock expires at the next open/close boundary."""
+    cache = ClockCache(max_ttl=60)
+    clocks = [make_clock(True, 0.05), make_clock(False, 3600)]
+
+    assert cache.get(lambda: clocks.pop(0)).is_open is True
+    time.sleep(0.1)
+    assert cache.get(lambda: clocks.pop(0)).is_open is False
+    assert cache.stats()['misses'] == 2
+
+
+def test_clock_cache_single_flight():
+    """Test that concurrent callers share one fetch of an expired clock."""
+    cache = ClockCache(max_ttl=60)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return make_clock(False, 3600)
+
+    threads = [threading.Thread(target=cache.get, args=(fetch,)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+
+
+def test_ttl_cache_expiry_and_lru_eviction():
+    """Test per-entry TTLs and least-recently-used eviction."""
+    cache = TTLCache(max_entries=2)
+    cache.get_or_load('a', lambda: 1, ttl=60)
+    cache.get_or_load('b', lambda: 2, ttl=0)
+    assert cache.get_or_load('b', lambda: 3, ttl=60) == 3
+
+    cache.get_or_load('a', lambda: 0, ttl=60)  # hit, 'a' becomes most recent
+    cache.get_or_load('c', lambda: 4, ttl=60)  # evicts 'b'
+
+    assert cache.get_or_load('a', lambda: 0, ttl=60) == 1
+    assert cache.get_or_load('b', lambda: 5, ttl=60) == 5
+    assert cache.stats()['evictions'] == 2
+
+
+def test_ttl_cache_single_flight_shares_result_and_errors():
+    """Test that concurrent loads for one key share the loader call."""
+    cache = TTLCache()
+    calls = []
+    results = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'value'
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', loader, 60)))
+               for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ['value'] * 10
+
+    def failing_loader():
+        raise RuntimeError('provider down')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load('bad', failing_loader, 60)
+    assert cache.get_or_load('bad', lambda: 'ok', 60) == 'ok'
+
+
+def test_ttl_cache_refresh_peek_and_expires_in():
+    """Test that refresh reloads a cached key and peek never loads."""
+    cache = TTLCache(max_entries=4)
+    values = iter([1, 2])
+
+    assert cache.peek('a', 'missing') == 'missing'
+    assert cache.expires_in('a') is None
+    assert cache.get_or_load('a', lambda: next(values), ttl=60) == 1
+    assert cache.get_or_load('a', lambda: next(values), ttl=60, refresh=True) == 2
+    assert cache.peek('a') == 2
+    assert 59 < cache.expires_in('a') <= 60
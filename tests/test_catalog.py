@@ -0,0 +1,103 @@
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.data.assets import AssetUniverse
+from app.data.catalog import AssetCatalog
+
+
+ASSETS = [
+    SimpleNamespace(symbol='MSFT', name='Microsoft Corporation', exchange='NASDAQ'),
+    SimpleNamespace(symbol='AAPL', name='Apple Inc.', exchange='NASDAQ'),
+    SimpleNamespace(symbol='IBM', name='International Business Machines', exchange='NYSE'),
+    SimpleNamespace(symbol='APLE', name='Apple Hospitality REIT', exchange='NYSE'),
+]
+
+
+def test_query_sorts_without_search():
+    """Test that an empty search pages through the pre-sorted column."""
+    catalog = AssetCatalog.from_assets(ASSETS)
+    page, total = catalog.query(column='symbol', start=1, length=2)
+    assert total == 4
+    assert [row[0] for row in page] == ['APLE', 'IBM']
+
+    page, _ = catalog.query(column='name', descending=True, length=1)
+    assert page == [('MSFT', 'Microsoft Corporation', 'NASDAQ')]
+
+
+def test_query_matches_substring_of_symbol_or_name():
+    """Test that searches match the same rows as a substring scan."""
+    catalog = AssetCatalog.from_assets(ASSETS)
+    for search in ('apple', 'APL', 'ap', 'corp', 'business', 'zzz', 'i'):
+        expected = sorted(a.symbol for a in ASSETS
+                          if search.lower() in a.symbol.lower() or search.lower() in a.name.lower())
+        page, total = catalog.query(search=search, length=10)
+        assert [row[0] for row in page] == expected
+        assert total == len(expected)
+
+
+def test_query_results_are_cached():
+    """Test that paging through one query reuses the cached result."""
+    catalog = AssetCatalog.from_assets(ASSETS)
+    catalog.query(search='apple', start=0, length=1)
+    catalog.query(search='apple', start=1, length=1)
+    stats = catalog.stats()['queries']
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+
+
+def test_asset_universe_loads_lazily_from_snapshot(tmp_path):
+    """Test that the universe fetches once, then starts from the snapshot."""
+    path = str(tmp_path / 'assets.npy')
+    calls = []
+
+    def fetch_assets():
+        calls.append(1)
+        return ASSETS
+
+    universe = AssetUniverse(fetch_assets, path)
+    assert calls == []
+    assert len(universe.catalog()) == 4
+    assert calls == [1]
+
+    # A new process starts from the memory-mapped snapshot without fetching
+    restarted = AssetUniverse(fetch_assets, path)
+    catalog = restarted.catalog()
+    assert isinstance(catalog.table, np.memmap)
+    assert catalog.exchange_of('IBM') == 'NYSE'
+    assert calls == [1]
+
+
+def test_asset_universe_refreshes_stale_data_while_running(tmp_path):
+    """Test that a long-running universe re-checks its age and refreshes or reloads the snapshot."""
+    path = str(tmp_path / 'assets.npy')
+    calls = []
+
+    def fetch_assets():
+        calls.append(1)
+        return ASSETS[:len(calls) + 1]
+
+    universe = AssetUniverse(fetch_assets, path, max_age=60, check_interval=0)
+    assert len(universe.catalog()) == 2
+
+    # The snapshot turns a day old while the worker keeps serving
+    stale = time.time() - 24 * 60 * 60
+    os.utime(path, (stale, stale))
+    universe._loaded_at = stale
+    universe.catalog()
+    for _ in range(100):
+        if not universe._refreshing:
+            break
+        time.sleep(0.01)
+    assert calls == [1, 1]
+    assert len(universe.catalog()) == 3
+
+    # Another worker's refresh is picked up from the snapshot without fetching
+    other = AssetUniverse(lambda: ASSETS, path, check_interval=0)
+    other.refresh()
+    later = time.time() + 5
+    os.utime(path, (later, later))
+    assert len(universe.catalog()) == 4
+    assert calls == [1, 1]
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from app import charts
+
+
+def make_history():
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2025-01-01', periods=5, freq='D', tz='UTC'),
+        'c': [10.0, 11.0, 10.5, 12.0, 12.5],
+    })
+
+
+def test_render_chart_png_returns_png_bytes():
+    """Test that charts render to PNG without pyplot."""
+    png = charts.render_chart_png(make_history(), title='TEST', intrinsic_value=11.0)
+    assert png.startswith(b'\x89PNG')
+    assert charts.render_chart_png(None) is None
+
+
+def test_get_chart_png_is_cached_by_last_bar():
+    """Test that charts are rendered once per symbol, last bar and value."""
+    charts.chart_cache.invalidate()
+    history = make_history()
+
+    first = charts.get_chart_png('TEST', history, title='TEST', intrinsic_value=11.0)
+    second = charts.get_chart_png('TEST', history, title='TEST', intrinsic_value=11.0)
+    assert first == second
+    assert charts.chart_cache.stats()['misses'] == 1
+
+    longer = pd.concat([history, pd.DataFrame({
+        'timestamp': [pd.Timestamp('2025-01-06', tz='UTC')], 'c': [13.0]})])
+    charts.get_chart_png('TEST', longer, title='TEST', intrinsic_value=11.0)
+    assert charts.chart_cache.stats()['misses'] == 2
+    charts.chart_cache.invalidate()
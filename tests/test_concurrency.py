@@ -0,0 +1,16 @@
+from unittest.mock import MagicMock, patch
+from app import concurrency
+
+
+def test_offload_calls_directly_without_eventlet():
+    """Test that offload runs the call on the current thread in threading mode."""
+    assert concurrency.offload(sum, [1, 2, 3]) == 6
+
+
+def test_offload_uses_native_thread_pool_in_eventlet_mode():
+    """Test that offload hands blocking calls to eventlet's tpool once patched."""
+    tpool = MagicMock()
+    tpool.execute.return_value = 'result'
+    with patch.object(concurrency, '_tpool', tpool):
+        assert concurrency.offload(getattr, 'x', 'upper') == 'result'
+    tpool.execute.assert_called_once_with(getattr, 'x', 'upper')
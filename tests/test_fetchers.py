@@ -0,0 +1,186 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, UTC
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.data import fetchers
+from app.data.gateway import ProviderGateway
+
+
+def make_quote(price):
+    return SimpleNamespace(bid_price=price - 0.5, ask_price=price + 0.5, bid_size=1,
+                           ask_size=2, timestamp=datetime(2025, 1, 2, 15, 0, tzinfo=UTC))
+
+
+def test_fetch_latest_quotes_batches_symbols():
+    """Test that quotes are requested in chunks and the clock is read once."""
+    symbols = [f'S{i}' for i in range(5)]
+
+    def get_latest(symbols):
+        return {symbol: make_quote(100.0) for symbol in symbols}
+
+    with patch.object(fetchers, 'QUOTE_BATCH_SIZE', 2), \
+            patch.object(fetchers.provider, 'get_latest_quotes',
+                         side_effect=get_latest) as mock_latest, \
+            patch.object(fetchers, 'is_market_open', return_value=True) as mock_open:
+        quotes = fetchers.fetch_latest_quotes(symbols)
+
+    assert mock_latest.call_count == 3
+    mock_open.assert_called_once()
+    assert set(quotes) == set(symbols)
+    assert quotes['S0']['ask_price'] == 100.5
+    assert quotes['S0']['market_hours'] == 'open'
+
+
+def test_fetch_latest_quotes_skips_failed_chunk():
+    """Test that a failed chunk drops only its own symbols."""
+    def get_latest(symbols):
+        if 'A' in symbols:
+            raise RuntimeError('boom')
+        return {symbol: make_quote(10.0) for symbol in symbols}
+
+    with patch.object(fetchers, 'QUOTE_BATCH_SIZE', 1), \
+            patch.object(fetchers.provider, 'get_latest_quotes',
+                         side_effect=get_latest):
+        quotes = fetchers.fetch_latest_quotes(['A', 'B'], market_open=False)
+
+    assert set(quotes) == {'B'}
+    assert quotes['B']['market_hours'] == 'closed'
+
+
+def fake_components(calls, failing=()):
+    """Build DETAIL_COMPONENTS replacements that record their calls."""
+    values = {
+        'quote': {'current_price': 10.0, 'bid_price': 9.5, 'ask_price': 10.0},
+        'bars': None,
+        'info': {'name': 'Test Corp', 'eps': 1.0},
+        'income_statement': {'Revenue': '100'},
+        'balance_sheet': {},
+        'cash_flow': {},
+        'news': [{'title': 'Headline'}],
+    }
+
+    def make_loader(name):
+        def loader(symbol):
+            calls.append(name)
+            if name in failing:
+                raise RuntimeError(f'{name} unavailable')
+            return values[name]
+        return loader
+
+    return {name: (make_loader(name), 60) for name in values}
+
+
+def test_get_stock_details_caches_components():
+    """Test that repeated detail lookups reuse the cached components."""
+    calls = []
+    fetchers.detail_cache.invalidate()
+    with patch.dict(fetchers.DETAIL_COMPONENTS, fake_components(calls)), \
+            patch.object(fetchers, 'get_symbol_exchange', return_value='NASDAQ'):
+        first = fetchers.get_stock_details('TEST')
+        second = fetchers.get_stock_details('TEST')
+    fetchers.detail_cache.invalidate()
+
+    assert first['name'] == second['name'] == 'Test Corp'
+    assert first['current_price'] == 10.0
+    assert first['financials']['income_statement'] == {'Revenue': '100'}
+    assert sorted(calls) == sorted(fetchers.DETAIL_COMPONENTS)
+
+
+def test_get_stock_details_degrades_failed_components():
+    """Test that a failed component yields an empty section, not None."""
+    calls = []
+    fetchers.detail_cache.invalidate()
+    with patch.dict(fetchers.DETAIL_COMPONENTS, fake_components(calls, failing=('news',))), \
+            patch.object(fetchers, 'get_symbol_exchange', return_value='NASDAQ'):
+        data = fetchers.get_stock_details('TEST')
+    fetchers.detail_cache.invalidate()
+
+    assert data['name'] == 'Test Corp'
+    assert data['news'] == []
+    assert data['unavailable_sections'] == ['news']
+    assert fetchers.get_detail_timings()['news']['errors'] >= 1
+
+
+def test_get_stock_details_returns_none_for_unknown_symbols():
+    """Test that unlisted symbols, and symbols with neither quote nor bars, have no details."""
+    calls = []
+    fetchers.detail_cache.invalidate()
+    with patch.dict(fetchers.DETAIL_COMPONENTS, fake_components(calls)), \
+            patch.object(fetchers, 'get_symbol_exchange', return_value=None):
+        assert fetchers.get_stock_details('NOPE') is None
+    assert calls == []
+
+    with patch.dict(fetchers.DETAIL_COMPONENTS, fake_components(calls, failing=('quote',))), \
+            patch.object(fetchers, 'get_symbol_exchange', return_value='N/A'):
+        assert fetchers.get_stock_details('TEST') is None
+    fetchers.detail_cache.invalidate()
+
+
+def test_components_waiting_for_rate_limits_free_the_pool_at_the_deadline():
+    """Test that components stuck behind an exhausted rate limit give up with the page."""
+    class SlowProvider:
+        name = 'slow'
+        upstreams = {}
+
+        def get_fundamental(self, symbol, kind):
+            return {kind: symbol}
+
+        def is_rate_limit_error(self, error):
+            return False
+
+    gateway = ProviderGateway(SlowProvider(), rate_limits={'slow': 6}, timeout=30)
+    gateway.buckets['slow']._tokens = 0
+    gateway.buckets['slow'].rate = 0.001
+    components = {name: (lambda symbol, kind=name: gateway.get_fundamental(symbol, kind), 60)
+                  for name in ('info', 'news', 'income_statement')}
+    executor = ThreadPoolExecutor(max_workers=1)
+    fetchers.detail_cache.invalidate()
+    try:
+        with patch.dict(fetchers.DETAIL_COMPONENTS, components, clear=True), \
+                patch.object(fetchers, 'detail_executor', executor):
+            started = time.monotonic()
+            values, failed = fetchers.fetch_detail_components('TEST', timeout=0.2)
+            assert sorted(failed) == ['income_statement', 'info', 'news']
+            assert values['news'] == []
+            # The worker is free again instead of waiting out the gateway timeout
+            assert executor.submit(lambda: 'free').result(timeout=1) == 'free'
+            assert time.monotonic() - started < 2
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        fetchers.detail_cache.invalidate()
+
+
+def test_bond_yield_is_cached_and_falls_back():
+    """Test that the AAA yield is fetched once per TTL and defaults when unavailable."""
+    fetchers.detail_cache.invalidate(('bond_yield', 'AAA'))
+    with patch.object(fetchers.provider, 'get_bond_yield', return_value=5.2, create=True) as mock_yield:
+        assert fetchers.get_bond_yield() == 5.2
+        assert fetchers.get_bond_yield() == 5.2
+    mock_yield.assert_called_once()
+
+    fetchers.detail_cache.invalidate(('bond_yield', 'AAA'))
+    with patch.object(fetchers.provider, 'get_bond_yield', side_effect=OSError('offline'), create=True):
+        assert fetchers.get_bond_yield() == fetchers.analysis.BOND_YIELD_AAA
+    fetchers.detail_cache.invalidate(('bond_yield', 'AAA'))
+
+
+def test_screener_syncs_universe_bars_once_per_close():
+    """Test that screener passes reuse stored bars until the next close, retrying failed syncs."""
+    synced = []
+
+    def sync(symbols, timeframe, start):
+        synced.append(list(symbols))
+        if len(synced) == 1:
+            raise OSError('provider down')
+        return 0
+
+    with patch.object(fetchers, '_next_screener_sync', 0.0), \
+            patch.object(fetchers.bar_repository, 'sync', side_effect=sync), \
+            patch.object(fetchers.bar_repository, 'close_matrix', return_value='matrix'), \
+            patch.object(fetchers, '_seconds_until_next_close', return_value=3600):
+        assert fetchers._screener_closes(['AAPL']) == 'matrix'
+        fetchers._screener_closes(['AAPL'])
+        fetchers._screener_closes(['AAPL'])
+    assert synced == [['AAPL'], ['AAPL']]
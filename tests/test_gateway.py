@@ -0,0 +1,138 @@
+import threading
+import time
+import pytest
+from app.data.gateway import (PROVIDER_CALLS, ProviderGateway, RateLimitExceeded, background,
+                              parse_rate_limits)
+from app.ratelimit import BACKGROUND, INTERACTIVE, TokenBucket
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class FakeProvider:
+    name = 'fake'
+    upstreams = {'get_fundamental': 'slowapi'}
+    stream_url = 'ws://fake'
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def get_latest_quotes(self, symbols):
+        self.calls.append(tuple(symbols))
+        self.release.wait(2)
+        return {symbol: object() for symbol in symbols}
+
+    def get_fundamental(self, symbol, kind):
+        raise RateLimited('Too Many Requests')
+
+    def is_rate_limit_error(self, error):
+        return getattr(error, 'status_code', None) == 429
+
+
+def test_interactive_callers_go_first():
+    """Test that a waiting interactive call gets the next token ahead of an earlier background call."""
+    bucket = TokenBucket(10, capacity=1)
+    assert bucket.try_acquire()
+    order = []
+
+    def take(lane, name):
+        assert bucket.acquire(lane=lane, timeout=2)
+        order.append(name)
+
+    waiting = threading.Thread(target=take, args=(BACKGROUND, 'background'))
+    waiting.start()
+    time.sleep(0.02)
+    take(INTERACTIVE, 'interactive')
+    waiting.join()
+    assert order == ['interactive', 'background']
+
+
+def test_background_reserve_and_pause():
+    """Test that background calls leave the reserve and a pause empties the bucket."""
+    bucket = TokenBucket(1, capacity=2, reserve=1)
+    assert bucket.try_acquire(lane=BACKGROUND)
+    assert not bucket.acquire(lane=BACKGROUND, timeout=0)
+    assert bucket.acquire(lane=INTERACTIVE, timeout=0)
+
+    bucket = TokenBucket(100, capacity=5)
+    bucket.pause(0.2)
+    assert not bucket.acquire(timeout=0.05)
+    assert bucket.acquire(timeout=1)
+
+
+def test_identical_inflight_calls_share_one_request():
+    """Test that concurrent identical calls reach the provider once and get the same result."""
+    provider = FakeProvider()
+    provider.release.clear()
+    gateway = ProviderGateway(provider, rate_limits={})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gateway.get_latest_quotes(['AAPL'])))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    provider.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert provider.calls == [('AAPL',)]
+    assert len(results) == 3 and results[0] is results[1] is results[2]
+    gateway.get_latest_quotes(['AAPL'])
+    assert len(provider.calls) == 2
+    assert gateway.stream_url == 'ws://fake'
+
+
+def test_rate_limit_budget_lanes_and_429_cooldown():
+    """Test per-service budgets, background lane accounting and the pause after a 429."""
+    gateway = ProviderGateway(FakeProvider(), rate_limits={'fake': 6, 'slowapi': 60},
+                              timeout=0.05, cooldown=60)
+    background_calls = PROVIDER_CALLS.value(('fake', 'background'))
+    with background():
+        gateway.get_latest_quotes(['AAPL'])
+    assert PROVIDER_CALLS.value(('fake', 'background')) == background_calls + 1
+    with pytest.raises(RateLimitExceeded):
+        gateway.get_latest_quotes(['MSFT'])
+
+    with pytest.raises(RateLimited):
+        gateway.get_fundamental('AAPL', 'info')
+    # The 429 paused that service, so the next call is held back instead of sent
+    with pytest.raises(RateLimitExceeded):
+        gateway.get_fundamental('AAPL', 'info')
+    assert gateway.stats()['slowapi']['available'] == 0
+
+
+def test_parse_rate_limits_overrides_defaults():
+    """Test PROVIDER_RATE_LIMITS parsing."""
+    limits = parse_rate_limits('alpaca=100, fred=0')
+    assert limits['alpaca'] == 100 and limits['fred'] == 0 and limits['yfinance'] == 60
+    with pytest.raises(ValueError):
+        parse_rate_limits('alpaca=fast')
+
+
+def test_interactive_caller_promotes_a_waiting_background_call():
+    """Test that an interactive caller joining a background call held by the reserve is not left waiting."""
+    provider = FakeProvider()
+    gateway = ProviderGateway(provider, rate_limits={'fake': 6}, timeout=2)
+    bucket = gateway.buckets['fake']
+    bucket.reserve = 1
+    bucket.rate = 0.01  # no refill within the test
+    bucket._tokens = 1  # only the interactive reserve is left
+    results = []
+
+    def fetch_in_background():
+        with background():
+            results.append(gateway.get_latest_quotes(['AAPL']))
+
+    waiting = threading.Thread(target=fetch_in_background)
+    waiting.start()
+    time.sleep(0.05)
+    assert bucket.waiting(BACKGROUND) == 1 and provider.calls == []
+
+    started = time.monotonic()
+    result = gateway.get_latest_quotes(['AAPL'])
+    waiting.join()
+    assert time.monotonic() - started < 1
+    assert provider.calls == [('AAPL',)] and results == [result]
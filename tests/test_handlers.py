@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from app.app import app, socketio
+from app.app import app, precompute, socketio
 from app.sockets import handlers
 
 @pytest.fixture
@@ -10,6 +10,12 @@ def client():
     with app.test_client() as client:
         yield client
 
+@pytest.fixture(autouse=True)
+def no_precompute():
+    """Keep the precompute scheduler, which calls the real providers, from starting."""
+    with patch.object(precompute, 'start') as mock_start:
+        yield mock_start
+
 @pytest.fixture
 def socket_client(client):
     """SocketIO test client."""
@@ -19,6 +25,9 @@ def socket_client(client):
 def clear_watchlists():
     """Clear watchlists before each test."""
     handlers.watchlists.clear()
+    handlers.symbol_subscribers.clear()
+    handlers.current_subscribed.clear()
+    handlers.subscription_batcher.reset()
 
 @pytest.fixture(autouse=True)
 def mock_fetchers():
@@ -26,10 +35,12 @@ def mock_fetchers():
     with patch('app.data.fetchers.get_market_status', return_value={'is_open': True}) as mock_get_market_status, \
          patch('app.data.fetchers.fetch_latest_quote', return_value={
             'symbol': 'AAPL', 'ask_price': 150.0
-         }) as mock_fetch_latest_quote:
+         }) as mock_fetch_latest_quote, \
+         patch('app.data.fetchers.fetch_daily_closes', return_value=[]) as mock_fetch_daily_closes:
         yield {
             'get_market_status': mock_get_market_status,
-            'fetch_latest_quote': mock_fetch_latest_quote
+            'fetch_latest_quote': mock_fetch_latest_quote,
+            'fetch_daily_closes': mock_fetch_daily_closes
         }
 
 @pytest.fixture(autouse=True)
@@ -110,3 +121,103 @@ def test_disconnect(socket_client):
     
     # Check that the client's watchlist is removed from the server
     assert sid not in handlers.watchlists
+
+
+def test_quote_fan_out_only_reaches_subscribers(socket_client):
+    """Test that stream quotes are emitted only to clients watching the symbol."""
+    other_client = socketio.test_client(app, namespace='/ws/watchlist')
+    socket_client.emit('add_ticker', {'ticker': 'AAPL'}, namespace='/ws/watchlist')
+    other_client.emit('add_ticker', {'ticker': 'MSFT'}, namespace='/ws/watchlist')
+    socket_client.get_received('/ws/watchlist')
+    other_client.get_received('/ws/watchlist')
+
+    assert set(handlers.symbol_subscribers) == {'AAPL', 'MSFT'}
+
+    message = '[{"T": "q", "S": "AAPL", "bp": 149.5, "ap": 150.5, "t": "2025-01-02T15:00:00Z"}]'
+    handlers.on_message_handler(None, message, socketio)
+    handlers.ingest_pipeline.drain()
+    handlers.quote_pipeline.flush(socketio)
+
+    received = socket_client.get_received('/ws/watchlist')
+    assert [msg['name'] for msg in received] == ['quotes']
+    assert received[0]['args'][0]['data'][0]['bid_price'] == 149.5
+    assert other_client.get_received('/ws/watchlist') == []
+
+    other_client.disconnect(namespace='/ws/watchlist')
+    assert 'MSFT' not in handlers.symbol_subscribers
+
+
+def test_quote_bursts_are_conflated(socket_client):
+    """Test that a burst is flushed as one emit per symbol room holding the newest quote."""
+    socket_client.emit('add_ticker', {'ticker': 'AAPL'}, namespace='/ws/watchlist')
+    socket_client.emit('add_ticker', {'ticker': 'MSFT'}, namespace='/ws/watchlist')
+    socket_client.get_received('/ws/watchlist')
+    before = handlers.quote_pipeline.stats()
+
+    for message in ('[{"T": "q", "S": "AAPL", "bp": 1.0, "ap": 2.0}]',
+                    '[{"T": "q", "S": "AAPL", "bp": 3.0, "ap": 4.0},'
+                    ' {"T": "q", "S": "MSFT", "bp": 5.0, "ap": 6.0}]'):
+        handlers.on_message_handler(None, message, socketio)
+        handlers.ingest_pipeline.drain()
+    assert handlers.quote_pipeline.stats()['depth'] == 2
+    handlers.quote_pipeline.flush(socketio)
+
+    received = socket_client.get_received('/ws/watchlist')
+    assert [msg['name'] for msg in received] == ['quotes', 'quotes']
+    quotes = {q['symbol']: q for msg in received for q in msg['args'][0]['data']}
+    assert quotes['AAPL']['bid_price'] == 3.0
+    assert quotes['MSFT']['bid_price'] == 5.0
+    stats = handlers.quote_pipeline.stats()
+    assert stats['conflated'] == before['conflated'] + 1
+    assert stats['emits'] == before['emits'] + 2
+
+
+def test_upstream_subscription_follows_first_and_last_watcher(socket_client):
+    """Test that a symbol is subscribed upstream once and dropped with its last watcher."""
+    other_client = socketio.test_client(app, namespace='/ws/watchlist')
+    with patch.object(handlers, 'send_subscription', return_value=True) as mock_send:
+        socket_client.emit('add_ticker', {'ticker': 'AAPL'}, namespace='/ws/watchlist')
+        other_client.emit('add_ticker', {'ticker': 'AAPL'}, namespace='/ws/watchlist')
+        assert handlers.current_subscribed == {'AAPL'}
+        handlers.subscription_batcher.flush()
+        mock_send.assert_called_once_with('subscribe', ['AAPL'])
+
+        socket_client.emit('remove_ticker', {'ticker': 'AAPL'}, namespace='/ws/watchlist')
+        assert handlers.current_subscribed == {'AAPL'}
+        other_client.disconnect(namespace='/ws/watchlist')
+        assert handlers.current_subscribed == set()
+        handlers.subscription_batcher.flush()
+        mock_send.assert_called_with('unsubscribe', ['AAPL'])
+        assert mock_send.call_count == 2
+
+
+def test_backfill_publishes_bulk_quotes_for_subscribed_symbols():
+    """Test that a reconnect backfills every subscribed symbol with one bulk fetch."""
+    fetchers = MagicMock()
+    fetchers.fetch_latest_quotes.return_value = {
+        'AAPL': {'symbol': 'AAPL', 'bid_price': 1.0, 'ask_price': 2.0}}
+    handlers.current_subscribed.update({'AAPL', 'MSFT'})
+
+    handlers.backfill_quotes(fetchers)
+
+    fetchers.fetch_latest_quotes.assert_called_once_with({'AAPL', 'MSFT'})
+    assert handlers.latest_stock_data['AAPL']['bid_price'] == 1.0
+
+
+def test_clients_watching_a_symbol_share_one_room_emit(socket_client):
+    """Test that one flush emits a symbol's quote once to its room, reaching every watcher."""
+    other_client = socketio.test_client(app, namespace='/ws/watchlist')
+    for client in (socket_client, other_client):
+        client.emit('add_ticker', {'ticker': 'AAPL'}, namespace='/ws/watchlist')
+        client.get_received('/ws/watchlist')
+    before = handlers.quote_pipeline.stats()['emits']
+
+    handlers.on_message_handler(None, '[{"T": "q", "S": "AAPL", "bp": 7.0, "ap": 8.0}]', socketio)
+    handlers.ingest_pipeline.drain()
+    handlers.quote_pipeline.flush(socketio)
+
+    assert handlers.quote_pipeline.stats()['emits'] == before + 1
+    for client in (socket_client, other_client):
+        received = client.get_received('/ws/watchlist')
+        assert received[0]['args'][0]['data'][0]['bid_price'] == 7.0
+    other_client.disconnect(namespace='/ws/watchlist')
@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from app import analysis, indicators
+
+
+def test_streaming_state_matches_batch_engine():
+    """Test O(1) streaming values against a full recomputation."""
+    rng = np.random.default_rng(1)
+    closes = 100 + np.cumsum(rng.normal(size=260))
+    state = indicators.IndicatorState()
+    for close in closes[:-1]:
+        state.push_close(close)
+
+    # A live price is treated as today's close
+    state.update_price(closes[-1])
+    expected = analysis.calculate_batch_indicators(closes).iloc[0]
+    values = state.values()
+    for name in ('ma_50', 'ma_200', 'rsi'):
+        assert np.isclose(values[name], expected[name])
+
+
+def test_new_session_close_is_provisional_until_the_official_close():
+    """Test that the last live price stands in as the close until the bar store's close replaces it."""
+    start = date(2024, 11, 1)
+    history = [(start + timedelta(days=i), float(i + 1)) for i in range(49)]
+    state = indicators.IndicatorState()
+    for day, close in history:
+        state.push_close(close, day)
+    session, next_session = date(2025, 1, 2), date(2025, 1, 3)
+    state.update_price(60.0, '2025-01-02T20:59:59.123456789Z')
+    state.update_price(70.0, '2025-01-03T15:00:00Z')
+
+    closes = [close for _, close in history]
+    assert state.provisional and state.close_date == session
+    assert np.isclose(state.values()['ma_50'], np.mean(closes[-48:] + [60.0, 70.0]))
+
+    # The official close replaces the provisional one; today's bar is ignored
+    state.commit_closes(history + [(session, 65.0), (next_session, 99.0)])
+    assert not state.provisional and state.close_date == session
+    assert np.isclose(state.values()['ma_50'], np.mean(closes[-48:] + [65.0, 70.0]))
+
+    batch = state.values()
+    expected = analysis.calculate_batch_indicators(np.array(closes + [65.0, 70.0])).iloc[0]
+    for name in ('ma_50', 'rsi'):
+        assert np.isclose(batch[name], expected[name])
+
+
+def test_after_hours_quote_does_not_repeat_a_seeded_close():
+    """Test that a session seeded with its official close gets no provisional close on rollover."""
+    start = date(2025, 1, 1)
+    history = [(start + timedelta(days=i), float(i + 1)) for i in range(20)]
+    session = history[-1][0]
+    indicators.seed_symbol('TEST', history)
+    try:
+        state = indicators._states['TEST']
+        indicators.update_quote('TEST', {'bid_price': 25.0, 'ask_price': 25.0,
+                                         'timestamp': '2025-01-20T22:30:00Z'})
+        indicators.update_quote('TEST', {'bid_price': 26.0, 'ask_price': 26.0,
+                                         'timestamp': '2025-01-21T15:00:00Z'})
+        assert not state.provisional and state.close_date == session
+        assert state._count == 20
+
+        indicators.push_daily_closes('TEST', history + [(date(2025, 1, 21), 99.0)])
+        assert state._count == 20 and state.close_date == session
+    finally:
+        indicators.drop_symbol('TEST')
+
+
+def test_reseed_keeps_the_live_session():
+    """Test that reseeding carries the live price and its session date over."""
+    start = date(2025, 1, 1)
+    history = [(start + timedelta(days=i), float(i + 1)) for i in range(20)]
+    indicators.seed_symbol('TEST', history)
+    try:
+        indicators.update_quote('TEST', {'bid_price': 30.0, 'ask_price': 30.0,
+                                         'timestamp': '2025-01-22T15:00:00Z'})
+        indicators.seed_symbol('TEST', history)
+        state = indicators._states['TEST']
+        assert state.live_date == date(2025, 1, 22)
+        assert state.live_price == 30.0
+    finally:
+        indicators.drop_symbol('TEST')
+
+
+def test_update_quote_only_for_tracked_symbols():
+    """Test the per-symbol registry used by the socket handlers."""
+    start = date(2025, 1, 1)
+    indicators.seed_symbol('TEST', [(start + timedelta(days=i), float(i + 1)) for i in range(49)])
+    try:
+        values = indicators.update_quote('TEST', {'bid_price': 49.0, 'ask_price': 51.0})
+        assert np.isclose(values['ma_50'], (sum(range(1, 50)) + 50.0) / 50)
+        assert values['ma_200'] is None
+        assert values['rsi'] == 100.0
+        assert indicators.update_quote('OTHER', {'bid_price': 1.0, 'ask_price': 1.0}) is None
+    finally:
+        indicators.drop_symbol('TEST')
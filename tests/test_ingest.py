@@ -0,0 +1,65 @@
+import json
+
+from app.data.ticks import TickStore
+from app.sockets.ingest import (
+    BarRecord, IngestPipeline, QuoteRecord, TradeRecord, decode_frames)
+
+
+def test_decode_frames_keeps_quotes_and_counts_errors():
+    """Test decoding quote messages with either decoder."""
+    frames = [
+        '[{"T": "success", "msg": "authenticated"}]',
+        '[{"T": "q", "S": "AAPL", "bp": 1.5, "ap": 2.5, "t": "2025-01-02T15:00:00Z"}]',
+        'not json',
+        '[{"T": "q", "bp": 1.0}]',
+    ]
+    for loads in (None, json.loads):
+        records, errors = decode_frames(frames, loads=loads)
+        assert records == [QuoteRecord('AAPL', 1.5, 2.5, '2025-01-02T15:00:00Z')]
+        assert errors == 2
+
+
+def test_ingest_pipeline_batches_and_bounds_frames():
+    """Test that frames are handled in batches and the buffer drops the oldest."""
+    batches = []
+    pipeline = IngestPipeline(batches.append, capacity=3, batch_size=2)
+    for i in range(4):
+        pipeline.enqueue(json.dumps([{'T': 'q', 'S': f'S{i}', 'bp': i, 'ap': i}]))
+
+    assert pipeline.stats()['dropped'] == 1
+    assert pipeline.drain() == 3
+    assert [[r.symbol for r in batch] for batch in batches] == [['S1', 'S2'], ['S3']]
+    assert pipeline.stats()['depth'] == 0
+
+
+def test_decode_frames_handles_trades_and_bars():
+    """Test decoding the trade and minute bar channels."""
+    frame = json.dumps([
+        {'T': 't', 'S': 'AAPL', 'p': 150.25, 's': 100, 't': '2025-01-02T15:00:01.5Z'},
+        {'T': 'b', 'S': 'AAPL', 'o': 150.0, 'h': 151.0, 'l': 149.5, 'c': 150.5,
+         'v': 12000, 't': '2025-01-02T15:00:00Z'},
+    ])
+    records, errors = decode_frames([frame])
+    assert errors == 0
+    assert records[0] == TradeRecord('AAPL', 150.25, 100.0, '2025-01-02T15:00:01.5Z')
+    assert records[1] == BarRecord('AAPL', 150.0, 151.0, 149.5, 150.5, 12000.0,
+                                   '2025-01-02T15:00:00Z')
+
+
+def test_tick_store_keeps_last_n_rows_per_symbol():
+    """Test that bars and trades are bounded by the configured capacities."""
+    store = TickStore(bar_capacity=3, trade_capacity=2)
+    store.add_bars([BarRecord('AAPL', i, i, i, float(i), 1.0, f'2025-01-02T15:0{i}:00Z')
+                    for i in range(5)])
+    store.add_trades([TradeRecord('AAPL', float(i), 1.0, f'2025-01-02T15:00:0{i}Z')
+                      for i in range(3)])
+
+    bars = store.bars('AAPL')
+    assert bars['close'].tolist() == [2.0, 3.0, 4.0]
+    assert str(bars['timestamp'].iloc[-1]) == '2025-01-02 15:04:00+00:00'
+    assert store.trades('AAPL')['price'].tolist() == [1.0, 2.0]
+    assert store.bars('MSFT').empty
+    assert store.stats()['bytes'] == store.bytes_per_symbol()
+
+    store.drop('AAPL')
+    assert store.stats()['bytes'] == 0
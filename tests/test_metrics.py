@@ -0,0 +1,124 @@
+import time
+import threading
+import pytest
+from app import metrics
+from app import app as app_module
+from app.app import app
+from app.data import fetchers
+from app.profiler import SamplingProfiler
+
+
+def test_registry_renders_prometheus_text():
+    """Test counters, callback gauges and cumulative histogram buckets in the exposition."""
+    registry = metrics.Registry(prefix='test_')
+    frames = registry.register(metrics.Counter('frames_total', 'Frames', ('kind',)))
+    registry.register(metrics.Gauge('clients', 'Clients', func=lambda: 3))
+    latency = registry.register(metrics.Histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0)))
+
+    frames.inc(labels=('quote',))
+    frames.inc(2, labels=('quote',))
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = registry.render()
+    assert '# TYPE test_frames_total counter' in text
+    assert 'test_frames_total{kind="quote"} 3' in text
+    assert 'test_clients 3' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count 3' in text
+    assert latency.value() == {'count': 3, 'sum': pytest.approx(5.55)}
+
+    with pytest.raises(ValueError):
+        frames.inc()
+    with pytest.raises(ValueError):
+        registry.register(metrics.Counter('frames_total', 'Frames'))
+
+
+def test_timed_counts_raised_errors():
+    """Test that the timed decorator observes every call and counts the ones that raise."""
+    latency = metrics.Histogram('call_seconds', 'Calls', ('function',))
+    errors = metrics.Counter('call_errors_total', 'Errors', ('function',))
+
+    @metrics.timed(latency, ('fail',), errors)
+    def fail():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        fail()
+    assert latency.value(('fail',))['count'] == 1
+    assert errors.value(('fail',)) == 1
+
+
+def test_fetchers_report_latency_and_handled_errors(monkeypatch):
+    """Test that public fetchers are timed and their handled errors are counted."""
+    def failing_quotes(symbols):
+        raise RuntimeError('provider down')
+
+    monkeypatch.setattr(fetchers.provider, 'get_latest_quotes', failing_quotes)
+    calls = fetchers.FETCH_SECONDS.value(('fetch_latest_quote',))['count']
+    errors = fetchers.FETCH_ERRORS.value(('fetch_latest_quote',))
+
+    assert fetchers.fetch_latest_quote('AAPL') is None
+    assert fetchers.FETCH_SECONDS.value(('fetch_latest_quote',))['count'] == calls + 1
+    assert fetchers.FETCH_ERRORS.value(('fetch_latest_quote',)) == errors + 1
+
+
+def test_metrics_endpoint_exposes_stream_and_http_metrics(monkeypatch):
+    """Test that /metrics serves the registry, including request latency by endpoint."""
+    app.config['TESTING'] = True
+    monkeypatch.setitem(app.config, 'LOGIN_DISABLED', True)
+    with app.test_client() as client:
+        client.get('/metrics')
+        response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert 'stockmaster_connected_clients ' in text
+    assert 'stockmaster_thread_alive{thread="websocket_thread"}' in text
+    assert '# TYPE stockmaster_fetcher_seconds histogram' in text
+    assert 'stockmaster_http_request_seconds_count{endpoint="metrics_endpoint",status="200"}' in text
+
+
+def test_metrics_endpoint_requires_login_or_token(monkeypatch):
+    """Test that anonymous scrapes are refused and the bearer token is accepted."""
+    app.config['TESTING'] = True
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', 'secret')
+    with app.test_client() as client:
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', None)
+    with app.test_client() as client:
+        assert client.get('/metrics').status_code == 401
+
+
+def test_sampling_profiler_collects_stacks_while_running():
+    """Test that the profiler samples other threads only between start and stop."""
+    stop = threading.Event()
+
+    def busy_worker():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_worker, name='busy_worker', daemon=True)
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    assert profiler.start()
+    assert not profiler.start()
+    time.sleep(0.1)
+    assert profiler.stop()
+    stop.set()
+
+    samples = profiler.stats()['samples']
+    assert samples > 0
+    assert 'busy_worker;' in profiler.report()
+    assert len(profiler.report(limit=1).splitlines()) == 1
+    time.sleep(0.02)
+    assert profiler.stats()['samples'] == samples
+
+    profiler.reset()
+    assert profiler.report() == ''
@@ -0,0 +1,114 @@
+import threading
+import pytest
+from app.precompute import PopularityTracker, PrecomputeScheduler, WarmTask
+from app.ratelimit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(tasks, watched=(), market_open=True, **kwargs):
+    scheduler = PrecomputeScheduler(tasks, lambda: set(watched), lambda: market_open, **kwargs)
+    # Run warms inline so rounds are deterministic
+    scheduler._submit = scheduler._warm
+    return scheduler
+
+
+def test_token_bucket_refills_over_time():
+    """Test bursts up to capacity and refilling at the configured rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(2, capacity=4, clock=clock)
+    assert bucket.try_acquire(4)
+    assert not bucket.try_acquire()
+    clock.now = 1.0
+    assert bucket.available() == pytest.approx(2)
+    clock.now = 10.0
+    assert bucket.available() == pytest.approx(4)
+
+
+def test_popularity_decays_and_prunes():
+    """Test that scores halve every half-life and going over the cap prunes to the top symbols."""
+    clock = FakeClock()
+    tracker = PopularityTracker(half_life=100, max_symbols=3, clock=clock)
+    for _ in range(4):
+        tracker.record('OLD')
+    clock.now = 200
+    tracker.record('NEW')
+    tracker.record('NEW')
+    assert tracker.top(2) == [('NEW', pytest.approx(2)), ('OLD', pytest.approx(1))]
+
+    tracker.record('ONCE')
+    assert len(tracker) == 3
+    clock.now = 300
+    tracker.record('LAST')
+    assert len(tracker) == 2
+    assert [symbol for symbol, _ in tracker.top(5)] == ['NEW', 'LAST']
+    tracker.record('AGAIN')
+    assert len(tracker) == 3
+
+
+def test_plan_orders_by_score_times_staleness():
+    """Test that priority combines popularity, watched weight and staleness, skipping fresh data."""
+    staleness = {'AAPL': 0.5, 'MSFT': 1.0, 'TSLA': 0.0}
+    task = WarmTask('news', lambda symbol: None, staleness.get)
+    scheduler = _scheduler([task], watched=['MSFT'], watched_weight=2.0)
+    for _ in range(3):
+        scheduler.record('AAPL')
+    scheduler.record('TSLA')
+
+    work = scheduler.plan(scheduler.candidates(), market_open=True)
+    assert [(symbol, priority) for priority, symbol, _ in work] == [
+        ('MSFT', pytest.approx(2.0)), ('AAPL', pytest.approx(1.5))]
+
+
+def test_run_once_respects_call_budget_and_concurrency():
+    """Test that work beyond the provider-call budget or worker limit waits for a later round."""
+    warmed = []
+    tasks = [WarmTask('fundamentals', lambda symbol: warmed.append(('f', symbol)), lambda s: 1.0, cost=4),
+             WarmTask('indicators', lambda symbol: warmed.append(('i', symbol)), lambda s: 1.0,
+                      cost=0, heavy=False)]
+    scheduler = _scheduler(tasks, watched=['AAPL', 'MSFT'], calls_per_minute=6)
+
+    assert scheduler.run_once() == 3
+    assert ('f', 'AAPL') in warmed and ('f', 'MSFT') not in warmed
+    assert scheduler.deferred == 1
+
+    blocked = threading.Event()
+    scheduler = _scheduler(tasks, watched=['AAPL', 'MSFT'], max_concurrency=1)
+    scheduler._submit = lambda symbol, task: blocked.set()
+    assert scheduler.run_once() == 1
+    assert scheduler.stats()['inflight'] == 1
+    assert scheduler.run_once() == 0
+
+
+def test_closed_market_only_fills_missing_heavy_data():
+    """Test that heavy refreshes pause while the market is closed but missing data still loads."""
+    warmed = []
+    staleness = {'AAPL': 1.0, 'MSFT': 0.6}
+    tasks = [WarmTask('news', warmed.append, staleness.get),
+             WarmTask('indicators', lambda symbol: warmed.append('i' + symbol), staleness.get,
+                      cost=0, heavy=False)]
+    scheduler = _scheduler(tasks, watched=['AAPL', 'MSFT'], market_open=False)
+
+    scheduler.run_once()
+    assert sorted(warmed) == ['AAPL', 'iAAPL', 'iMSFT']
+    assert scheduler.paused == 1
+    scheduler.run_once()
+    assert scheduler.paused == 1
+
+
+def test_failed_warm_is_counted_and_released():
+    """Test that a failing task is counted and can be retried next round."""
+    def fail(symbol):
+        raise RuntimeError('provider down')
+
+    scheduler = _scheduler([WarmTask('bars', fail, lambda s: 1.0)], watched=['AAPL'])
+    scheduler.run_once()
+    scheduler.run_once()
+    assert scheduler.errors == 2
+    assert scheduler.stats()['inflight'] == 0
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.app import app
+from app.data import fetchers
+from app.data.screener import (Screener, ScreenerTable, build_metrics_table,
+                               normalize_filters)
+
+
+def _closes(rows, days=260):
+    """Close matrix with one named row per series."""
+    return pd.DataFrame(np.array(list(rows.values()), dtype=float)[:, -days:],
+                        index=list(rows))
+
+
+@pytest.fixture
+def table():
+    days = 260
+    t = np.arange(days, dtype=float)
+    rows = {
+        'UP': 100 + t,                                  # MA50 far above MA200
+        'DOWN': 400 - t,                                # MA50 far below MA200
+        # Falls for most of the year, then rallies so MA50 crossed MA200 in the last days
+        'CROSS': np.concatenate([np.linspace(200, 100, days - 24), np.linspace(100, 300, 24)]),
+        'NEW': np.concatenate([np.full(days - 20, np.nan), np.linspace(10, 12, 20)]),
+    }
+    assets = [('UP', 'Up Corp', 'NASDAQ'), ('DOWN', 'Down Inc', 'NYSE'),
+              ('CROSS', 'Cross Co', 'NYSE'), ('NEW', 'New Listing', 'NASDAQ'),
+              ('NOBARS', 'No Bars', 'NYSE')]
+    fundamentals = {
+        'UP': {'eps': 20.0, 'earnings_growth': 0.1, 'market_cap': 5e11, 'pe_ratio': 18.0},
+        'DOWN': {'eps': 'N/A', 'earnings_growth': None, 'market_cap': 2e9, 'pe_ratio': 'N/A'},
+    }
+    return ScreenerTable(build_metrics_table(assets, _closes(rows), fundamentals))
+
+
+def _symbols(rows):
+    return [row['symbol'] for row in rows]
+
+
+def test_metrics_table_trend_cross_and_valuation(table):
+    """Test MA trend and crossover flags, last close and the intrinsic value gap."""
+    rows = {row['symbol']: row for row in table.query(length=10)[0]}
+    assert rows['UP']['trend'] == 1 and rows['UP']['cross'] == 0
+    assert rows['DOWN']['trend'] == -1
+    assert rows['CROSS']['trend'] == 1 and rows['CROSS']['cross'] == 1
+    assert rows['NEW']['price'] == pytest.approx(12.0)
+    assert rows['NEW']['ma_50'] is None and rows['NEW']['trend'] == 0
+    assert rows['NOBARS']['price'] is None
+
+    # Graham value of UP: 20 * (8.5 + 2 * 10) = 570 against a last close of 359
+    assert rows['UP']['intrinsic_value'] == pytest.approx(570.0)
+    assert rows['UP']['intrinsic_gap'] == pytest.approx((570 - 359) / 359 * 100)
+    assert rows['UP']['recommendation'] == 1
+    assert rows['DOWN']['intrinsic_value'] is None
+    assert rows['DOWN']['market_cap'] == 2e9 and rows['DOWN']['pe_ratio'] is None
+
+
+def test_query_filters_sorts_and_paginates(table):
+    """Test filters, NaN-last sorting in both directions and pages of the cached result."""
+    assert _symbols(table.query(normalize_filters({'trend': 'up'}))[0]) == ['CROSS', 'UP']
+    assert _symbols(table.query(normalize_filters({'cross': 'golden'}))[0]) == ['CROSS']
+    assert _symbols(table.query(normalize_filters({'exchange': 'nasdaq'}))[0]) == ['NEW', 'UP']
+    assert _symbols(table.query(normalize_filters({'min_market_cap': '1e10'}))[0]) == ['UP']
+    assert _symbols(table.query(normalize_filters({'recommendation': 'buy'}))[0]) == ['UP']
+
+    by_price = _symbols(table.query(sort='price', descending=True)[0])
+    assert by_price[0] == 'UP' and by_price[-1] == 'NOBARS'
+    assert _symbols(table.query(sort='price')[0])[-1] == 'NOBARS'
+
+    page, total = table.query(sort='symbol', start=1, length=2)
+    assert total == 5
+    assert _symbols(page) == ['DOWN', 'NEW']
+    assert _symbols(table.query(sort='symbol', start=3, length=2)[0]) == ['NOBARS', 'UP']
+    assert table.stats()['queries']['hits'] == 1
+
+
+def test_normalize_filters_rejects_bad_values():
+    """Test that RSI bands combine with explicit bounds and bad values raise."""
+    assert normalize_filters({'rsi_band': 'oversold', 'min_rsi': '10'}) == (('rsi', 10.0, 30),)
+    with pytest.raises(ValueError):
+        normalize_filters({'rsi_band': 'sideways'})
+    with pytest.raises(ValueError):
+        normalize_filters({'min_pe_ratio': 'cheap'})
+
+
+def test_screener_refresh_fetches_fundamentals_in_batches():
+    """Test that each pass fetches a limited batch of fundamentals, never-fetched symbols first."""
+    assets = [(f'S{i}', f'Stock {i}', 'NYSE') for i in range(5)]
+    loaded = []
+
+    def load_fundamentals(symbol):
+        loaded.append(symbol)
+        return {'eps': 1.0, 'earnings_growth': 0.05, 'market_cap': 1e9, 'pe_ratio': 10.0}
+
+    closes = pd.DataFrame(np.full((5, 3), 10.0), index=[symbol for symbol, _, _ in assets])
+    screener = Screener(lambda: assets, lambda symbols: closes, load_fundamentals,
+                        fundamentals_batch=2)
+    screener.refresh()
+    screener.refresh()
+    screener.refresh()
+
+    assert loaded == ['S0', 'S1', 'S2', 'S3', 'S4', 'S0']
+    assert screener.stats()['table']['size'] == 5
+    assert screener.refreshes == 3
+
+
+def test_api_screener_pages_and_validates(table, monkeypatch):
+    """Test the endpoint's paging, 400 on bad filters and 503 before the first pass."""
+    app.config['TESTING'] = True
+    monkeypatch.setitem(app.config, 'LOGIN_DISABLED', True)
+    with app.test_client() as client:
+        monkeypatch.setattr(fetchers, 'get_screener_table', lambda: None)
+        assert client.get('/api/screener').status_code == 503
+
+        monkeypatch.setattr(fetchers, 'get_screener_table', lambda: table)
+        response = client.get('/api/screener?trend=up&sort=ma_gap&order=desc&length=1')
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['recordsTotal'] == 5
+        assert body['recordsFiltered'] == 2
+        assert [row['symbol'] for row in body['data']] == ['UP']
+
+        assert client.get('/api/screener?cross=sideways').status_code == 400
@@ -0,0 +1,52 @@
+import json
+import websocket
+from datetime import datetime, timedelta, UTC
+from app.data import fetchers
+from app.data.simulator import SimulatorProvider, SimulatorServer, MarketSimulator, simulated_symbols
+from app.sockets.ingest import decode_frames, QuoteRecord
+
+
+def test_simulator_data_is_reproducible():
+    """Test that bars, quotes and fundamentals depend only on the seed."""
+    first, second = SimulatorProvider(symbols=3, seed=7), SimulatorProvider(symbols=3, seed=7)
+    start = datetime.now(UTC) - timedelta(days=30)
+
+    bars = first.get_bars(['AAAA', 'AAAB'], '1Day', start)
+    assert bars.equals(second.get_bars(['AAAA', 'AAAB'], '1Day', start))
+    assert set(bars['symbol']) == {'AAAA', 'AAAB'}
+    assert (bars['high'] >= bars['close']).all()
+    assert first.get_fundamental('AAAA', 'info') == second.get_fundamental('AAAA', 'info')
+    assert [a.symbol for a in first.get_all_assets()] == simulated_symbols(3) == ['AAAA', 'AAAB', 'AAAC']
+
+    quote = first.get_latest_quotes(['AAAA'])['AAAA']
+    assert 0 < quote.bid_price < quote.ask_price
+
+
+def test_fetchers_work_with_simulator_provider(tmp_path, monkeypatch):
+    """Test that the detail loaders accept simulator data through the provider seam."""
+    monkeypatch.setattr(fetchers, 'provider', SimulatorProvider(symbols=3))
+    assert fetchers._load_info('AAAA')['sector'] != 'N/A'
+    assert fetchers._load_income_statement('AAAA')
+    assert len(fetchers._load_news('AAAA')) == 5
+    assert fetchers.fetch_latest_quotes(['AAAA'], market_open=True)['AAAA']['market_hours'] == 'open'
+
+
+def test_stream_server_speaks_alpaca_protocol():
+    """Test that the local stream authenticates, subscribes and streams decodable quotes."""
+    server = SimulatorServer(MarketSimulator(seed=1), rate=2000, tick=0.01).start()
+    ws = websocket.create_connection(server.url, timeout=5)
+    try:
+        assert json.loads(ws.recv())[0]['msg'] == 'connected'
+        ws.send(json.dumps({'action': 'auth', 'key': 'k', 'secret': 's'}))
+        assert json.loads(ws.recv())[0]['msg'] == 'authenticated'
+        ws.send(json.dumps({'action': 'subscribe', 'quotes': ['AAAA'], 'trades': ['AAAA'],
+                            'bars': ['AAAA']}))
+        assert json.loads(ws.recv())[0]['T'] == 'subscription'
+
+        records, errors = decode_frames([ws.recv() for _ in range(5)])
+        assert errors == 0
+        assert records and all(r.symbol == 'AAAA' for r in records)
+        assert any(type(r) is QuoteRecord for r in records)
+    finally:
+        ws.close()
+        server.stop()
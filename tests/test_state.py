@@ -0,0 +1,111 @@
+import fakeredis
+import pytest
+from app.sockets.state import InProcessStateStore, RedisStateStore
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def store(request):
+    """Both state stores must behave the same."""
+    if request.param == 'memory':
+        return InProcessStateStore()
+    return RedisStateStore(fakeredis.FakeRedis(decode_responses=True))
+
+
+def test_first_and_last_subscriber(store):
+    """Test that add/remove report the first and last watcher of a symbol."""
+    store.add_client('a')
+    store.add_client('b')
+    assert store.add_ticker('a', 'AAPL') is True
+    assert store.add_ticker('b', 'AAPL') is False
+    assert set(store.subscribers('AAPL')) == {'a', 'b'}
+
+    assert store.remove_ticker('a', 'AAPL') is False
+    assert store.is_watched('AAPL')
+    assert store.remove_ticker('b', 'AAPL') is True
+    assert not store.is_watched('AAPL')
+    assert store.symbols() == set()
+
+
+def test_remove_client_returns_unwatched_symbols(store):
+    """Test that dropping a client reports only symbols nobody else watches."""
+    store.add_client('a')
+    store.add_client('b')
+    store.add_ticker('a', 'AAPL')
+    store.add_ticker('a', 'MSFT')
+    store.add_ticker('b', 'MSFT')
+
+    assert store.client_count() == 2
+    assert store.remove_client('a') == {'AAPL'}
+    assert not store.has_client('a')
+    assert store.client_count() == 1
+    assert store.tickers('a') == set()
+    assert store.symbols() == {'MSFT'}
+
+
+def test_redis_stores_are_shared_between_workers():
+    """Test that two workers on one Redis see each other's watchlists and quotes."""
+    server = fakeredis.FakeServer()
+    first = RedisStateStore(fakeredis.FakeRedis(server=server, decode_responses=True))
+    second = RedisStateStore(fakeredis.FakeRedis(server=server, decode_responses=True))
+
+    first.add_client('a')
+    assert first.add_ticker('a', 'AAPL') is True
+    assert second.add_ticker('b', 'AAPL') is False
+    second.save_quotes({'AAPL': {'symbol': 'AAPL', 'bid_price': 150.0}})
+
+    assert first.get_quotes(['AAPL', 'MSFT']) == {'AAPL': {'symbol': 'AAPL', 'bid_price': 150.0}}
+    assert first.subscribers('AAPL') == {'a', 'b'}
+
+
+def test_redis_leadership():
+    """Test that only one worker holds the ingest leader lock until it expires."""
+    server = fakeredis.FakeServer()
+    first = RedisStateStore(fakeredis.FakeRedis(server=server, decode_responses=True))
+    second = RedisStateStore(fakeredis.FakeRedis(server=server, decode_responses=True))
+
+    assert first.acquire_leadership('one', ttl=10) is True
+    assert second.acquire_leadership('two', ttl=10) is False
+    assert first.acquire_leadership('one', ttl=10) is True
+
+    first.client.delete('stockmaster:leader')
+    assert second.acquire_leadership('two', ttl=10) is True
+
+
+def test_redis_remove_ticker_commits_without_retrying():
+    """Test that unwatching runs its WATCHed transaction once when nothing else writes."""
+    store = RedisStateStore(fakeredis.FakeRedis(decode_responses=True))
+    store.add_ticker('a', 'AAPL')
+    runs = []
+    transaction = store.client.transaction
+
+    def counting(func, *keys, **kwargs):
+        def run(pipe):
+            runs.append(1)
+            return func(pipe)
+        return transaction(run, *keys, **kwargs)
+
+    store.client.transaction = counting
+    assert store.remove_ticker('a', 'AAPL') is True
+    assert runs == [1]
+    assert store.tickers('a') == set()
+
+
+def test_leader_reaps_clients_of_dead_workers():
+    """Test that clients of a worker whose heartbeat expired stop watching their symbols."""
+    server = fakeredis.FakeServer()
+    dead = RedisStateStore(fakeredis.FakeRedis(server=server, decode_responses=True),
+                           instance_id='dead', instance_ttl=10)
+    alive = RedisStateStore(fakeredis.FakeRedis(server=server, decode_responses=True),
+                            instance_id='alive', instance_ttl=10)
+    dead.add_client('a')
+    dead.add_ticker('a', 'AAPL')
+    dead.add_ticker('a', 'MSFT')
+    alive.add_client('b')
+    alive.add_ticker('b', 'MSFT')
+
+    assert alive.reap_dead_instances() == set()
+    dead.client.delete('stockmaster:instance:dead')  # heartbeat expired
+    assert alive.reap_dead_instances() == {'AAPL'}
+    assert alive.symbols() == {'MSFT'}
+    assert not alive.has_client('a') and alive.has_client('b')
+    assert alive.client.smembers('stockmaster:instances') == {'alive'}
@@ -0,0 +1,98 @@
+import threading
+from app.sockets.subscriptions import SubscriptionBatcher
+
+
+def make_batcher(watched, connected=True, max_symbols_per_frame=1000):
+    frames = []
+
+    def send(action, symbols):
+        if not connected:
+            return False
+        frames.append((action, list(symbols)))
+        return True
+
+    return SubscriptionBatcher(send, lambda: watched, max_symbols_per_frame=max_symbols_per_frame), frames
+
+
+def test_changes_within_a_window_are_coalesced():
+    """Test that adds are sent as one frame and an add+remove in one window sends nothing."""
+    watched = {'AAPL', 'MSFT'}
+    batcher, frames = make_batcher(watched)
+    batcher.mark({'AAPL'})
+    batcher.mark({'MSFT'})
+    batcher.mark({'TSLA'})  # added and removed again before the flush
+    batcher.flush()
+    assert frames == [('subscribe', ['AAPL', 'MSFT'])]
+
+    frames.clear()
+    batcher.flush()
+    assert frames == []
+
+
+def test_mass_removal_sends_one_unsubscribe():
+    """Test that many symbols losing their last watcher produce a single frame."""
+    symbols = {f'S{i}' for i in range(500)}
+    watched = set(symbols)
+    batcher, frames = make_batcher(watched)
+    batcher.replay()
+    frames.clear()
+
+    watched.clear()
+    for symbol in symbols:
+        batcher.mark({symbol})
+    batcher.flush()
+    assert len(frames) == 1
+    assert frames[0][0] == 'unsubscribe'
+    assert set(frames[0][1]) == symbols
+
+
+def test_replay_chunks_full_set_and_resets_pending():
+    """Test that a reconnect replays every watched symbol in few frames."""
+    watched = {f'S{i}' for i in range(25)}
+    batcher, frames = make_batcher(watched, max_symbols_per_frame=10)
+    batcher.mark({'S1'})
+    batcher.replay()
+    assert [action for action, _ in frames] == ['subscribe'] * 3
+    assert {s for _, chunk in frames for s in chunk} == watched
+
+    frames.clear()
+    batcher.flush()
+    assert frames == []
+
+
+def test_changes_are_kept_while_disconnected():
+    """Test that changes marked while the stream is down are sent once it is back."""
+    watched = {'AAPL'}
+    batcher, frames = make_batcher(watched, connected=False)
+    batcher.mark({'AAPL'})
+    assert batcher.flush() == (set(), set())
+    assert batcher.stats()['pending'] == 1
+
+
+def test_watched_set_changes_wait_for_a_running_flush():
+    """Test that a change made under the batcher lock waits for the flush reading the watched set."""
+    watched = {'AAPL'}
+    batcher, frames = make_batcher(watched)
+    changes = []
+
+    def watch_msft():
+        with batcher.lock:
+            watched.add('MSFT')
+        batcher.mark({'MSFT'})
+
+    def send(action, symbols):
+        changes.append(threading.Thread(target=watch_msft))
+        changes[-1].start()
+        changes[-1].join(0.05)
+        frames.append((action, list(symbols), set(watched)))
+        return True
+
+    batcher.send = send
+    batcher.mark({'AAPL'})
+    batcher.flush()
+    changes[0].join()
+    assert frames == [('subscribe', ['AAPL'], {'AAPL'})]
+
+    batcher.flush()
+    changes[-1].join()
+    assert frames[-1][:2] == ('subscribe', ['MSFT'])
@@ -0,0 +1,42 @@
+import threading
+from app.sockets.upstream import UpstreamSupervisor
+
+
+def test_backoff_grows_with_jitter_and_caps():
+    """Test that delays double per failure, stay within the jitter band and cap."""
+    supervisor = UpstreamSupervisor(None, base_delay=1, max_delay=8, rng=lambda: 1.0)
+    delays = []
+    for failures in range(6):
+        supervisor.failures = failures
+        delays.append(supervisor.next_delay())
+    assert delays == [1, 2, 4, 8, 8, 8]
+
+    supervisor.rng = lambda: 0.0
+    assert supervisor.next_delay() == 4
+
+
+def test_reconnect_triggers_backfill_and_metrics():
+    """Test that a dropped connection is retried and the second open backfills."""
+    backfilled = threading.Event()
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError('name resolution failed')
+        supervisor.opened()
+        supervisor.closed()
+        if len(attempts) == 3:
+            supervisor.stop()
+
+    supervisor = UpstreamSupervisor(connect, on_reconnect=backfilled.set,
+                                    base_delay=0.001, max_delay=0.01)
+    supervisor.run()
+
+    assert len(attempts) == 3
+    assert backfilled.wait(1)
+    stats = supervisor.stats()
+    assert stats['connects'] == 2
+    assert stats['reconnects'] == 1
+    assert stats['connected'] is False
+    assert stats['consecutive_failures'] == 3
@@ -1,6 +1,10 @@
 import pytest
-from app.app import app, socketio
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.app import app, precompute, socketio
 from app.auth import User, users
+from app.data import fetchers
+from app.data.catalog import AssetCatalog
 from werkzeug.security import generate_password_hash
 
 @pytest.fixture
@@ -13,6 +17,25 @@ def client():
         yield client
 
 
+@pytest.fixture
+def logged_in_client(client):
+    """Test client logged in as a test user."""
+    hashed_password = generate_password_hash('testpassword', method='pbkdf2:sha256')
+    users[1] = User(id=1, username='testuser', password=hashed_password)
+    client.post('/auth/login', data=dict(
+        username='testuser',
+        password='testpassword'
+    ), follow_redirects=True)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def no_precompute():
+    """Keep the precompute scheduler, which calls the real providers, from starting."""
+    with patch.object(precompute, 'start') as mock_start:
+        yield mock_start
+
+
 @pytest.fixture
 def socketio_client():
     return socketio.test_client(app, namespace='/ws/watchlist')
@@ -38,3 +61,27 @@ def test_index_route(client):
 
 def test_socketio_connect(socketio_client):
     assert socketio_client.is_connected('/ws/watchlist')
+
+
+def test_api_assets_echoes_draw_and_reuses_cached_queries(logged_in_client):
+    """Test that every response echoes its draw while repeated searches hit the catalog query cache."""
+    client = logged_in_client
+    catalog = AssetCatalog.from_assets([
+        SimpleNamespace(symbol='AAPL', name='Apple Inc.', exchange='NASDAQ'),
+        SimpleNamespace(symbol='IBM', name='International Business Machines', exchange='NYSE'),
+    ])
+    with patch.object(fetchers, 'get_asset_catalog', return_value=catalog):
+        response = client.get('/api/assets?draw=1&search[value]=app')
+        assert response.status_code == 200
+        assert response.json['recordsFiltered'] == 1
+        assert response.json['data'][0][1] == 'Apple Inc.'
+
+        # DataTables increments draw on every request; each response echoes
+        # its own draw while the query itself comes from the catalog cache
+        hits = catalog.stats()['queries']['hits']
+        for draw in (2, 3):
+            repeated = client.get(f'/api/assets?draw={draw}&search[value]=app&_=170000000{draw}')
+            assert repeated.status_code == 200
+            assert repeated.json['draw'] == draw
+            assert repeated.json['data'] == response.json['data']
+        assert catalog.stats()['queries']['hits'] == hits + 2